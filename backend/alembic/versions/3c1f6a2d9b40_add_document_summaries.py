@@ -0,0 +1,38 @@
+"""Add document summaries
+
+Revision ID: 3c1f6a2d9b40
+Revises: ed88acafe517
+Create Date: 2026-10-19 10:12:31.418206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f6a2d9b40'
+down_revision: Union[str, None] = 'ed88acafe517'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('documents') as batch_op:
+        batch_op.add_column(sa.Column('doc_uid', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('summary', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('key_facts', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('summarized_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_documents_doc_uid', ['doc_uid'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('documents') as batch_op:
+        batch_op.drop_index('ix_documents_doc_uid')
+        batch_op.drop_column('summarized_at')
+        batch_op.drop_column('key_facts')
+        batch_op.drop_column('summary')
+        batch_op.drop_column('doc_uid')
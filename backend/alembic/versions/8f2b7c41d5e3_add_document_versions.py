@@ -0,0 +1,53 @@
+"""Add document versions and chunk hashes
+
+Revision ID: 8f2b7c41d5e3
+Revises: 3c1f6a2d9b40
+Create Date: 2026-10-19 14:03:52.517940
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2b7c41d5e3'
+down_revision: Union[str, None] = '3c1f6a2d9b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('documents') as batch_op:
+        # Every version of a document keeps its filename
+        batch_op.drop_index('ix_documents_filename')
+        batch_op.create_index('ix_documents_filename', ['filename'], unique=False)
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+        batch_op.add_column(sa.Column('previous_version_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('content_hash', sa.String(), nullable=True))
+        batch_op.create_foreign_key('fk_documents_previous_version', 'documents', ['previous_version_id'], ['id'])
+        batch_op.create_index('ix_documents_previous_version_id', ['previous_version_id'])
+        batch_op.create_index('ix_documents_content_hash', ['content_hash'])
+
+    with op.batch_alter_table('chunks') as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(), nullable=True))
+        batch_op.create_index('ix_chunks_content_hash', ['content_hash'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('chunks') as batch_op:
+        batch_op.drop_index('ix_chunks_content_hash')
+        batch_op.drop_column('content_hash')
+
+    with op.batch_alter_table('documents') as batch_op:
+        batch_op.drop_index('ix_documents_content_hash')
+        batch_op.drop_index('ix_documents_previous_version_id')
+        batch_op.drop_constraint('fk_documents_previous_version', type_='foreignkey')
+        batch_op.drop_column('content_hash')
+        batch_op.drop_column('previous_version_id')
+        batch_op.drop_column('version')
+        batch_op.drop_index('ix_documents_filename')
+        batch_op.create_index('ix_documents_filename', ['filename'], unique=True)
@@ -0,0 +1,30 @@
+"""Add stage timings to query logs
+
+Revision ID: a6e9c3f04b71
+Revises: f4b1d8c27e95
+Create Date: 2026-10-19 20:12:05.418337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6e9c3f04b71'
+down_revision: Union[str, None] = 'f4b1d8c27e95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('query_logs') as batch_op:
+        batch_op.add_column(sa.Column('stage_timings', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('query_logs') as batch_op:
+        batch_op.drop_column('stage_timings')
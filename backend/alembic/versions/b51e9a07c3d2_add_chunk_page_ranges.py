@@ -0,0 +1,32 @@
+"""Add chunk page ranges
+
+Revision ID: b51e9a07c3d2
+Revises: 8f2b7c41d5e3
+Create Date: 2026-10-19 15:21:08.204736
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b51e9a07c3d2'
+down_revision: Union[str, None] = '8f2b7c41d5e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('chunks') as batch_op:
+        batch_op.add_column(sa.Column('page_start', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('page_end', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('chunks') as batch_op:
+        batch_op.drop_column('page_end')
+        batch_op.drop_column('page_start')
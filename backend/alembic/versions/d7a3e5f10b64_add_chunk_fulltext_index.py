@@ -0,0 +1,35 @@
+"""Add chunk full-text index
+
+Revision ID: d7a3e5f10b64
+Revises: b51e9a07c3d2
+Create Date: 2026-10-19 16:40:27.931552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.fts import FTS_DROP, create_fts
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a3e5f10b64'
+down_revision: Union[str, None] = 'b51e9a07c3d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # FTS5 table plus sync triggers; indexes the chunks already stored.
+    # Other databases have no FTS5, and /search reports 501 there
+    if op.get_bind().dialect.name == "sqlite":
+        create_fts(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "sqlite":
+        for statement in FTS_DROP:
+            op.execute(sa.text(statement))
@@ -0,0 +1,36 @@
+"""Add document listing indexes
+
+Revision ID: e2c8f6a91d07
+Revises: d7a3e5f10b64
+Create Date: 2026-10-19 17:32:14.660381
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c8f6a91d07'
+down_revision: Union[str, None] = 'd7a3e5f10b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_documents_status', 'documents', ['status'])
+    op.create_index('ix_documents_author', 'documents', ['author'])
+    op.create_index('ix_documents_doc_type', 'documents', ['doc_type'])
+    op.create_index('ix_documents_upload_time', 'documents', ['upload_time'])
+    op.create_index('ix_documents_status_upload_time', 'documents', ['status', 'upload_time', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_documents_status_upload_time', table_name='documents')
+    op.drop_index('ix_documents_upload_time', table_name='documents')
+    op.drop_index('ix_documents_doc_type', table_name='documents')
+    op.drop_index('ix_documents_author', table_name='documents')
+    op.drop_index('ix_documents_status', table_name='documents')
@@ -0,0 +1,60 @@
+"""Compress document text
+
+Revision ID: f4b1d8c27e95
+Revises: e2c8f6a91d07
+Create Date: 2026-10-19 18:47:39.102855
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.text_store import compress, decompress
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b1d8c27e95'
+down_revision: Union[str, None] = 'e2c8f6a91d07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('documents') as batch_op:
+        batch_op.add_column(sa.Column('text_codec', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('text_compressed', sa.LargeBinary(), nullable=True))
+        batch_op.add_column(sa.Column('paragraph_index', sa.LargeBinary(), nullable=True))
+        batch_op.add_column(sa.Column('text_chars', sa.Integer(), nullable=True))
+
+    # Move existing text into the compressed column one row at a time; the
+    # paragraph index is rebuilt from blank lines on read (text_store.load_paragraphs)
+    conn = op.get_bind()
+    ids = [row[0] for row in conn.execute(sa.text("SELECT id FROM documents WHERE ocr_text IS NOT NULL"))]
+    for doc_id in ids:
+        text = conn.execute(sa.text("SELECT ocr_text FROM documents WHERE id = :id"), {"id": doc_id}).scalar()
+        codec, blob = compress(text.encode("utf-8"))
+        conn.execute(
+            sa.text("UPDATE documents SET text_codec = :codec, text_compressed = :blob, text_chars = :chars, "
+                    "ocr_text = NULL WHERE id = :id"),
+            {"codec": codec, "blob": blob, "chars": len(text), "id": doc_id}
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    rows = conn.execute(sa.text("SELECT id, text_codec FROM documents WHERE text_compressed IS NOT NULL")).all()
+    for doc_id, codec in rows:
+        blob = conn.execute(sa.text("SELECT text_compressed FROM documents WHERE id = :id"), {"id": doc_id}).scalar()
+        conn.execute(
+            sa.text("UPDATE documents SET ocr_text = :text WHERE id = :id"),
+            {"text": decompress(codec, blob).decode("utf-8"), "id": doc_id}
+        )
+
+    with op.batch_alter_table('documents') as batch_op:
+        batch_op.drop_column('text_chars')
+        batch_op.drop_column('paragraph_index')
+        batch_op.drop_column('text_compressed')
+        batch_op.drop_column('text_codec')
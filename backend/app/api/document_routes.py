@@ -1,17 +1,29 @@
 # backend/app/api/document_routes.py
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from typing import List, Optional, Literal, Callable, Dict, Any, Tuple
 from pydantic import BaseModel
+from dataclasses import replace
+import datetime
 import logging
+import gzip
+import re
 
-from app.db.session import get_db
+import orjson
+
+from app.db.session import get_async_db
 from app.db.models import Document
+from app.core.text_store import load_text, load_paragraphs, ZSTD, zstandard
+from app.services.document_listing import (
+    DocumentFilters, InvalidCursor, decode_cursor, stream_documents, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 
 class DocumentResponse(BaseModel):
@@ -23,28 +35,186 @@ class DocumentResponse(BaseModel):
     status: str
 
 
-@router.get("/documents", response_model=List[DocumentResponse])
-def list_documents(db: Session = Depends(get_db)) -> List[DocumentResponse]:
+class DocumentPage(BaseModel):
+    items: List[DocumentResponse]
+    next_cursor: Optional[str] = None  # pass back as `cursor` for the next page
+    total: Optional[int] = None        # rows matching the filters (omitted with include_total=false)
+
+
+class ListingParams:
+    """Query parameters shared by the document listing endpoints."""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        sort: Literal["upload_time", "filename", "author", "doc_type", "status", "id"] = "upload_time",
+        order: Literal["asc", "desc"] = "desc",
+        status: Optional[str] = None,
+        doc_type: Optional[str] = None,
+        author: Optional[str] = None,
+        uploaded_after: Optional[datetime.datetime] = None,
+        uploaded_before: Optional[datetime.datetime] = None,
+        include_total: bool = True,
+    ):
+        self.cursor, self.limit, self.sort, self.order = cursor, limit, sort, order
+        self.filters = DocumentFilters(status, doc_type, author, uploaded_after, uploaded_before)
+        self.include_total = include_total
+
+    def stream(self, serialize: Callable[[Document], Dict[str, Any]], **overrides) -> StreamingResponse:
+        if self.cursor:
+            try:
+                decode_cursor(self.cursor, self.sort, self.order)
+            except InvalidCursor as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        filters = replace(self.filters, **overrides)
+        return StreamingResponse(
+            stream_documents(filters, serialize, self.sort, self.order, self.cursor, self.limit, self.include_total),
+            media_type="application/json"
+        )
+
+
+def serialize_document(doc: Document) -> Dict[str, Any]:
+    return {
+        "id": doc.id,
+        "filename": doc.filename,
+        "author": doc.author,
+        "doc_type": doc.doc_type,
+        "upload_time": doc.upload_time.isoformat() if doc.upload_time else None,
+        "status": doc.status,
+    }
+
+
+@router.get("/documents", response_model=DocumentPage)
+def list_documents(params: ListingParams = Depends()):
     """
-    Returns a list of all uploaded documents.
+    Returns one page of uploaded documents, newest first by default.
+    Follow `next_cursor` for the next page.
     """
-    try:
-        docs = db.query(Document).all()
-        if not docs:
-            logger.info("No documents found in the database.")
-            return []
-    except Exception as e:
-        logger.error(f"Failed to fetch documents: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Failed to fetch documents")
-
-    return [
-        DocumentResponse(
-            id=doc.id,
-            filename=doc.filename,
-            author=doc.author,
-            doc_type=doc.doc_type,
-            upload_time=doc.upload_time.isoformat() if doc.upload_time else None,
-            status=doc.status
-        )
-        for doc in docs
-    ]
+    return params.stream(serialize_document)
+
+
+# Paragraphs returned when a range is open-ended
+MAX_PARAGRAPHS = 500
+# Below this, compressing costs more than it saves
+MIN_COMPRESS_BYTES = 1024
+_BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def pick_encoding(accept_encoding: str) -> Optional[str]:
+    """zstd if the client takes it (and zstandard is installed), else gzip, else none."""
+    accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    if ZSTD in accepted and zstandard is not None:
+        return ZSTD
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def encode_body(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == ZSTD:
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+class RangeNotSatisfiable(ValueError):
+    """A well-formed byte range that starts at or past the end of the body."""
+
+
+def parse_byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end exclusive) for a single `bytes=a-b` range. None for a header
+    to ignore (malformed, multiple ranges, other units), which gets the full
+    body; raises RangeNotSatisfiable when the range lies past the end.
+    """
+    match = _BYTE_RANGE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        suffix = int(last)  # suffix range: the last N bytes
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable(header)
+        return max(0, size - suffix), size
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    return start, min(size, int(last) + 1) if last else size
+
+
+@router.get("/{document_id}/text")
+async def document_text(
+    document_id: int,
+    request: Request,
+    para_start: Optional[int] = Query(default=None, ge=0, description="First paragraph (0-based)"),
+    para_end: Optional[int] = Query(default=None, ge=0, description="Paragraph after the last one returned"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Extracted text of a document. Without paragraph bounds: the whole text as
+    text/plain, honouring `Range: bytes=...` (206). With `para_start`/`para_end`:
+    JSON {"document_id", "total_paragraphs", "paragraphs": [{"index", "page", "text"}]}.
+    Responses carry an ETag (a document version's text never changes) and are
+    zstd- or gzip-encoded per Accept-Encoding.
+    """
+    doc = (await db.execute(select(Document).options(load_only(
+        Document.id, Document.doc_uid, Document.ocr_text, Document.text_codec,
+        Document.text_compressed, Document.paragraph_index
+    )).where(Document.id == document_id))).scalar_one_or_none()
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    paged = para_start is not None or para_end is not None
+    byte_range = request.headers.get("range") if not paged else None
+    encoding = None if byte_range else pick_encoding(request.headers.get("accept-encoding", ""))
+    variant = "p{}-{}".format(para_start or 0, "" if para_end is None else para_end) if paged else "full"
+    # Each encoding of a representation gets its own ETag
+    etag_for = lambda enc: f'"{doc.doc_uid or doc.id}-{variant}-{enc or "identity"}"'
+    headers = {"Vary": "Accept-Encoding", "Cache-Control": "private, max-age=3600"}
+    if_none_match = request.headers.get("if-none-match", "")
+    for tag in {etag_for(None), etag_for(encoding)}:
+        if tag in if_none_match:
+            return Response(status_code=304, headers={**headers, "ETag": tag})
+
+    text = load_text(doc)
+    if paged:
+        index = load_paragraphs(doc, text)
+        start = para_start or 0
+        end = min(len(index), para_end if para_end is not None else start + MAX_PARAGRAPHS)
+        body = orjson.dumps({
+            "document_id": doc.id,
+            "total_paragraphs": len(index),
+            "paragraphs": [
+                {"index": i, "page": index[i][2], "text": text[index[i][0]:index[i][1]]}
+                for i in range(start, end)
+            ],
+        })
+        media_type = "application/json"
+    else:
+        body = text.encode("utf-8")
+        media_type = "text/plain; charset=utf-8"
+        headers["Accept-Ranges"] = "bytes"
+        # A stale If-Range means the client's partial copy is of another version: send it all
+        if byte_range and request.headers.get("if-range", etag_for(None)) == etag_for(None):
+            try:
+                span = parse_byte_range(byte_range, len(body))
+            except RangeNotSatisfiable:
+                headers["Content-Range"] = f"bytes */{len(body)}"
+                return Response(status_code=416, headers={**headers, "ETag": etag_for(None)})
+            # An unusable Range header is ignored: the full body follows
+            if span is not None:
+                headers["ETag"] = etag_for(None)
+                headers["Content-Range"] = f"bytes {span[0]}-{span[1] - 1}/{len(body)}"
+                return Response(body[span[0]:span[1]], status_code=206, media_type=media_type, headers=headers)
+
+    if encoding and len(body) >= MIN_COMPRESS_BYTES:
+        body = encode_body(body, encoding)
+        headers["Content-Encoding"] = encoding
+    else:
+        encoding = None
+    headers["ETag"] = etag_for(encoding)
+    return Response(body, media_type=media_type, headers=headers)
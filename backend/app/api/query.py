@@ -1,21 +1,27 @@
 # backend/app/api/query.py
 
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from anyio import to_thread
+from fastapi import APIRouter, HTTPException, Header, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional, Literal
+from starlette.background import BackgroundTask
 import logging
-import datetime
-import json
 
-from app.db.session import get_db
-from app.db.models import QueryLog
-from app.services.llm_service import generate_answer
+from app.services.llm_service import iter_answer_events
+from app.services.query_service import query_flight, query_key, generate_answer_async, cancel_on_disconnect
 from app.services.vector_store import PERSIST_PATH
+from app.services.llm_cache import set_cache_bypass, reset_cache_bypass
+from app.services.deadline import Deadline, set_deadline, reset_deadline
+from app.services.admission import query_admission
+from app.services.executors import PipelineSteps, pipeline_pool
+from app.services.query_log import query_log_writer, safe_json_dumps
+from app.services.metrics import collect_timings
+from app.logging_config import PAYLOAD
+from app.config import settings
+
+# Clients send `X-LLM-Cache: bypass` to force fresh completions
+CACHE_BYPASS_VALUES = {"bypass", "no-cache", "off"}
 
-# Set up logging to include DEBUG messages
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 # Initialize router
@@ -23,8 +29,11 @@ router = APIRouter()
 
 class QueryRequest(BaseModel):
     question: str
-    doc_ids: Optional[List[int]] = None  # Placeholder for future filtering
-    top_k: Optional[int] = 5             # Placeholder for future ranking
+    top_k: Optional[int] = 5             # Number of chunks retrieved
+    # fast: passages + highlights, no LLM | standard: one answer | full: answer + table + synthesis
+    mode: Literal["fast", "standard", "full"] = "full"
+    # End-to-end latency budget; stages that don't fit are skipped (see `degraded`)
+    budget_ms: Optional[int] = Field(default=None, gt=0)
 
 class QueryResponse(BaseModel):
     answer: str
@@ -32,52 +41,70 @@ class QueryResponse(BaseModel):
     themes: List[str]
     tabular_results: List[dict] = []
     synthesized_summary: Optional[str] = None
+    mode: str = "full"
+    hits: List[dict] = []                # fast mode: ranked chunks with highlighted sentences
+    degraded: List[str] = []             # stages skipped or cut short to meet the budget
 
-def safe_json_dumps(data):
-    try:
-        return json.dumps(data)
-    except Exception:
-        return json.dumps(str(data))
+def request_deadline(query: QueryRequest) -> Deadline:
+    """The budget starts when the request arrives, before any queueing."""
+    return Deadline((query.budget_ms or settings.QUERY_BUDGET_MS) / 1000.0)
+
+def save_query_log(question: str, answer: str, citations: list, themes: list,
+                   stage_timings: Optional[dict] = None) -> None:
+    # Queued; written in batches by the background writer
+    query_log_writer.record(question, answer, citations, themes, PERSIST_PATH, stage_timings)
+
+def format_sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {safe_json_dumps(data)}\n\n"
 
 @router.post("/", response_model=QueryResponse)
-async def query_documents(query: QueryRequest, db: Session = Depends(get_db)):
+async def query_documents(
+    query: QueryRequest,
+    request: Request,
+    x_llm_cache: Optional[str] = Header(default=None)
+):
+    deadline = request_deadline(query)
     # Validate input
     if not query.question.strip():
         raise HTTPException(status_code=400, detail="❌ Question is required")
-    logger.debug(f"🔍 Received question: {query.question}")
+    logger.debug("🔍 Received question: %s", query.question)
 
-    # Generate answer offloaded to a background thread
+    # Identical concurrent questions share one pipeline run. Context vars, and
+    # so the cache bypass flag, are copied into the shared task and its threads.
+    bypass = (x_llm_cache or "").lower() in CACHE_BYPASS_VALUES
+    bypass_token = set_cache_bypass(bypass)
+    key = query_key(query.question, query.top_k, query.mode, bypass, query.budget_ms)
     try:
-        result = await to_thread.run_sync(generate_answer, PERSIST_PATH, query.question)
-        logger.debug(f"[query_documents] generate_answer result: {result}")
+        # Waiting for a slot counts against the request's budget
+        async with query_admission.admit(timeout=deadline.remaining()):
+            result = await cancel_on_disconnect(
+                request,
+                query_flight.run(key, lambda: generate_answer_async(
+                    PERSIST_PATH, query.question, query.mode, query.top_k, deadline
+                ))
+            )
+        logger.debug("[query_documents] generate_answer result: %s", result, extra=PAYLOAD)
 
         answer = result.get("answer", "")
         citations = result.get("citations", [])
         themes = result.get("themes", [])
         doc_table = result.get("doc_table", [])
         synthesized_summary = result.get("synthesized_summary", "")
+        hits = result.get("hits", [])
+        degraded = result.get("degraded", [])
+        if degraded:
+            logger.warning("⏱️ Budget exceeded, degraded stages: %s", ', '.join(degraded))
         logger.info("✅ LLM response generated successfully")
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"❌ Answer generation failed: {e}", exc_info=True)
+        logger.error("❌ Answer generation failed: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Error generating answer")
+    finally:
+        reset_cache_bypass(bypass_token)
 
-    # Save query log to database
-    try:
-        log_entry = QueryLog(
-            timestamp=datetime.datetime.utcnow(),
-            question=query.question,
-            document_id=None,
-            document_name="ALL",
-            vector_path=PERSIST_PATH,
-            answer=answer,
-            citations=safe_json_dumps(citations),
-            themes=safe_json_dumps(themes)
-        )
-        db.add(log_entry)
-        db.commit()
-        logger.debug("✅ Query logged in database")
-    except Exception as e:
-        logger.warning(f"⚠️ Failed to save query log: {e}", exc_info=True)
+    # Queue the query log; the response doesn't wait for the write
+    save_query_log(query.question, answer, citations, themes, result.get("stage_timings"))
 
     # Return the full response
     return QueryResponse(
@@ -85,5 +112,70 @@ async def query_documents(query: QueryRequest, db: Session = Depends(get_db)):
         citations=citations,
         themes=themes,
         tabular_results=doc_table,
-        synthesized_summary=synthesized_summary
+        synthesized_summary=synthesized_summary,
+        mode=query.mode,
+        hits=hits,
+        degraded=degraded
+    )
+
+
+@router.post("/stream")
+async def stream_query(query: QueryRequest, x_llm_cache: Optional[str] = Header(default=None)):
+    """
+    Server-sent events version of `POST /query/`.
+
+    Emits `citations` and `themes` as soon as retrieval finishes, then `token`
+    events while the answer is generated, an `answer` event with the full
+    text, one `doc_row` per document, `summary` and finally `done`. Stages
+    beyond the requested `mode` are skipped (fast mode sends `hits` instead),
+    and a `degraded` event names any stage dropped to stay within budget.
+    """
+    deadline = request_deadline(query)
+    if not query.question.strip():
+        raise HTTPException(status_code=400, detail="❌ Question is required")
+    logger.debug("🔍 Received streaming question: %s", query.question)
+
+    bypass = (x_llm_cache or "").lower() in CACHE_BYPASS_VALUES
+    # Held until the stream ends; released by whichever of the generator or
+    # the background task gets there first (the generator may never start)
+    permit = await query_admission.acquire(timeout=deadline.remaining())
+
+    async def event_stream():
+        # Each pipeline step blocks, so the generator is advanced in a worker thread
+        steps = PipelineSteps(iter_answer_events(PERSIST_PATH, query.question, mode=query.mode,
+                                                 top_k=query.top_k, deadline=deadline), pipeline_pool)
+        collected = {"answer": "", "citations": [], "themes": []}
+        # Set (and reset) while the body is produced, in whatever task runs
+        # it, so the pipeline threads below see the flag, the deadline and
+        # the timings
+        bypass_token = set_cache_bypass(bypass)
+        deadline_token = set_deadline(deadline)
+        with collect_timings() as timings:
+            try:
+                while True:
+                    item = await steps.next()
+                    if item is None:
+                        break
+                    event, data = item
+                    if event in ("answer", "citations", "themes"):
+                        collected[event] = data
+                    elif event == "error":
+                        collected["answer"] = f"Error: {data}"
+                    yield format_sse(event, data)
+                yield format_sse("done", {})
+            finally:
+                # Nothing here awaits, so a cancelled stream still releases its slot
+                permit.release()
+                steps.close()
+                reset_deadline(deadline_token)
+                reset_cache_bypass(bypass_token)
+
+        save_query_log(query.question, collected["answer"], collected["citations"], collected["themes"],
+                       timings.as_ms())
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(permit.release)
     )
@@ -0,0 +1,62 @@
+# backend/app/api/search.py
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from typing import List, Optional, Literal
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from app.db.session import get_async_db
+from app.db.fts import fts_available
+from app.services.search_service import search_chunks, SearchQueryError
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+class SearchHit(BaseModel):
+    document_id: int
+    doc_uid: Optional[str] = None
+    filename: Optional[str] = None
+    author: Optional[str] = None
+    doc_type: Optional[str] = None
+    chunk_id: str
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
+    start_char: Optional[int] = None
+    end_char: Optional[int] = None
+    score: float
+    snippet: str
+
+
+class SearchResponse(BaseModel):
+    query: str
+    mode: str
+    hits: List[SearchHit]
+
+
+@router.get("/", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, description='FTS5 query: "exact phrase", prefix*, a AND b, a OR b, a NOT b'),
+    mode: Literal["boolean", "phrase", "prefix"] = "boolean",
+    doc_id: Optional[List[int]] = Query(default=None, description="Only these document ids"),
+    author: Optional[str] = None,
+    doc_type: Optional[str] = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Keyword search over the text of current document versions, ranked by
+    BM25. No embedding model or LLM is involved.
+    """
+    if not fts_available():
+        raise HTTPException(status_code=501, detail="Full-text search is not available on this database")
+    try:
+        hits = await search_chunks(db, q, mode, doc_id, author, doc_type, limit, offset)
+    except SearchQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Search failed for '{q}': {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Search failed")
+    return SearchResponse(query=q, mode=mode, hits=hits)
@@ -1,132 +1,331 @@
 # backend/app/api/upload.py
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, status, Form, Depends
-from sqlalchemy.orm import Session
+from typing import BinaryIO, Optional, Sequence
+
+from fastapi import APIRouter, UploadFile, File, HTTPException, status, Form, Depends, BackgroundTasks
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
-from app.db.session import get_db
-from app.db.models import Document
+from app.db.session import get_async_db
+from app.db.models import Chunk, Document
 from app.core.ocr import extract_paragraphs
-from app.core.chunker import chunk_text
-from app.services.vector_store import add_chunks_to_store, PERSIST_PATH
+from app.core.extractors import detect_extractor, supported_extensions, CPU
+from app.core.chunker import chunk_text_cdc
+from app.core.text_store import pack_text, paragraph_index
+from app.core.dedup import get_dedup_index, partition_chunks
+from app.services.vector_store import (
+    add_chunks_to_store, delete_chunks, embed_texts, update_chunk_metadata, PERSIST_PATH
+)
+from app.services.theme_service import assign_themes
+from app.services.summary_service import summarize_document
+from app.services.revision_service import (
+    diff_chunks, find_previous_version, move_reused_chunks, retire_chunks, supersede
+)
+from app.services.admission import upload_admission
+from app.services.executors import cpu_pool, io_pool
+from app.services.chunk_store import insert_chunks, page_range
+from app.services.metrics import span
+from app.api.document_routes import ListingParams
 
 from pathlib import Path
-import shutil
+import json
+import hashlib
 import logging
 from datetime import datetime
 import uuid
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 
 @router.get("/documents")
-def list_documents(db: Session = Depends(get_db)):
-    """List all processed documents."""
-    docs = db.query(Document).filter(Document.status == "processed").all()
-    return [
-        {
-            "id": doc.id,
-            "filename": doc.filename,
-            "author": doc.author,
-            "doc_type": doc.doc_type,
-            "created_at": doc.upload_time
-        }
-        for doc in docs
-    ]
+def list_documents(params: ListingParams = Depends()):
+    """List processed documents, one keyset-paginated page at a time."""
+    return params.stream(lambda doc: {
+        "id": doc.id,
+        "filename": doc.filename,
+        "author": doc.author,
+        "doc_type": doc.doc_type,
+        "created_at": doc.upload_time.isoformat() if doc.upload_time else None
+    }, status="processed")
+
+
+async def discard_document(db: AsyncSession, document_id: Optional[int], chunk_ids: Sequence[str] = ()) -> None:
+    """
+    Removes the rows and stored vectors of an upload that failed part-way.
+    Takes ids rather than the Document, whose attributes a rollback expires.
+    """
+    if chunk_ids:
+        try:
+            await io_pool.run(delete_chunks, list(chunk_ids), PERSIST_PATH)
+        except Exception as e:
+            logger.error("❌ Could not remove %s partial chunks from the vector store: %s", len(chunk_ids), e,
+                         exc_info=True)
+    if document_id is None:
+        return
+    try:
+        await db.execute(delete(Chunk).where(Chunk.document_id == document_id))
+        await db.execute(delete(Document).where(Document.id == document_id))
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.error("❌ Could not remove partial document %s: %s", document_id, e, exc_info=True)
+
+
+def save_upload(source: BinaryIO, file_path: Path) -> str:
+    """Copies the upload to `file_path`; returns its sha256."""
+    digest = hashlib.sha256()
+    with open(file_path, "wb") as buffer:
+        for block in iter(lambda: source.read(1024 * 1024), b""):
+            digest.update(block)
+            buffer.write(block)
+    return digest.hexdigest()
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def upload_document(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     author: str = Form(default="unknown"),
     doc_type: str = Form(default="general"),
-    db: Session = Depends(get_db)
+    revision_of: Optional[int] = Form(default=None),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Upload, OCR, chunk, embed, and store a document.
+    Upload, OCR, chunk, embed, and store a document. Uploading a file under
+    the name of an existing document (or with `revision_of` set to its id)
+    stores a new version of it; only chunks that changed are embedded.
     """
-    safe_filename = file.filename.replace(" ", "_")
-    existing = db.query(Document).filter_by(filename=safe_filename).first()
+    async with upload_admission.admit():
+        return await ingest_document(background_tasks, file, author, doc_type, db, revision_of)
 
-    if existing:
-        logger.info(f"📄 Document '{safe_filename}' already exists.")
-        return {
-            "document_id": existing.id,
-            "filename": existing.filename,
-            "sample": existing.ocr_text[:300] if existing.ocr_text else "",
-            "full_text": existing.ocr_text or "",
-            "persist_dir": PERSIST_PATH
-        }
 
-    # Save uploaded file
+async def ingest_document(
+    background_tasks: BackgroundTasks,
+    file: UploadFile,
+    author: str,
+    doc_type: str,
+    db: AsyncSession,
+    revision_of: Optional[int] = None
+):
+    # OCR, chunking, embedding and text compression run in the CPU process
+    # pool, text-only extractors on the I/O pool; the file copy and vector
+    # store, dedup and theme updates run on I/O pool threads, so only
+    # database writes happen on the event loop
+    safe_filename = file.filename.replace(" ", "_")
+    previous = await find_previous_version(db, safe_filename, revision_of)
+    if revision_of is not None and previous is None:
+        raise HTTPException(status_code=404, detail=f"Document {revision_of} not found")
+    if previous and previous.status != "processed":
+        raise HTTPException(status_code=409, detail=f"Document {previous.id} is not the current version")
+    version = previous.version + 1 if previous else 1
+
+    # Save uploaded file; every version keeps its own copy
     data_dir = Path(settings.DATA_DIR)
     data_dir.mkdir(parents=True, exist_ok=True)
     file_path = data_dir / safe_filename
+    if previous:
+        file_path = file_path.with_name(f"{file_path.stem}.v{version}{file_path.suffix}")
 
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        logger.info(f"✅ File saved: {file_path}")
+        with span("upload.save"):
+            content_hash = await io_pool.run(save_upload, file.file, file_path)
+        logger.info("✅ File saved: %s", file_path)
     except Exception as e:
-        logger.error(f"❌ File save failed: {e}", exc_info=True)
+        logger.error("❌ File save failed: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to save file")
 
-    # OCR extraction
+    if previous and previous.content_hash == content_hash:
+        file_path.unlink(missing_ok=True)
+        logger.info("📄 Document '%s' is unchanged (version %s).", safe_filename, previous.version)
+        return {
+            "document_id": previous.id,
+            "doc_uid": previous.doc_uid,
+            "filename": previous.filename,
+            "version": previous.version,
+            "unchanged": True,
+            "text_url": f"/docs/{previous.id}/text"
+        }
+
+    extractor = detect_extractor(str(file_path))
+    if extractor is None:
+        file_path.unlink(missing_ok=True)
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported file type. Supported: {', '.join(supported_extensions())}"
+        )
+
+    # OCR extraction (unchanged pages of a revised scan come from the OCR cache)
     try:
-        paragraphs = extract_paragraphs(str(file_path), poppler_path=settings.POPPLER_PATH)
+        pool = cpu_pool if extractor.kind == CPU else io_pool
+        with span("upload.extract", extractor=extractor.name):
+            paragraphs = await pool.run(extract_paragraphs, str(file_path), settings.POPPLER_PATH, extractor.name)
         for p in paragraphs:
             p.setdefault("citation", {"page": p.get("page_number"), "paragraph": p.get("paragraph_number")})
         full_text = "\n\n".join(p["text_snippet"] for p in paragraphs)
-        logger.info(f"✅ OCR extracted {len(paragraphs)} paragraphs.")
+        logger.info("✅ %s extractor returned %s paragraphs.", extractor.name, len(paragraphs))
     except Exception as e:
-        logger.error(f"❌ OCR failed: {e}", exc_info=True)
+        logger.error("❌ OCR failed: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Text extraction failed")
 
-    # Chunking and vector store
+    # Chunking
     try:
         doc_id = str(uuid.uuid4())
-        chunk_texts, chunk_ids, metadata = chunk_text(text=full_text, doc_id=doc_id)
+        with span("upload.chunk"):
+            all_texts, all_ids, metadata = await cpu_pool.run(chunk_text_cdc, full_text, doc_id)
 
         for m in metadata:
             m["filename"] = safe_filename
             m["author"] = author
             m["doc_type"] = doc_type
 
-        add_chunks_to_store(chunk_texts, chunk_ids, metadata, persist_path=PERSIST_PATH)
-        logger.info(f"✅ Stored {len(chunk_texts)} chunks in vector store.")
+        # Chunks unchanged since the previous version keep their stored vectors
+        diff = await diff_chunks(db, previous, all_ids, metadata) if previous else None
+        reused = set(diff.reused) if diff else set()
+        fresh = [i for i, cid in enumerate(all_ids) if cid not in reused]
+        chunk_texts = [all_texts[i] for i in fresh]
+        chunk_ids = [all_ids[i] for i in fresh]
+        stored_metadata = [metadata[i] for i in fresh]
+
+        # Near-duplicates of chunks already stored (or earlier in this document)
+        # are not embedded; they are recorded as references to the stored copy
+        dedup = get_dedup_index()
+        duplicates, signatures = {}, {}
+        if dedup:
+            with span("upload.dedup"):
+                keep, duplicates, signatures = await io_pool.run(
+                    partition_chunks, dedup, chunk_ids, chunk_texts, previous.doc_uid if previous else None
+                )
+            chunk_texts = [chunk_texts[i] for i in keep]
+            chunk_ids = [chunk_ids[i] for i in keep]
+            stored_metadata = [stored_metadata[i] for i in keep]
     except Exception as e:
-        logger.error(f"❌ Chunking or vector store failed: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Failed to store in vector database")
+        logger.error("❌ Chunking failed: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to chunk document")
 
-    # Save document record to SQL DB
+    # Document and chunk rows go in first: the vector store only holds ids and
+    # vectors, so retrieval needs the text rows before the vectors are visible
+    new_doc, new_doc_id = None, None
     try:
+        packed = await cpu_pool.run(pack_text, full_text, paragraphs)
         new_doc = Document(
             filename=safe_filename,
             author=author,
             doc_type=doc_type,
             file_path=str(file_path),
-            status="processed",
-            ocr_text=full_text,
-            upload_time=datetime.utcnow()
+            status="indexing",
+            doc_uid=doc_id,
+            upload_time=datetime.utcnow(),
+            version=version,
+            previous_version_id=previous.id if previous else None,
+            content_hash=content_hash,
+            **packed
         )
         db.add(new_doc)
-        db.commit()
-        db.refresh(new_doc)
-        logger.info(f"✅ Document metadata saved to DB: {new_doc.id}")
+        await db.commit()
+        new_doc_id = new_doc.id
+
+        starts = [start for start, _, _ in paragraph_index(paragraphs)]
+        pages = [p.get("page_number") for p in paragraphs]
+        rows = []
+        for text, m in zip(all_texts, metadata):
+            page_start, page_end = page_range(starts, pages, m["start"], m["end"])
+            rows.append({
+                "chunk_id": m["chunk_id"], "text": text, "start_char": m["start"], "end_char": m["end"],
+                "page_start": page_start, "page_end": page_end, "content_hash": m["hash"]
+            })
+        with span("upload.db_write", chunks=len(rows)):
+            await insert_chunks(db, new_doc.id, rows)
+        logger.info("✅ Document metadata saved to DB: %s (version %s, %s chunks)", new_doc.id, version, len(rows))
+    except Exception as e:
+        logger.error("❌ DB save failed: %s", e, exc_info=True)
+        await db.rollback()
+        await discard_document(db, new_doc_id)
+        raise HTTPException(status_code=500, detail="Failed to save document metadata")
+
+    # Embedding and vector store
+    try:
+        if chunk_texts:
+            # With the sidecar, embedding is a socket round trip rather than local compute
+            embed_pool = io_pool if settings.EMBEDDING_SIDECAR_SOCKET else cpu_pool
+            with span("upload.embed", chunks=len(chunk_texts)):
+                embeddings = await embed_pool.run(embed_texts, chunk_texts)
+            try:
+                with span("upload.themes"):
+                    backfilled = await io_pool.run(assign_themes, chunk_ids, chunk_texts, embeddings, stored_metadata)
+            except Exception as e:
+                logger.warning("⚠️ Theme clustering failed, storing chunks without themes: %s", e, exc_info=True)
+                backfilled = {}
+
+            await io_pool.run(add_chunks_to_store, chunk_texts, chunk_ids, stored_metadata, PERSIST_PATH,
+                              embeddings, False)
+            if backfilled:
+                await io_pool.run(
+                    update_chunk_metadata, {cid: {"theme_cluster": c} for cid, c in backfilled.items()}, PERSIST_PATH
+                )
+
+        # Registered only once the store write succeeded, so refs never point at missing chunks.
+        # A duplicate's own metadata lives in its ref; its theme is the canonical chunk's
+        # when that was stored by this upload (otherwise retrieval uses the canonical's)
+        if dedup:
+            themes = {cid: md["theme_cluster"] for cid, md in zip(chunk_ids, stored_metadata)
+                      if "theme_cluster" in md}
+            await io_pool.run(
+                dedup.add_canonical, [(cid, doc_id, signatures[cid]) for cid in chunk_ids if cid in signatures]
+            )
+            refs = []
+            for m in metadata:
+                canonical = duplicates.get(m["chunk_id"])
+                if canonical:
+                    ref = dict(m, theme_cluster=themes[canonical]) if canonical in themes else m
+                    refs.append((m["chunk_id"], canonical, doc_id, json.dumps(ref)))
+            await io_pool.run(dedup.add_refs, refs)
+        logger.info(
+            "✅ Stored %s chunks in vector store (%s reused, %s near-duplicates skipped).",
+            len(chunk_texts), len(reused), len(duplicates)
+        )
     except Exception as e:
-        logger.error(f"❌ DB save failed: {e}", exc_info=True)
+        logger.error("❌ Embedding or vector store failed: %s", e, exc_info=True)
+        await db.rollback()
+        await discard_document(db, new_doc_id, chunk_ids)
+        raise HTTPException(status_code=500, detail="Failed to store in vector database")
+
+    try:
+        new_doc.status = "processed"
+        if previous:
+            await supersede(previous, PERSIST_PATH)
+        await db.commit()
+    except Exception as e:
+        logger.error("❌ DB save failed: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to save document metadata")
 
+    # The previous version's chunks move over or go only once the new version is committed
+    if diff:
+        try:
+            await io_pool.run(move_reused_chunks, diff, metadata, doc_id, PERSIST_PATH)
+            await io_pool.run(retire_chunks, diff.removed, PERSIST_PATH)
+        except Exception as e:
+            logger.error("❌ Retiring chunks of version %s failed: %s", previous.version, e, exc_info=True)
+
+    # Summarize after the response is sent; synthesis and overview questions reuse it
+    background_tasks.add_task(summarize_document, new_doc.id, PERSIST_PATH)
+
+    # Ids and stats only; the text itself is served by GET /docs/{id}/text
     return {
         "document_id": new_doc.id,
         "doc_uid": doc_id,
         "filename": safe_filename,
+        "version": version,
+        "previous_version_id": new_doc.previous_version_id,
         "text_extraction": "success",
-        "chunking": f"{len(chunk_texts)} chunks created",
+        "paragraphs": len(paragraphs),
+        "text_chars": len(full_text),
+        "chunking": f"{len(all_texts)} chunks created",
         "embedding": "success",
+        "embedded_chunks": len(chunk_texts),
+        "reused_chunks": len(reused),
+        "retired_chunks": len(diff.removed) if diff else 0,
+        "deduplicated_chunks": len(duplicates),
         "vector_db_storage": "ChromaDB updated",
-        "persist_dir": PERSIST_PATH,
-        "sample": full_text[:300],
-        "full_text": full_text  # 👈 ADDED for frontend preview
+        "text_url": f"/docs/{new_doc.id}/text"
     }
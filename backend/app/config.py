@@ -14,7 +14,106 @@ class Settings:
     EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
     EMBEDDING_MODEL_TYPE: str = os.getenv("EMBEDDING_MODEL_TYPE", "huggingface")
 
-    # Optional DB config (if using SQLAlchemy elsewhere)
+    # Corpus theme clustering
+    THEME_MODEL_PATH: str = os.getenv("THEME_MODEL_PATH", os.path.join(DATA_DIR, "theme_clusters.joblib"))
+    THEME_CLUSTERS: int = int(os.getenv("THEME_CLUSTERS", "12"))
+    THEME_RELABEL_GROWTH: float = float(os.getenv("THEME_RELABEL_GROWTH", "1.5"))  # relabel when a cluster grows by 50%
+    THEME_RELABEL_SHIFT: float = float(os.getenv("THEME_RELABEL_SHIFT", "0.05"))   # ...or its centre moves this far (cosine distance)
+
+    # Database: sqlite:///... or postgresql://...; async routes use aiosqlite/asyncpg for the same URL
     SQLALCHEMY_DATABASE_URL: str = os.getenv("SQLALCHEMY_DATABASE_URL", "sqlite:///./test.db")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_BUSY_TIMEOUT_SECONDS: float = float(os.getenv("DB_BUSY_TIMEOUT_SECONDS", "5"))
+
+    # LLM provider: "groq", "openai" (any OpenAI-compatible server) or "fake" (offline)
+    LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "groq").lower()
+    LLM_MODEL: str = os.getenv("LLM_MODEL", "")  # overrides the provider's default model
+    LLM_TEMPERATURE: float = float(os.getenv("LLM_TEMPERATURE", "0.7"))
+    GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
+    GROQ_MODEL: str = os.getenv("GROQ_MODEL", "llama3-8b-8192")
+    LLM_BASE_URL: str = os.getenv("LLM_BASE_URL", "http://localhost:8080/v1")
+    LLM_API_KEY: str = os.getenv("LLM_API_KEY", "")
+    FAKE_LLM_LATENCY_MS: float = float(os.getenv("FAKE_LLM_LATENCY_MS", "0"))
+    FAKE_LLM_TOKENS_PER_SECOND: float = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "0"))
+
+    # LLM completion cache (one SQLite file shared by all workers on the host)
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", os.path.join(DATA_DIR, "llm_cache.sqlite3"))
+    LLM_CACHE_MAX_BYTES: int = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    LLM_CACHE_MAX_TEMPERATURE: float = float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0.0"))
+
+    # Outbound LLM scheduling (budgets are per worker process; 0 disables a limit)
+    OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    LLM_REQUESTS_PER_MINUTE: float = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
+    LLM_TOKENS_PER_MINUTE: float = float(os.getenv("LLM_TOKENS_PER_MINUTE", "30000"))
+    LLM_EXPECTED_OUTPUT_TOKENS: int = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "256"))
+    LLM_MAX_CONNECTIONS: int = int(os.getenv("LLM_MAX_CONNECTIONS", "16"))
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+    LLM_RETRY_ATTEMPTS: int = int(os.getenv("LLM_RETRY_ATTEMPTS", "5"))
+    LLM_RETRY_BASE_SECONDS: float = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+    LLM_RETRY_MAX_SECONDS: float = float(os.getenv("LLM_RETRY_MAX_SECONDS", "20"))
+
+    # Default end-to-end budget for /query requests (clients may send budget_ms)
+    QUERY_BUDGET_MS: int = int(os.getenv("QUERY_BUDGET_MS", "25000"))
+
+    # Admission control: requests beyond concurrency + queue get 429, queued too long 503
+    QUERY_MAX_CONCURRENCY: int = int(os.getenv("QUERY_MAX_CONCURRENCY", "32"))
+    QUERY_MAX_QUEUE: int = int(os.getenv("QUERY_MAX_QUEUE", "64"))
+    UPLOAD_MAX_CONCURRENCY: int = int(os.getenv("UPLOAD_MAX_CONCURRENCY", "2"))
+    UPLOAD_MAX_QUEUE: int = int(os.getenv("UPLOAD_MAX_QUEUE", "8"))
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "10"))
+
+    # Worker pools: processes for OCR/embedding (0 = threads), threads for LLM I/O
+    CPU_POOL_WORKERS: int = int(os.getenv("CPU_POOL_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+    IO_POOL_WORKERS: int = int(os.getenv("IO_POOL_WORKERS", "32"))
+
+    # Optional shared embedding/index process (python -m app.services.sidecar)
+    EMBEDDING_SIDECAR_SOCKET: str = os.getenv("EMBEDDING_SIDECAR_SOCKET", "")
+    SIDECAR_BATCH_WINDOW_MS: float = float(os.getenv("SIDECAR_BATCH_WINDOW_MS", "5"))
+    SIDECAR_MAX_BATCH: int = int(os.getenv("SIDECAR_MAX_BATCH", "64"))
+    SIDECAR_TIMEOUT_SECONDS: float = float(os.getenv("SIDECAR_TIMEOUT_SECONDS", "60"))
+
+    # Crop/deskew/binarize pages and pick OCR DPI from text size (app/core/preprocessing.py)
+    OCR_PREPROCESS: bool = os.getenv("OCR_PREPROCESS", "true").lower() == "true"
+    OCR_LANG: str = os.getenv("OCR_LANG", "eng")
+    OCR_TESSERACT_CONFIG: str = os.getenv("OCR_TESSERACT_CONFIG", "")
+
+    # Per-page OCR results keyed by page image hash, shared by all workers on the host
+    OCR_CACHE_ENABLED: bool = os.getenv("OCR_CACHE_ENABLED", "true").lower() == "true"
+    OCR_CACHE_PATH: str = os.getenv("OCR_CACHE_PATH", os.path.join(DATA_DIR, "ocr_cache.sqlite3"))
+    OCR_CACHE_MAX_BYTES: int = int(os.getenv("OCR_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+    # Near-duplicate chunks (MinHash, estimated Jaccard >= threshold) are stored once
+    DEDUP_ENABLED: bool = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_INDEX_PATH: str = os.getenv("DEDUP_INDEX_PATH", os.path.join(DATA_DIR, "dedup.sqlite3"))
+    DEDUP_THRESHOLD: float = float(os.getenv("DEDUP_THRESHOLD", "0.9"))
+
+    # Rows per transaction when writing a document's chunks to SQL
+    CHUNK_INSERT_BATCH_SIZE: int = int(os.getenv("CHUNK_INSERT_BATCH_SIZE", "500"))
+
+    # Query logs are queued and inserted in batches off the response path (app/services/query_log.py)
+    QUERY_LOG_MAX_QUEUE: int = int(os.getenv("QUERY_LOG_MAX_QUEUE", "10000"))
+    QUERY_LOG_BATCH_SIZE: int = int(os.getenv("QUERY_LOG_BATCH_SIZE", "200"))
+    QUERY_LOG_FLUSH_INTERVAL_MS: float = float(os.getenv("QUERY_LOG_FLUSH_INTERVAL_MS", "1000"))
+    QUERY_LOG_OVERFLOW: str = os.getenv("QUERY_LOG_OVERFLOW", "drop_oldest")  # or drop_newest
+    QUERY_LOG_DRAIN_TIMEOUT_SECONDS: float = float(os.getenv("QUERY_LOG_DRAIN_TIMEOUT_SECONDS", "10"))
+
+    # Stage spans are always exposed at /metrics; also export them over OTLP
+    # (OTEL_EXPORTER_OTLP_ENDPOINT) when enabled and the SDK is installed
+    OTEL_ENABLED: bool = os.getenv("OTEL_ENABLED", "false").lower() == "true"
+    OTEL_SERVICE_NAME: str = os.getenv("OTEL_SERVICE_NAME", "document-chatbot-api")
+
+    # Logging (app/logging_config.py): root level, per-logger overrides as
+    # "name=LEVEL,...", json or text lines, and the share of requests whose
+    # verbose payloads (full answers, retrieved snippets) are logged
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVELS: str = os.getenv("LOG_LEVELS", "uvicorn.access=WARNING")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    LOG_PAYLOAD_SAMPLE_RATE: float = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))
+
+    # Load models in the background at startup; otherwise the first /readyz
+    # probe starts loading them. /readyz answers 200 once they're done
+    PREWARM_ON_STARTUP: bool = os.getenv("PREWARM_ON_STARTUP", "true").lower() == "true"
 
 settings = Settings()
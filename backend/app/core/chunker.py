@@ -1,18 +1,45 @@
-from typing import List, Tuple
-import nltk
+import re
+import zlib
+import hashlib
+from typing import Dict, List, Tuple
+from functools import lru_cache
 
-# Ensure necessary NLTK tokenizers are downloaded once
-nltk.download('punkt', quiet=True)
-nltk.download('punkt_tab', quiet=True)
+from app.services.metrics import timed
 
+# Content-defined chunking (chunk_text_cdc): a boundary falls after a word
+# where the rolling hash of the preceding words has its top CDC_MASK_BITS
+# bits clear, so an edit only moves the boundaries next to it. Sizes keep a
+# chunk plus its overlap (at most 180 words, ~235 tokens) inside the
+# embedding model's 256-token window, which truncates anything longer.
+CDC_MIN_WORDS = 60
+CDC_MAX_WORDS = 160
+CDC_MASK_BITS = 6  # ~64 words past the minimum on average
+CDC_OVERLAP_WORDS = 20
+_CDC_MASK = ((1 << CDC_MASK_BITS) - 1) << (32 - CDC_MASK_BITS)
+_WORD = re.compile(r"\S+")
 
+
+@lru_cache(maxsize=1)
+def get_tokenizer():
+    """
+    NLTK's word tokenizer, imported and its data downloaded on first use
+    rather than when the app starts.
+    """
+    import nltk
+
+    nltk.download('punkt', quiet=True)
+    nltk.download('punkt_tab', quiet=True)
+    return nltk.word_tokenize
+
+
+@timed("chunking")
 def chunk_text(text: str, doc_id: str, chunk_size: int = 500, overlap: int = 50) -> Tuple[List[str], List[str], List[dict]]:
     """
     Splits `text` into overlapping token-based chunks.
     Returns: chunk_texts, chunk_ids, metadata_list.
     Metadata includes doc_id, start_char, end_char.
     """
-    tokens = nltk.word_tokenize(text)
+    tokens = get_tokenizer()(text)
     chunks, ids, meta = [], [], []
     i = 0
     while i < len(tokens):
@@ -34,3 +61,50 @@ def chunk_text(text: str, doc_id: str, chunk_size: int = 500, overlap: int = 50)
 
         i += chunk_size - overlap
     return chunks, ids, meta
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+@timed("chunking")
+def chunk_text_cdc(text: str, doc_id: str) -> Tuple[List[str], List[str], List[dict]]:
+    """
+    Splits `text` into chunks whose boundaries depend only on nearby content,
+    so unchanged passages of a revised document produce identical chunks.
+    Each chunk is an exact slice of `text` that starts CDC_OVERLAP_WORDS
+    words before its boundary; the overlap is part of the content hash
+    (under "hash", whitespace-insensitive), so an edit there re-embeds the
+    next chunk too. Same return shape as chunk_text.
+    """
+    chunks, ids, meta = [], [], []
+    seen: Dict[str, int] = {}
+    rolling, words, first = 0, 0, 0
+    matches = list(_WORD.finditer(text))
+    for n, match in enumerate(matches):
+        # Gear hash: each word shifts older ones out of the top bits
+        rolling = ((rolling << 1) + zlib.crc32(match.group().encode("utf-8"))) & 0xFFFFFFFF
+        words += 1
+        last = n == len(matches) - 1
+        if not last and words < CDC_MAX_WORDS and (words < CDC_MIN_WORDS or rolling & _CDC_MASK):
+            continue
+
+        start = matches[max(0, first - CDC_OVERLAP_WORDS)].start()
+        end = match.end()
+        chunk = text[start:end]
+        digest = chunk_hash(chunk)
+        # Repeated passages within one document still need distinct ids
+        seen[digest] = seen.get(digest, 0) + 1
+        chunk_id = f"{doc_id}_{digest[:16]}" + (f"_{seen[digest]}" if seen[digest] > 1 else "")
+
+        chunks.append(chunk)
+        ids.append(chunk_id)
+        meta.append({
+            "doc_id": doc_id,
+            "chunk_id": chunk_id,
+            "start": start,
+            "end": end,
+            "hash": digest
+        })
+        rolling, words, first = 0, 0, n + 1
+    return chunks, ids, meta
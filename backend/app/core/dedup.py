@@ -0,0 +1,286 @@
+# backend/app/core/dedup.py
+"""
+Near-duplicate chunk detection with MinHash + LSH.
+
+Revisions of the same contract produce chunks that differ by a word or two.
+Each chunk's word shingles are MinHashed; chunks whose signatures agree on
+at least DEDUP_THRESHOLD of their slots are treated as the same passage.
+Only the first (canonical) copy is embedded and stored in the vector store;
+later copies are recorded here as references to it so retrieval can cite
+every document the passage appears in.
+"""
+
+import os
+import re
+import sqlite3
+import logging
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from app.config import settings
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_WORDS = 5
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs above ~0.7 similarity become candidates, which
+# are then checked against DEDUP_THRESHOLD on the full signature
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# SQLite allows 999 bound parameters per statement in older builds
+LOOKUP_BATCH = 500
+
+_WORD = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=1)
+def _permutations() -> Tuple["np.ndarray", "np.ndarray", "np.uint64", "np.uint64"]:
+    # numpy and mmh3 load with the first upload, not with the app
+    import numpy as np
+
+    # Fixed seed: signatures must stay comparable across processes and restarts
+    rng = np.random.RandomState(1)
+    a = rng.randint(1, (1 << 32) - 1, size=NUM_PERM, dtype=np.uint64)
+    b = rng.randint(0, (1 << 32) - 1, size=NUM_PERM, dtype=np.uint64)
+    return a, b, np.uint64((1 << 61) - 1), np.uint64((1 << 32) - 1)
+
+
+def _batches(items: List[str]) -> Iterator[List[str]]:
+    for i in range(0, len(items), LOOKUP_BATCH):
+        yield items[i:i + LOOKUP_BATCH]
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> set:
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(text: str) -> Optional["np.ndarray"]:
+    """NUM_PERM-slot MinHash signature of the text's shingles, or None if it has no words."""
+    import mmh3
+    import numpy as np
+
+    grams = shingles(text)
+    if not grams:
+        return None
+    a, b, mersenne, max_hash = _permutations()
+    hashes = np.fromiter((mmh3.hash(g, signed=False) for g in grams), dtype=np.uint64, count=len(grams))
+    # One universal hash per slot, applied to every shingle hash at once
+    permuted = ((a[:, None] * hashes[None, :] + b[:, None]) % mersenne) & max_hash
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def similarity(a: "np.ndarray", b: "np.ndarray") -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return float((a == b).mean())
+
+
+def band_keys(signature: "np.ndarray") -> List[str]:
+    return [signature[i * ROWS:(i + 1) * ROWS].tobytes().hex() for i in range(BANDS)]
+
+
+class DedupIndex:
+    """
+    LSH buckets and chunk references in a SQLite file next to the other
+    local stores, shared by every worker on the host.
+    """
+
+    def __init__(self, path: str, threshold: float):
+        self.path = path
+        self.threshold = threshold
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.executescript(
+            "CREATE TABLE IF NOT EXISTS signatures ("
+            " chunk_id TEXT PRIMARY KEY, doc_id TEXT NOT NULL, signature BLOB NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS bands ("
+            " band INTEGER NOT NULL, bucket TEXT NOT NULL, chunk_id TEXT NOT NULL,"
+            " PRIMARY KEY (band, bucket, chunk_id));"
+            "CREATE TABLE IF NOT EXISTS refs ("
+            " chunk_id TEXT PRIMARY KEY, canonical_id TEXT NOT NULL, doc_id TEXT NOT NULL,"
+            " metadata TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS ix_refs_canonical ON refs (canonical_id);"
+            "CREATE INDEX IF NOT EXISTS ix_signatures_doc ON signatures (doc_id);"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def find(self, signature: "np.ndarray", exclude_doc: Optional[str] = None) -> Optional[str]:
+        """The most similar canonical chunk at or above the threshold, if any."""
+        import numpy as np
+
+        conn = self._conn()
+        candidates = set()
+        for band, bucket in enumerate(band_keys(signature)):
+            candidates.update(
+                row[0] for row in conn.execute(
+                    "SELECT chunk_id FROM bands WHERE band = ? AND bucket = ?", (band, bucket)
+                )
+            )
+        best, best_sim = None, self.threshold
+        for chunk_id in candidates:
+            row = conn.execute("SELECT doc_id, signature FROM signatures WHERE chunk_id = ?", (chunk_id,)).fetchone()
+            if row is None or row[0] == exclude_doc:
+                continue
+            sim = similarity(signature, np.frombuffer(row[1], dtype=np.uint32))
+            if sim >= best_sim:
+                best, best_sim = chunk_id, sim
+        return best
+
+    def add_canonical(self, entries: List[Tuple[str, str, "np.ndarray"]]) -> None:
+        """Registers (chunk_id, doc_id, signature) of chunks stored in the vector store."""
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR REPLACE INTO signatures (chunk_id, doc_id, signature) VALUES (?, ?, ?)",
+                [(cid, doc_id, sig.tobytes()) for cid, doc_id, sig in entries]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO bands (band, bucket, chunk_id) VALUES (?, ?, ?)",
+                [(band, bucket, cid) for cid, _, sig in entries for band, bucket in enumerate(band_keys(sig))]
+            )
+
+    def add_refs(self, refs: List[Tuple[str, str, str, str]]) -> None:
+        """Registers (chunk_id, canonical_id, doc_id, metadata_json) of deduplicated chunks."""
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR REPLACE INTO refs (chunk_id, canonical_id, doc_id, metadata) VALUES (?, ?, ?, ?)",
+                refs
+            )
+
+    def refs_for(self, canonical_ids: List[str]) -> Dict[str, List[str]]:
+        """canonical chunk id -> metadata JSON of every chunk that points at it."""
+        conn = self._conn()
+        out: Dict[str, List[str]] = {}
+        for batch in _batches(canonical_ids):
+            marks = ",".join("?" * len(batch))
+            for canonical_id, metadata in conn.execute(
+                f"SELECT canonical_id, metadata FROM refs WHERE canonical_id IN ({marks})", batch
+            ):
+                out.setdefault(canonical_id, []).append(metadata)
+        return out
+
+    def canonical_of(self, chunk_ids: List[str]) -> Dict[str, str]:
+        """chunk id -> canonical chunk id, for those of `chunk_ids` that are references."""
+        conn = self._conn()
+        out: Dict[str, str] = {}
+        for batch in _batches(chunk_ids):
+            marks = ",".join("?" * len(batch))
+            out.update(conn.execute(f"SELECT chunk_id, canonical_id FROM refs WHERE chunk_id IN ({marks})", batch))
+        return out
+
+    def reassign(self, chunk_ids: List[str], doc_id: str) -> None:
+        """Moves canonical chunks carried over into a new document version."""
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany("UPDATE signatures SET doc_id = ? WHERE chunk_id = ?", [(doc_id, c) for c in chunk_ids])
+
+    def retire(self, chunk_ids: List[str]) -> Tuple[List[str], Dict[str, str]]:
+        """
+        Forgets chunks that no longer exist. Returns (canonical chunks nobody
+        references, to delete from the vector store; canonical chunk id ->
+        metadata JSON of a reference promoted to stand in for it). A promoted
+        chunk keeps the stored vector, which matches its text near enough.
+        """
+        if not chunk_ids:
+            return [], {}
+        conn = self._conn()
+        references = set(self.canonical_of(chunk_ids))
+        deleted: List[str] = []
+        promoted: Dict[str, str] = {}
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany("DELETE FROM refs WHERE chunk_id = ?", [(c,) for c in references])
+            for chunk_id in chunk_ids:
+                if chunk_id in references:
+                    continue
+                ref = conn.execute(
+                    "SELECT chunk_id, doc_id, metadata FROM refs WHERE canonical_id = ? LIMIT 1", (chunk_id,)
+                ).fetchone()
+                if ref is None:
+                    conn.execute("DELETE FROM signatures WHERE chunk_id = ?", (chunk_id,))
+                    conn.execute("DELETE FROM bands WHERE chunk_id = ?", (chunk_id,))
+                    deleted.append(chunk_id)
+                    continue
+                conn.execute("DELETE FROM refs WHERE chunk_id = ?", (ref[0],))
+                conn.execute("UPDATE signatures SET doc_id = ? WHERE chunk_id = ?", (ref[1], chunk_id))
+                promoted[chunk_id] = ref[2]
+        return deleted, promoted
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._conn()
+        return {
+            "canonical_chunks": conn.execute("SELECT COUNT(*) FROM signatures").fetchone()[0],
+            "duplicate_refs": conn.execute("SELECT COUNT(*) FROM refs").fetchone()[0],
+        }
+
+
+def partition_chunks(
+    index: DedupIndex, chunk_ids: List[str], texts: List[str], exclude_doc: Optional[str] = None
+) -> Tuple[List[int], Dict[str, str], Dict[str, "np.ndarray"]]:
+    """
+    Splits a document's chunks into canonical ones and near-duplicates.
+    Returns (indices of chunks to embed and store, duplicate chunk id ->
+    canonical chunk id, signatures of the canonical chunks). Repeats within
+    the document itself (boilerplate on every page) count as duplicates too.
+    Chunks of `exclude_doc` are never matched: a revision's edited passages
+    must not collapse onto the text they replace.
+    """
+    keep: List[int] = []
+    duplicates: Dict[str, str] = {}
+    signatures: Dict[str, "np.ndarray"] = {}
+    local_buckets: Dict[Tuple[int, str], List[str]] = {}
+    for i, (cid, text) in enumerate(zip(chunk_ids, texts)):
+        sig = minhash(text)
+        if sig is None:
+            keep.append(i)
+            continue
+        keys = band_keys(sig)
+        local = {c for band, bucket in enumerate(keys) for c in local_buckets.get((band, bucket), [])}
+        match = next((c for c in local if similarity(sig, signatures[c]) >= index.threshold), None)
+        match = match or index.find(sig, exclude_doc)
+        if match:
+            duplicates[cid] = match
+            continue
+        keep.append(i)
+        signatures[cid] = sig
+        for band, bucket in enumerate(keys):
+            local_buckets.setdefault((band, bucket), []).append(cid)
+    return keep, duplicates, signatures
+
+
+_index: Optional[DedupIndex] = None
+
+
+def get_dedup_index() -> Optional[DedupIndex]:
+    """Shared index, or None when deduplication is disabled."""
+    global _index
+    if not settings.DEDUP_ENABLED:
+        return None
+    if _index is None:
+        _index = DedupIndex(settings.DEDUP_INDEX_PATH, settings.DEDUP_THRESHOLD)
+    return _index
+
+
+def dedup_stats() -> Optional[Dict[str, int]]:
+    index = get_dedup_index()
+    return index.stats() if index else None
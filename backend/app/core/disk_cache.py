@@ -0,0 +1,136 @@
+# backend/app/core/disk_cache.py
+
+import os
+import time
+import sqlite3
+import threading
+import logging
+from typing import Optional, Dict
+
+logger = logging.getLogger(__name__)
+
+# Refreshing last_access on every read would turn hits into writes; only
+# touch a row when its timestamp is older than this many seconds.
+TOUCH_INTERVAL = 60
+# Check the total size every N writes rather than on each one.
+EVICT_EVERY = 32
+
+
+class DiskCache:
+    """
+    Small SQLite-backed key/value store on local disk.
+
+    Every process on the host opens the same file, so all uvicorn workers
+    share entries. WAL mode lets readers proceed while another worker writes.
+    When the stored values exceed `max_bytes`, the least recently used rows
+    are evicted until the store is back under 90% of the budget.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_last_access ON entries (last_access)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            row = self._conn().execute(
+                "SELECT value, last_access FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Disk cache read failed ({self.path}): {e}")
+            row = None
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        now = time.time()
+        if now - row[1] > TOUCH_INTERVAL:
+            try:
+                self._conn().execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            except sqlite3.Error:
+                pass
+        return row[0]
+
+    def set(self, key: str, value: bytes) -> None:
+        now = time.time()
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now),
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Disk cache write failed ({self.path}): {e}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            due = self._writes % EVICT_EVERY == 0
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the store fits its budget."""
+        conn = self._conn()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+
+        excess = total - int(self.max_bytes * 0.9)
+        victims, freed = [], 0
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        self.evictions += len(victims)
+        logger.info(f"🧹 Evicted {len(victims)} entries ({freed} bytes) from {self.path}")
+        return len(victims)
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM entries")
+
+    def stats(self) -> Dict[str, int]:
+        try:
+            entries, size = self._conn().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        except sqlite3.Error:
+            entries, size = -1, -1
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+        }
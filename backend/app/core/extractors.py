@@ -0,0 +1,92 @@
+# backend/app/core/extractors.py
+
+import os
+import logging
+import importlib
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Paragraph records yielded by every extractor:
+#   {"page_number": int, "paragraph_number": int, "text_snippet": str}
+# page_number is the PDF page, slide or image frame; 1 for formats without pages.
+ParagraphIter = Iterator[Dict]
+
+CPU = "cpu"  # OCR and rendering: run on the process pool
+IO = "io"    # parsing text out of the file: a thread is enough
+
+
+@dataclass(frozen=True)
+class Extractor:
+    name: str
+    target: str                     # "module:function", imported on first use
+    extensions: Tuple[str, ...]
+    mime_types: Tuple[str, ...]
+    kind: str
+
+    def load(self) -> Callable[[str, Optional[str]], ParagraphIter]:
+        module, func = self.target.split(":")
+        return getattr(importlib.import_module(module), func)
+
+
+EXTRACTORS: Dict[str, Extractor] = {}
+
+
+def register(extractor: Extractor) -> Extractor:
+    EXTRACTORS[extractor.name] = extractor
+    return extractor
+
+
+register(Extractor(
+    "pdf", "app.core.ocr:iter_pdf_paragraphs",
+    (".pdf",), ("application/pdf",), CPU
+))
+register(Extractor(
+    "docx", "app.core.word:iter_docx_paragraphs",
+    (".docx",), ("application/vnd.openxmlformats-officedocument.wordprocessingml.document",), IO
+))
+register(Extractor(
+    "pptx", "app.core.ppt:iter_pptx_paragraphs",
+    (".pptx",), ("application/vnd.openxmlformats-officedocument.presentationml.presentation",), IO
+))
+register(Extractor(
+    "image", "app.core.image:iter_image_paragraphs",
+    (".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp"),
+    ("image/jpeg", "image/png", "image/tiff", "image/bmp", "image/x-ms-bmp"), CPU
+))
+
+
+def sniff_mime(file_path: str) -> Optional[str]:
+    """MIME type from the file's content, or None without python-magic."""
+    try:
+        import magic
+    except ImportError:
+        return None
+    try:
+        return magic.from_file(file_path, mime=True)
+    except Exception as e:
+        logger.debug(f"[sniff_mime] Could not sniff {file_path}: {e}")
+        return None
+
+
+def detect_extractor(file_path: str) -> Optional[Extractor]:
+    """
+    Picks an extractor from the file's content, falling back to its
+    extension when the content type is unknown or generic (Office files
+    often sniff as plain zip).
+    """
+    mime = sniff_mime(file_path)
+    if mime:
+        for extractor in EXTRACTORS.values():
+            if mime in extractor.mime_types:
+                return extractor
+    ext = os.path.splitext(file_path)[1].lower()
+    for extractor in EXTRACTORS.values():
+        if ext in extractor.extensions:
+            return extractor
+    return None
+
+
+def supported_extensions() -> List[str]:
+    return sorted(ext for e in EXTRACTORS.values() for ext in e.extensions)
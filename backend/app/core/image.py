@@ -1,8 +1,15 @@
 # 3. backend/app/core/image.py
 import os
-from PIL import Image
+from typing import Dict, Iterator, Optional
+
+from PIL import Image, ImageSequence
 import pytesseract
 
+from app.core.ocr import format_error_snippet, split_ocr_paragraphs
+from app.core.preprocessing import preprocess_image
+from app.core.ocr_cache import cached_ocr
+from app.config import settings
+
 def extract_text_from_image(file_path: str) -> str:
     """
     OCR extract text from image (jpg, png, etc.).
@@ -12,3 +19,27 @@ def extract_text_from_image(file_path: str) -> str:
     img = Image.open(file_path)
     text = pytesseract.image_to_string(img)
     return text.strip()
+
+
+def iter_image_paragraphs(file_path: str, poppler_path: Optional[str] = None) -> Iterator[Dict]:
+    """
+    OCR paragraph records for an image. Each frame of a multi-page TIFF is
+    its own page; blank frames are skipped.
+    """
+    try:
+        img = Image.open(file_path)
+    except Exception as e:
+        yield format_error_snippet(f"OCR failed for image: {e}")
+        return
+    with img:
+        for page, frame in enumerate(ImageSequence.Iterator(img), start=1):
+            try:
+                # Phone photos arrive rotated and oversized; scans arrive skewed
+                if settings.OCR_PREPROCESS:
+                    text, _ = cached_ocr(frame, preprocess_image, variant="image-preprocessed")
+                else:
+                    text, _ = cached_ocr(frame, variant="image-raw")
+            except Exception as e:
+                yield format_error_snippet(f"OCR failed for image page {page}: {e}", page=page)
+                continue
+            yield from split_ocr_paragraphs(text, page)
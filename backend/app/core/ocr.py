@@ -1,10 +1,14 @@
 import os
-from typing import List, Dict, Optional
-from PIL import Image
-import pytesseract
-from pdf2image import convert_from_path
-from pdfminer.high_level import extract_text as extract_pdf_text
-from docx import Document
+import logging
+from typing import Iterator, List, Dict, Optional, Tuple
+
+from app.core.extractors import EXTRACTORS, Extractor, detect_extractor
+from app.services.metrics import span, timed
+
+# OCR and document libraries are imported inside the extractors that need
+# them, so importing this module (and the app) stays cheap.
+
+logger = logging.getLogger(__name__)
 
 
 def format_error_snippet(error: str, page: int = 0, para: int = 0) -> Dict:
@@ -16,99 +20,133 @@ def format_error_snippet(error: str, page: int = 0, para: int = 0) -> Dict:
     }
 
 
-def extract_paragraphs_from_scanned_pdf(file_path: str, poppler_path: Optional[str] = None) -> List[Dict]:
-    """Extract paragraphs from scanned PDF using OCR."""
+def split_ocr_paragraphs(text: str, page: int) -> List[Dict]:
+    para_list = [p.strip() for p in text.replace('\r', '').split('\n\n') if p.strip()]
+    return [{
+        "page_number": page,
+        "paragraph_number": j + 1,
+        "text_snippet": para
+    } for j, para in enumerate(para_list)]
+
+
+def iter_scanned_pdf_paragraphs(file_path: str, poppler_path: Optional[str] = None) -> Iterator[Dict]:
+    """
+    OCR a scanned PDF one page at a time. Each page is first rendered at
+    PROBE_DPI to skip blank pages and pick the DPI that makes its text the
+    size Tesseract reads best, then rendered at that DPI and preprocessed.
+    Pages seen before (cover sheets, exhibits, form templates) come from the
+    OCR cache instead of Tesseract.
+    """
+    from pdf2image import convert_from_path, pdfinfo_from_path
+    from app.core.preprocessing import PROBE_DPI, probe_page, preprocess_image, PreprocessOptions
+    from app.core.ocr_cache import cached_ocr
+    from app.config import settings
+
+    poppler = {"poppler_path": poppler_path} if poppler_path else {}
     try:
-        pages = convert_from_path(file_path, poppler_path=poppler_path) if poppler_path else convert_from_path(file_path)
+        page_count = int(pdfinfo_from_path(file_path, **poppler)["Pages"])
     except Exception as e:
-        return [format_error_snippet(f"PDF to image conversion failed: {e}")]
-
-    paragraphs = []
-    for i, page in enumerate(pages):
+        yield format_error_snippet(f"PDF to image conversion failed: {e}")
+        return
+
+    # Already rendered at the chosen DPI, so no rescaling
+    options = PreprocessOptions(rescale=False)
+    prepare = lambda image: preprocess_image(image, options)
+    cached = 0
+    for page in range(1, page_count + 1):
         try:
-            text = pytesseract.image_to_string(page)
-            para_list = [p.strip() for p in text.replace('\r', '').split('\n\n') if p.strip()]
-            for j, para in enumerate(para_list):
-                paragraphs.append({
-                    "page_number": i + 1,
-                    "paragraph_number": j + 1,
-                    "text_snippet": para
-                })
+            def render(dpi):
+                with span("ocr.render"):
+                    return convert_from_path(
+                        file_path, dpi=dpi, first_page=page, last_page=page, grayscale=True, **poppler
+                    )[0]
+            if settings.OCR_PREPROCESS:
+                dpi = probe_page(render(PROBE_DPI))
+                if dpi is None:
+                    continue  # blank page
+                image = render(dpi)
+                with span("ocr.page"):
+                    text, hit = cached_ocr(image, prepare, variant="pdf-preprocessed")
+            else:
+                image = render(200)  # pdf2image's default DPI
+                with span("ocr.page"):
+                    text, hit = cached_ocr(image, variant="pdf-raw")
+            cached += hit
+            yield from split_ocr_paragraphs(text, page)
         except Exception as e:
-            paragraphs.append(format_error_snippet(f"OCR failed on page {i+1}: {e}", page=i+1))
-    return paragraphs
+            yield format_error_snippet(f"OCR failed on page {page}: {e}", page=page)
+    if cached:
+        logger.info(f"♻️ {cached} of {page_count} pages of {os.path.basename(file_path)} served from OCR cache")
+
+
+def extract_paragraphs_from_scanned_pdf(file_path: str, poppler_path: Optional[str] = None) -> List[Dict]:
+    """Extract paragraphs from scanned PDF using OCR."""
+    return list(iter_scanned_pdf_paragraphs(file_path, poppler_path))
+
+
+def iter_text_pdf_pages(file_path: str) -> Iterator[Tuple[int, str]]:
+    """(page number, text) of each page of a PDF's text layer, in one pdfminer pass."""
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+
+    for page_number, page in enumerate(extract_pages(file_path), start=1):
+        # A blank line after each text box, as pdfminer's extract_text writes it
+        yield page_number, "".join(el.get_text() + "\n" for el in page if isinstance(el, LTTextContainer))
 
 
 def extract_paragraphs_from_text_pdf(file_path: str) -> List[Dict]:
     """Extract paragraphs from text-based PDF using pdfminer."""
     try:
-        text = extract_pdf_text(file_path)
-        para_list = [p.strip() for p in text.split('\n\n') if p.strip()]
-        return [{
-            "page_number": 1,
-            "paragraph_number": i + 1,
-            "text_snippet": para
-        } for i, para in enumerate(para_list)]
+        return [p for page, text in iter_text_pdf_pages(file_path) for p in split_ocr_paragraphs(text, page)]
     except Exception as e:
         return [format_error_snippet(f"Text PDF extraction failed: {e}")]
 
 
-def extract_paragraphs_from_docx(file_path: str) -> List[Dict]:
-    """Extract paragraphs from DOCX file."""
-    try:
-        doc = Document(file_path)
-        para_list = [p.text.strip() for p in doc.paragraphs if p.text.strip()]
-        return [{
-            "page_number": 1,
-            "paragraph_number": i + 1,
-            "text_snippet": para
-        } for i, para in enumerate(para_list)]
-    except Exception as e:
-        return [format_error_snippet(f"DOCX extraction failed: {e}")]
-
-
-def extract_paragraphs_from_image(file_path: str) -> List[Dict]:
-    """Extract paragraphs from image files using OCR."""
+def iter_pdf_paragraphs(file_path: str, poppler_path: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Text PDFs via pdfminer, page by page; scanned PDFs (no text on any
+    page) via OCR.
+    """
+    found = False
     try:
-        image = Image.open(file_path)
-        text = pytesseract.image_to_string(image)
-        para_list = [p.strip() for p in text.split('\n\n') if p.strip()]
-        return [{
-            "page_number": 1,
-            "paragraph_number": i + 1,
-            "text_snippet": para
-        } for i, para in enumerate(para_list)]
+        for page, text in iter_text_pdf_pages(file_path):
+            for paragraph in split_ocr_paragraphs(text, page):
+                found = True
+                yield paragraph
     except Exception as e:
-        return [format_error_snippet(f"OCR failed for image: {e}")]
-
-
-def extract_paragraphs(file_path: str, poppler_path: Optional[str] = None) -> List[Dict]:
+        if found:
+            yield format_error_snippet(f"Text PDF extraction failed: {e}")
+            return
+    if not found:
+        yield from iter_scanned_pdf_paragraphs(file_path, poppler_path)
+
+
+def iter_paragraphs(
+    file_path: str,
+    poppler_path: Optional[str] = None,
+    extractor: Optional[Extractor] = None
+) -> Iterator[Dict]:
     """
-    Unified interface to extract paragraphs from:
-    - PDF (text or scanned)
-    - DOCX
-    - JPG/JPEG/PNG
-
-    Adds 'page_number', 'paragraph_number', and 'text_snippet' to each entry.
+    Streams paragraph records from any registered format (see
+    app.core.extractors). Each record has 'page_number' (page, slide or
+    frame), 'paragraph_number' and 'text_snippet'.
     """
-    ext = os.path.splitext(file_path)[1].lower()
-
-    if ext == ".pdf":
-        try:
-            # Prefer text extraction
-            text = extract_pdf_text(file_path)
-            if text.strip():
-                return extract_paragraphs_from_text_pdf(file_path)
-            else:
-                return extract_paragraphs_from_scanned_pdf(file_path, poppler_path)
-        except Exception:
-            return extract_paragraphs_from_scanned_pdf(file_path, poppler_path)
-
-    elif ext == ".docx":
-        return extract_paragraphs_from_docx(file_path)
-
-    elif ext in [".jpg", ".jpeg", ".png"]:
-        return extract_paragraphs_from_image(file_path)
-
-    else:
-        return [format_error_snippet(f"Unsupported file type: {ext}")]
+    extractor = extractor or detect_extractor(file_path)
+    if extractor is None:
+        yield format_error_snippet(f"Unsupported file type: {os.path.splitext(file_path)[1].lower()}")
+        return
+    yield from extractor.load()(file_path, poppler_path)
+
+
+@timed("extraction")
+def extract_paragraphs(
+    file_path: str,
+    poppler_path: Optional[str] = None,
+    extractor_name: Optional[str] = None
+) -> List[Dict]:
+    """
+    List form of `iter_paragraphs`, for running on a worker pool.
+    Pass `extractor_name` when the caller already detected the format.
+    """
+    extractor = EXTRACTORS[extractor_name] if extractor_name else None
+    return list(iter_paragraphs(file_path, poppler_path, extractor))
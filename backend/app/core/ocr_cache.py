@@ -0,0 +1,77 @@
+# backend/app/core/ocr_cache.py
+
+import hashlib
+import logging
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+
+from app.config import settings
+from app.core.disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+# Part of every key; bump when preprocessing changes what Tesseract sees
+OCR_CACHE_VERSION = "2"
+
+_store: Optional[DiskCache] = None
+
+
+def get_ocr_cache() -> Optional[DiskCache]:
+    """Shared per-page OCR cache, or None when disabled."""
+    global _store
+    if not settings.OCR_CACHE_ENABLED:
+        return None
+    if _store is None:
+        _store = DiskCache(settings.OCR_CACHE_PATH, max_bytes=settings.OCR_CACHE_MAX_BYTES)
+    return _store
+
+
+@lru_cache(maxsize=1)
+def tesseract_version() -> str:
+    import pytesseract
+
+    try:
+        return str(pytesseract.get_tesseract_version())
+    except Exception:
+        return "unknown"
+
+
+def page_key(image, variant: str, lang: str, config: str) -> str:
+    """
+    Content hash of the rendered page plus everything that changes the OCR
+    output for it: preprocessing variant, language, Tesseract config and
+    version. Identical pages in different uploads share one entry.
+    """
+    digest = hashlib.sha256(f"{image.mode}:{image.width}x{image.height}:".encode())
+    digest.update(image.tobytes())
+    return f"ocr:{OCR_CACHE_VERSION}:{tesseract_version()}:{lang}:{config}:{variant}:{digest.hexdigest()}"
+
+
+def cached_ocr(image, prepare: Optional[Callable] = None, variant: str = "raw") -> Tuple[str, bool]:
+    """
+    OCR text for a rendered page and whether it came from the cache.
+    `prepare` (e.g. preprocessing) runs only on a miss; if it returns None
+    the page is blank and its text is "". `variant` names what `prepare`
+    does so different pipelines don't share entries.
+    """
+    import pytesseract
+
+    lang, config = settings.OCR_LANG, settings.OCR_TESSERACT_CONFIG
+    cache = get_ocr_cache()
+    key = page_key(image, variant, lang, config) if cache else None
+    if key:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit.decode("utf-8"), True
+
+    prepared = prepare(image) if prepare else image
+    text = pytesseract.image_to_string(prepared, lang=lang, config=config) if prepared is not None else ""
+    if key:
+        cache.set(key, text.encode("utf-8"))
+    return text, False
+
+
+def ocr_cache_stats() -> Optional[Dict[str, int]]:
+    """Entries and size are shared; hit/miss counts are for this process only."""
+    cache = get_ocr_cache()
+    return cache.stats() if cache else None
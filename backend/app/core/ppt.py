@@ -1,7 +1,11 @@
 # 2. backend/app/core/ppt.py
 import os
+from typing import Dict, Iterator, Optional
+
 from pptx import Presentation
 
+from app.core.ocr import format_error_snippet
+
 def extract_text_from_pptx(file_path: str) -> str:
     """
     Extract text from a .pptx file, tagging slides.
@@ -21,3 +25,22 @@ def extract_text_from_pptx(file_path: str) -> str:
             slide_text = "\n".join(texts)
             output += f"\n--- Slide {idx} ---\n{slide_text}\n"
     return output.strip()
+
+
+def iter_pptx_paragraphs(file_path: str, poppler_path: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Paragraph records for a .pptx file: one per text shape, with the slide
+    number as page_number.
+    """
+    try:
+        prs = Presentation(file_path)
+    except Exception as e:
+        yield format_error_snippet(f"PPTX extraction failed: {e}")
+        return
+    for idx, slide in enumerate(prs.slides, start=1):
+        number = 0
+        for shape in slide.shapes:
+            text = shape.text.strip() if hasattr(shape, "text") else ""
+            if text:
+                number += 1
+                yield {"page_number": idx, "paragraph_number": number, "text_snippet": text}
@@ -0,0 +1,201 @@
+# backend/app/core/preprocessing.py
+"""
+Image cleanup before Tesseract. OCR time grows with pixel count, so pages
+are rendered (or rescaled) so that text lines come out around
+TARGET_LINE_HEIGHT_PX tall, cropped to the text block, deskewed and
+binarized. Blank pages are detected from a cheap low-resolution probe and
+skipped entirely.
+
+The constants below are starting points rather than tuned values;
+benchmarks/bench_ocr_preprocessing.py measures accuracy and time per step
+on a sample set when they need revisiting.
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps
+
+# Tesseract is most accurate with an x-height of ~20 px, i.e. text lines
+# (ascender to descender) of ~40 px. Larger only costs time.
+TARGET_LINE_HEIGHT_PX = 40
+MIN_DPI = 150
+MAX_DPI = 400
+PROBE_DPI = 72
+# Longest side after rescaling; phone photos are often 4000+ px
+MAX_SIDE_PX = 3500
+MAX_UPSCALE = 2.0
+MIN_DOWNSCALE = 0.5  # line height estimates on dense photos can run high
+
+# A page whose dark pixels cover less than this fraction is blank, as is one
+# whose gray levels span less than BLANK_MAX_CONTRAST (scanner noise only)
+BLANK_INK_RATIO = 0.002
+BLANK_MAX_CONTRAST = 40
+# Rows/columns with less ink than this fraction are margin or noise
+MARGIN_INK_RATIO = 0.005
+CROP_PADDING_PX = 12
+
+MAX_SKEW_DEGREES = 5.0
+SKEW_STEP_DEGREES = 0.5
+SKEW_PROBE_SIDE_PX = 800
+
+
+@dataclass(frozen=True)
+class PreprocessOptions:
+    # Every other step works on the grayscale image; this flag only matters
+    # when all of them are off
+    grayscale: bool = True
+    rescale: bool = True
+    crop: bool = True
+    deskew: bool = True
+    binarize: bool = True
+
+
+DEFAULT_OPTIONS = PreprocessOptions()
+RAW = PreprocessOptions(grayscale=False, rescale=False, crop=False, deskew=False, binarize=False)
+
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """Gray level that best separates ink (<= threshold) from paper."""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = hist.sum()
+    if total == 0:
+        return 128
+    levels = np.arange(256)
+    weight_bg = np.cumsum(hist)
+    weight_fg = total - weight_bg
+    cum_mean = np.cumsum(hist * levels)
+    mean_bg = cum_mean / np.where(weight_bg == 0, 1, weight_bg)
+    mean_fg = (cum_mean[-1] - cum_mean) / np.where(weight_fg == 0, 1, weight_fg)
+    between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(between))
+
+
+def ink_mask(gray: np.ndarray) -> np.ndarray:
+    return gray <= otsu_threshold(gray)
+
+
+def is_blank(mask: np.ndarray) -> bool:
+    return mask.size == 0 or mask.mean() < BLANK_INK_RATIO
+
+
+def page_ink(gray: np.ndarray) -> Optional[Tuple[int, np.ndarray]]:
+    """(threshold, ink mask) for a page, or None if it is blank."""
+    if gray.size == 0:
+        return None
+    low, high = np.percentile(gray, [1, 99])
+    if high - low < BLANK_MAX_CONTRAST:
+        return None
+    threshold = otsu_threshold(gray)
+    mask = gray <= threshold
+    return None if is_blank(mask) else (threshold, mask)
+
+
+def text_bbox(mask: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
+    """(left, top, right, bottom) of the text block, ignoring specks and margins."""
+    rows = np.flatnonzero(mask.mean(axis=1) > MARGIN_INK_RATIO)
+    cols = np.flatnonzero(mask.mean(axis=0) > MARGIN_INK_RATIO)
+    if not len(rows) or not len(cols):
+        return None
+    h, w = mask.shape
+    return (
+        max(0, cols[0] - CROP_PADDING_PX),
+        max(0, rows[0] - CROP_PADDING_PX),
+        min(w, cols[-1] + 1 + CROP_PADDING_PX),
+        min(h, rows[-1] + 1 + CROP_PADDING_PX),
+    )
+
+
+def estimate_line_height(mask: np.ndarray) -> Optional[float]:
+    """Median height in pixels of the text lines, from the row ink profile."""
+    inked = mask.mean(axis=1) > MARGIN_INK_RATIO
+    # Runs of consecutive inked rows are text lines
+    edges = np.diff(np.concatenate(([0], inked.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    heights = ends - starts
+    heights = heights[heights >= 3]  # rules and specks
+    if not len(heights):
+        return None
+    return float(np.median(heights))
+
+
+def estimate_skew(mask: np.ndarray) -> float:
+    """
+    Skew angle in degrees: the rotation that makes text lines horizontal,
+    i.e. maximizes the variance of the row ink profile.
+    """
+    probe = Image.fromarray((mask * 255).astype(np.uint8))
+    probe.thumbnail((SKEW_PROBE_SIDE_PX, SKEW_PROBE_SIDE_PX))
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-MAX_SKEW_DEGREES, MAX_SKEW_DEGREES + 1e-9, SKEW_STEP_DEGREES):
+        rotated = np.asarray(probe.rotate(float(angle), resample=Image.NEAREST, fillcolor=0))
+        score = float(np.var(rotated.sum(axis=1)))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def choose_dpi(line_height_px: float, rendered_dpi: int = PROBE_DPI) -> int:
+    """DPI at which lines measured at `rendered_dpi` come out TARGET_LINE_HEIGHT_PX tall."""
+    dpi = rendered_dpi * TARGET_LINE_HEIGHT_PX / max(line_height_px, 1.0)
+    return int(min(MAX_DPI, max(MIN_DPI, round(dpi / 10) * 10)))
+
+
+def probe_page(image: Image.Image) -> Optional[int]:
+    """
+    For a page rendered at PROBE_DPI: the DPI to OCR it at, or None if the
+    page is blank.
+    """
+    ink = page_ink(np.asarray(image.convert("L")))
+    if ink is None:
+        return None
+    line_height = estimate_line_height(ink[1])
+    return choose_dpi(line_height) if line_height else MIN_DPI
+
+
+def _rescale_factor(size: Tuple[int, int], line_height: Optional[float]) -> float:
+    scale = TARGET_LINE_HEIGHT_PX / line_height if line_height else 1.0
+    scale = min(max(scale, MIN_DOWNSCALE), MAX_UPSCALE)
+    return min(scale, MAX_SIDE_PX / max(size))
+
+
+def preprocess_image(image: Image.Image, options: PreprocessOptions = DEFAULT_OPTIONS) -> Optional[Image.Image]:
+    """
+    Returns the image to hand to Tesseract, or None if the page is blank.
+    Set `options.rescale` only for images whose resolution wasn't already
+    chosen (photos, scans); rendered PDF pages come in at the right DPI.
+    """
+    if options == RAW:
+        return image
+    gray = ImageOps.exif_transpose(image).convert("L")
+    ink = page_ink(np.asarray(gray))
+    if ink is None:
+        return None
+    mask = ink[1]
+
+    # Each step re-thresholds its own output: the full page's histogram
+    # (margins, photo background) is not the text block's, and rotation
+    # interpolates new gray levels
+    if options.crop:
+        bbox = text_bbox(mask)
+        if bbox:
+            gray = gray.crop(bbox)
+            mask = ink_mask(np.asarray(gray))
+
+    if options.deskew:
+        angle = estimate_skew(mask)
+        if abs(angle) >= SKEW_STEP_DEGREES:
+            gray = gray.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+            mask = ink_mask(np.asarray(gray))
+
+    if options.rescale:
+        scale = _rescale_factor(gray.size, estimate_line_height(mask))
+        if abs(scale - 1.0) > 0.1:
+            new_size = (max(1, round(gray.width * scale)), max(1, round(gray.height * scale)))
+            gray = gray.resize(new_size, Image.LANCZOS)
+
+    if options.binarize:
+        threshold = otsu_threshold(np.asarray(gray))
+        return gray.point(lambda p: 255 if p > threshold else 0)
+    return gray
@@ -0,0 +1,84 @@
+# backend/app/core/text_store.py
+"""
+Extracted document text is stored compressed on the Document row, with a
+paragraph index (character offsets and page per paragraph) for ranged reads.
+zstd when `zstandard` is installed, zlib otherwise; the codec is stored
+with the row so either can read what the other wrote.
+"""
+
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is always there
+    zstandard = None
+
+ZSTD = "zstd"
+ZLIB = "zlib"
+ZSTD_LEVEL = 6
+ZLIB_LEVEL = 6
+
+# [start_char, end_char, page] per paragraph of the joined text
+ParagraphIndex = List[Tuple[int, int, Optional[int]]]
+
+
+def default_codec() -> str:
+    return ZSTD if zstandard is not None else ZLIB
+
+
+def compress(data: bytes, codec: Optional[str] = None) -> Tuple[str, bytes]:
+    codec = codec or default_codec()
+    if codec == ZSTD:
+        return codec, zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return ZLIB, zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress(codec: str, blob: bytes) -> bytes:
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Text was stored with zstd; install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return zlib.decompress(blob)
+
+
+def paragraph_index(paragraphs: List[Dict], separator: str = "\n\n") -> ParagraphIndex:
+    index, offset = [], 0
+    for p in paragraphs:
+        end = offset + len(p["text_snippet"])
+        index.append((offset, end, p.get("page_number")))
+        offset = end + len(separator)
+    return index
+
+
+def pack_text(full_text: str, paragraphs: List[Dict]) -> Dict[str, Any]:
+    """Document column values for the extracted text and its paragraph index."""
+    codec, blob = compress(full_text.encode("utf-8"))
+    _, index = compress(orjson.dumps(paragraph_index(paragraphs)), codec)
+    return {
+        "text_codec": codec,
+        "text_compressed": blob,
+        "paragraph_index": index,
+        "text_chars": len(full_text),
+    }
+
+
+def load_text(doc) -> str:
+    """Full extracted text of a document; rows written before compression keep it in ocr_text."""
+    if doc.text_compressed is not None:
+        return decompress(doc.text_codec, doc.text_compressed).decode("utf-8")
+    return doc.ocr_text or ""
+
+
+def load_paragraphs(doc, text: Optional[str] = None) -> ParagraphIndex:
+    """Paragraph index; older rows get one paragraph per blank-line-separated block."""
+    if doc.paragraph_index is not None:
+        return [tuple(p) for p in orjson.loads(decompress(doc.text_codec, doc.paragraph_index))]
+    text = load_text(doc) if text is None else text
+    index, offset = [], 0
+    for block in text.split("\n\n"):
+        index.append((offset, offset + len(block), None))
+        offset += len(block) + 2
+    return index if text else []
@@ -1,23 +1,13 @@
-from openai import OpenAI
-from app.config import settings
+from app.services.theme_service import themes_for_embeddings
+from app.services.vector_store import embed_texts
 
-import openai
-openai.api_key = settings.OPENAI_API_KEY
 
 def detect_themes_from_responses(responses: list[str]) -> list[str]:
-    prompt = (
-        "You are a research assistant. Given the following document-based answers, "
-        "identify coherent themes (e.g., regulations, fraud, compliance). "
-        "List the themes in bullet points.\n\n"
-    )
-
-    prompt += "\n".join([f"Document Answer: {resp}" for resp in responses])
-    prompt += "\n\nReturn just a bullet list of themes."
-
-    completion = openai.ChatCompletion.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "user", "content": prompt}]
-    )
-
-    content = completion.choices[0].message.content
-    return content.strip().split("\n")
+    """
+    Themes for a set of document answers, taken from the corpus theme
+    clusters their embeddings fall into. No LLM call is made.
+    """
+    responses = [r for r in responses if r and r.strip()]
+    if not responses:
+        return []
+    return themes_for_embeddings(embed_texts(responses))
@@ -1,7 +1,11 @@
 # 1. backend/app/core/word.py
 import os
+from typing import Dict, Iterator, Optional
+
 from docx import Document as DocxDocument
 
+from app.core.ocr import format_error_snippet
+
 def extract_text_from_docx(file_path: str) -> str:
     """
     Extract text from a .docx file, tagging paragraphs.
@@ -14,4 +18,19 @@ def extract_text_from_docx(file_path: str) -> str:
         text = para.text.strip()
         if text:
             output += f"\n--- Para {i} ---\n{text}\n"
-    return output.strip()
\ No newline at end of file
+    return output.strip()
+
+
+def iter_docx_paragraphs(file_path: str, poppler_path: Optional[str] = None) -> Iterator[Dict]:
+    """Paragraph records for a .docx file (no pages, so page_number is 1)."""
+    try:
+        doc = DocxDocument(file_path)
+    except Exception as e:
+        yield format_error_snippet(f"DOCX extraction failed: {e}")
+        return
+    number = 0
+    for para in doc.paragraphs:
+        text = para.text.strip()
+        if text:
+            number += 1
+            yield {"page_number": 1, "paragraph_number": number, "text_snippet": text}
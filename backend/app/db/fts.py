@@ -0,0 +1,71 @@
+# backend/app/db/fts.py
+"""
+SQLite FTS5 index over chunk text. `chunks_fts` is an external-content
+table: it stores only the index and reads text from `chunks`, and triggers
+keep it in step with every insert, update and delete on `chunks`.
+"""
+
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "chunks_fts"
+_available = False
+
+FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        text, content='chunks', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS chunks_fts_ai AFTER INSERT ON chunks BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS chunks_fts_ad AFTER DELETE ON chunks BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS chunks_fts_au AFTER UPDATE OF text ON chunks BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+]
+
+FTS_DROP = [
+    "DROP TRIGGER IF EXISTS chunks_fts_au",
+    "DROP TRIGGER IF EXISTS chunks_fts_ad",
+    "DROP TRIGGER IF EXISTS chunks_fts_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def create_fts(conn: Connection) -> None:
+    """Creates the index and triggers if missing, indexing existing chunks on first creation."""
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+    ).first()
+    for statement in FTS_DDL:
+        conn.execute(text(statement))
+    if not exists:
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        logger.info(f"✅ Built {FTS_TABLE} full-text index")
+
+
+def ensure_fts(engine: Engine) -> bool:
+    """Sets up the index on SQLite databases; returns whether full-text search is available."""
+    global _available
+    if engine.dialect.name != "sqlite":
+        logger.warning(f"⚠️ Full-text search needs SQLite FTS5; /search is disabled on {engine.dialect.name}")
+        return False
+    try:
+        with engine.begin() as conn:
+            create_fts(conn)
+        _available = True
+    except Exception as e:
+        logger.warning(f"⚠️ Could not create the FTS5 index, /search is disabled: {e}")
+    return _available
+
+
+def fts_available() -> bool:
+    return _available
@@ -1,6 +1,6 @@
 # ✅ models.py
 from sqlalchemy.orm import relationship
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Float
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Float, Index, LargeBinary
 from .session import Base  # use Base from session.py
 import datetime
 
@@ -9,20 +9,35 @@ class Document(Base):
     
     id          = Column(Integer, primary_key=True, index=True)
     title       = Column(String,  index=True,   nullable=True)
-    filename    = Column(String,  unique=True,  index=True)
+    filename    = Column(String,  index=True)  # shared by every version of a document
     file_path   = Column(String,  unique=True)
     content     = Column(Text,    nullable=True)
-    status      = Column(String,  default="new")
-    author      = Column(String,  nullable=True)  # uploader/author information
+    status      = Column(String,  default="new", index=True)
+    author      = Column(String,  nullable=True, index=True)  # uploader/author information
     source      = Column(String,  nullable=True)  # document source or metadata
-    doc_type    = Column(String,  nullable=True)  # type/category of document
-    ocr_text    = Column(Text,    nullable=True)  # full OCR extracted text
-    upload_time = Column(DateTime, default=datetime.datetime.utcnow)  # timestamp
+    doc_type    = Column(String,  nullable=True, index=True)  # type/category of document
+    ocr_text    = Column(Text,    nullable=True)  # full OCR extracted text (rows from before text_compressed)
+    text_codec  = Column(String,  nullable=True)  # "zstd" or "zlib", see app/core/text_store.py
+    text_compressed = Column(LargeBinary, nullable=True)  # extracted text, compressed
+    paragraph_index = Column(LargeBinary, nullable=True)  # compressed JSON [[start, end, page], ...]
+    text_chars  = Column(Integer, nullable=True)
+    upload_time = Column(DateTime, default=datetime.datetime.utcnow, index=True)  # timestamp
+    doc_uid     = Column(String,  unique=True, index=True, nullable=True)  # doc_id used in vector-store metadata
+    summary     = Column(Text,    nullable=True)  # compact summary generated after upload
+    key_facts   = Column(Text,    nullable=True)  # JSON list of key facts
+    summarized_at = Column(DateTime, nullable=True)
+    version     = Column(Integer, default=1, nullable=False)
+    previous_version_id = Column(Integer, ForeignKey("documents.id"), nullable=True, index=True)
+    content_hash = Column(String, nullable=True, index=True)  # sha256 of the uploaded file
 
     # New relationship to chunks
     chunks     = relationship("Chunk", back_populates="document", cascade="all, delete-orphan")
     citations   = relationship("Citation", back_populates="document")
     query_logs  = relationship("QueryLog", back_populates="document")
+    previous_version = relationship("Document", remote_side=[id])
+
+    # Default listing: current documents, newest first (keyset on upload_time, id)
+    __table_args__ = (Index("ix_documents_status_upload_time", "status", "upload_time", "id"),)
 
 class Chunk(Base):
     __tablename__ = "chunks"
@@ -33,6 +48,9 @@ class Chunk(Base):
     text        = Column(Text, nullable=False)
     start_char  = Column(Integer, nullable=True)  # character start in full doc text
     end_char    = Column(Integer, nullable=True)  # character end in full doc text
+    content_hash = Column(String, nullable=True, index=True)  # chunker.chunk_hash of the text
+    page_start  = Column(Integer, nullable=True)  # page (or slide/frame) the chunk starts on
+    page_end    = Column(Integer, nullable=True)
 
     document    = relationship("Document", back_populates="chunks")
 
@@ -57,5 +75,6 @@ class QueryLog(Base):
     answer        = Column(Text)
     citations     = Column(Text)
     themes        = Column(Text)
+    stage_timings = Column(Text)    # JSON {stage: milliseconds}, see app/services/metrics.py
 
     document      = relationship("Document", back_populates="query_logs")
@@ -0,0 +1,189 @@
+# backend/app/logging_config.py
+"""
+Logging setup shared by the API, the sidecar and the CLI helpers.
+
+Records are handed to a queue and written by a listener thread, so request
+threads never block on the stream. Each record carries the request id of
+the request that produced it (`request_id_var`, set by
+RequestLogMiddleware). Verbose payload logs, marked with `extra=PAYLOAD`, are
+kept only for a LOG_PAYLOAD_SAMPLE_RATE fraction of requests. Use %-style
+arguments, not f-strings, so disabled levels cost nothing to format.
+"""
+
+import sys
+import copy
+import time
+import uuid
+import atexit
+import logging
+import logging.handlers
+import queue
+import zlib
+import random
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+import orjson
+
+from app.config import settings
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# logger.debug("result: %s", result, extra=PAYLOAD)
+PAYLOAD = {"payload": True}
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps the current request id and drops unsampled payload records."""
+
+    def __init__(self, sample_rate: float):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        request_id = request_id_var.get()
+        record.request_id = request_id
+        if getattr(record, "payload", False):
+            return payload_sampled(request_id, self.sample_rate)
+        return True
+
+
+def payload_sampled(request_id: str, rate: float) -> bool:
+    """Same answer for every record of a request, so a sampled request is logged whole."""
+    if rate >= 1:
+        return True
+    if rate <= 0:
+        return False
+    if request_id == "-":
+        return random.random() < rate
+    return zlib.crc32(request_id.encode("utf-8")) % 10000 < rate * 10000
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Arguments are rendered here, since they may change once the caller
+        # moves on; the rest of the formatting happens on the listener thread
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS and key != "payload":
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode("utf-8")
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """'app.services.llm_service=DEBUG,httpx=WARNING' -> {logger: level}."""
+    levels = {}
+    for item in spec.split(","):
+        name, sep, level = item.partition("=")
+        if sep and name.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging() -> None:
+    """Installs the queue handler on the root logger; safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = JsonFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+    formatter.converter = time.gmtime
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = _QueueHandler(log_queue)
+    handler.addFilter(RequestContextFilter(settings.LOG_PAYLOAD_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name, level in parse_levels(settings.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Flushes queued records; called at exit."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestLogMiddleware:
+    """
+    One log line per request (method, path, status, duration), written when
+    the response body has been sent, and a request id for every record
+    logged while handling it. The id comes from X-Request-ID when the client
+    sends one and is echoed back in the response.
+    """
+
+    QUIET_PATHS = {"/healthz", "/readyz", "/metrics"}
+
+    def __init__(self, app, header: str = "x-request-id"):
+        self.app = app
+        self.header = header.encode("latin-1")
+        self.logger = logging.getLogger("app.requests")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = next((v.decode("latin-1") for k, v in scope["headers"] if k == self.header), None)
+        request_id = (request_id or uuid.uuid4().hex[:16])[:64]
+        token = request_id_var.set(request_id)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(self.header, request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            path = scope.get("path", "")
+            level = logging.DEBUG if path in self.QUIET_PATHS else logging.INFO
+            if self.logger.isEnabledFor(level):
+                duration_ms = round((time.perf_counter() - started) * 1000, 1)
+                self.logger.log(level, "%s %s -> %s in %.1f ms", scope["method"], path, status, duration_ms,
+                                extra={"method": scope["method"], "path": path, "status": status,
+                                       "duration_ms": duration_ms})
+            request_id_var.reset(token)
@@ -1,13 +1,28 @@
 # backend/app/main.py
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import upload, query, document_routes
-from app.db.session import engine, Base
+from app.api import upload, query, document_routes, search
+from app.db.session import engine, async_engine, Base
+from app.db.fts import ensure_fts
+from app.services.llm_cache import cache_stats
+from app.services.llm_scheduler import scheduler_stats
+from app.services.query_service import query_flight
+from app.services.admission import admission_stats
+from app.services.executors import executor_stats, shutdown_executors
+from app.services.vector_store import sidecar_client
+from app.core.ocr_cache import ocr_cache_stats
+from app.core.dedup import dedup_stats
+from app.services.query_log import query_log_writer, query_log_stats
+from app.services.metrics import REGISTRY, CONTENT_TYPE, render_metrics, setup_opentelemetry, stats_collector
+from app.services.warmup import start_warmup, readiness, warmup_status
+from app.config import settings
+from app.logging_config import configure_logging, RequestLogMiddleware
 import logging
 
 # ---- Logging Setup ----
-logging.basicConfig(level=logging.DEBUG)
+configure_logging()
 logger = logging.getLogger("main")
 
 app = FastAPI(title="📄 Document Theme Chatbot API")
@@ -21,22 +36,87 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Stage spans go to /metrics; with OTEL_ENABLED also to the OTLP collector
+setup_opentelemetry(app)
+
 # Automatically create database tables (if needed)
 Base.metadata.create_all(bind=engine)
+ensure_fts(engine)
+
+@app.on_event("startup")
+def prewarm():
+    # Models load in the background so the worker accepts traffic immediately
+    if settings.PREWARM_ON_STARTUP:
+        start_warmup()
+
+@app.on_event("startup")
+async def start_query_log_writer():
+    query_log_writer.start()
+
+@app.on_event("shutdown")
+def stop_worker_pools():
+    shutdown_executors()
+
+@app.on_event("shutdown")
+async def close_db_pool():
+    # Queued query logs are written before the pool closes
+    await query_log_writer.stop(settings.QUERY_LOG_DRAIN_TIMEOUT_SECONDS)
+    await async_engine.dispose()
 
-# ---- Middleware to log every request ----
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    logger.debug(f"Incoming request: {request.method} {request.url}")
-    response = await call_next(request)
-    logger.debug(f"Completed request: {request.method} {request.url} -> {response.status_code}")
-    return response
+# ---- One log line and a request id per request ----
+app.add_middleware(RequestLogMiddleware)
 
 # Register all API routers
 app.include_router(upload.router, prefix="/upload", tags=["Upload"])
 app.include_router(query.router, prefix="/query", tags=["Query"])
 app.include_router(document_routes.router, prefix="/docs", tags=["Documents"])
+app.include_router(search.router, prefix="/search", tags=["Search"])
 
 @app.get("/")
 def root():
     return {"message": "✅ Welcome to the Document Theme Chatbot API"}
+
+
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: 503 ("loading" or "failed") until the embedding model and tokenizer are loaded."""
+    status, _ = readiness()
+    body = {"status": status, "components": warmup_status()}
+    return JSONResponse(body, status_code=200 if status == "ready" else 503)
+
+
+def runtime_stats():
+    sidecar = sidecar_client()
+    return {
+        "llm_cache": cache_stats(),
+        "ocr_cache": ocr_cache_stats(),
+        "dedup": dedup_stats(),
+        "llm_scheduler": scheduler_stats(),
+        "query_coalescing": query_flight.stats(),
+        "admission": admission_stats(),
+        "query_log": query_log_stats(),
+        "executors": executor_stats(),
+        "embedding_sidecar": sidecar.call("stats") if sidecar else None,
+    }
+
+
+@app.get("/stats")
+def stats():
+    """Runtime counters for caches and other shared components."""
+    return runtime_stats()
+
+
+# Cache hit rates, queue depths etc. from /stats, as gauges next to the stage histograms
+REGISTRY.register_collector(stats_collector("runtime_stats", runtime_stats))
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text format: stage latency histograms, LLM tokens and /stats gauges."""
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
@@ -0,0 +1,119 @@
+# backend/app/services/admission.py
+
+import math
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Permit:
+    """A slot held by one request. Releasing twice is harmless."""
+
+    def __init__(self, limiter: "AdmissionLimiter"):
+        self._limiter = limiter
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._limiter._release(time.monotonic() - self._started)
+
+
+class AdmissionLimiter:
+    """
+    Bounded concurrency for one route. Up to `max_concurrency` requests run;
+    up to `max_queue` more wait. A full queue answers 429 immediately, and a
+    request that waited `queue_timeout` seconds without a slot gets 503.
+    Both carry a Retry-After estimated from recent service times.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self._avg_service = 1.0  # seconds, exponentially weighted
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained."""
+        backlog = self.waiting + 1
+        return max(1, math.ceil(self._avg_service * backlog / self.max_concurrency))
+
+    def _reject(self, status_code: int, detail: str) -> HTTPException:
+        logger.warning(f"🚦 {self.name}: {detail} (active={self.active}, waiting={self.waiting})")
+        return HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after())}
+        )
+
+    async def acquire(self, timeout: Optional[float] = None) -> Permit:
+        if self._slots.locked() and self.waiting >= self.max_queue:
+            self.rejected_full += 1
+            raise self._reject(429, "Too many requests queued, try again later")
+
+        wait = self.queue_timeout if timeout is None else min(timeout, self.queue_timeout)
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=max(0.0, wait))
+        except asyncio.TimeoutError:
+            self.rejected_timeout += 1
+            raise self._reject(503, "Server busy, no capacity freed up in time")
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        self.admitted += 1
+        return Permit(self)
+
+    def _release(self, held_seconds: float) -> None:
+        self.active -= 1
+        self._avg_service = 0.8 * self._avg_service + 0.2 * held_seconds
+        self._slots.release()
+
+    @asynccontextmanager
+    async def admit(self, timeout: Optional[float] = None):
+        permit = await self.acquire(timeout)
+        try:
+            yield permit
+        finally:
+            permit.release()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_full,
+            "rejected_timeout": self.rejected_timeout,
+            "avg_service_seconds": round(self._avg_service, 3),
+        }
+
+
+query_admission = AdmissionLimiter(
+    "query", settings.QUERY_MAX_CONCURRENCY, settings.QUERY_MAX_QUEUE, settings.ADMISSION_QUEUE_TIMEOUT_SECONDS
+)
+upload_admission = AdmissionLimiter(
+    "upload", settings.UPLOAD_MAX_CONCURRENCY, settings.UPLOAD_MAX_QUEUE, settings.ADMISSION_QUEUE_TIMEOUT_SECONDS
+)
+
+
+def admission_stats() -> Dict[str, Dict[str, float]]:
+    return {"query": query_admission.stats(), "upload": upload_admission.stats()}
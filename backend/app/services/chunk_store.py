@@ -0,0 +1,92 @@
+# backend/app/services/chunk_store.py
+"""
+Chunk text lives in the `chunks` table; the vector store only keeps ids,
+vectors and the metadata used for filtering. Retrieved chunks get their
+text and page range back through an indexed lookup on `chunks.chunk_id`.
+"""
+
+import bisect
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.session import SessionLocal
+from app.db.models import Chunk
+
+logger = logging.getLogger(__name__)
+
+# SQLite allows 999 bound parameters per statement in older builds
+LOOKUP_BATCH = 500
+
+
+def page_range(starts: List[int], pages: List[Optional[int]], start: int, end: int) -> Tuple[Optional[int], Optional[int]]:
+    """First and last page touched by the text span [start, end)."""
+    if not starts:
+        return None, None
+    first = max(0, bisect.bisect_right(starts, start) - 1)
+    last = max(first, bisect.bisect_left(starts, max(start, end)) - 1)
+    return pages[first], pages[last]
+
+
+async def insert_chunks(db: AsyncSession, document_id: int, rows: List[Dict[str, Any]]) -> None:
+    """
+    Bulk-inserts chunk rows (chunk_id, text, start_char, end_char,
+    page_start, page_end, content_hash) in CHUNK_INSERT_BATCH_SIZE
+    transactions, so a large document doesn't hold the write lock for the
+    whole insert.
+    """
+    batch_size = max(1, settings.CHUNK_INSERT_BATCH_SIZE)
+    for i in range(0, len(rows), batch_size):
+        await db.execute(insert(Chunk), [dict(row, document_id=document_id) for row in rows[i:i + batch_size]])
+        await db.commit()
+
+
+def _batches(items: List[str]) -> Iterable[List[str]]:
+    for i in range(0, len(items), LOOKUP_BATCH):
+        yield items[i:i + LOOKUP_BATCH]
+
+
+def lookup_chunks(chunk_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    chunk id -> {"text", "page_start", "page_end"}. A chunk carried over
+    between document versions has a row per version; the newest wins.
+    """
+    ids = list(dict.fromkeys(cid for cid in chunk_ids if cid))
+    if not ids:
+        return {}
+    found: Dict[str, Dict[str, Any]] = {}
+    db = SessionLocal()
+    try:
+        for batch in _batches(ids):
+            rows = db.query(Chunk.chunk_id, Chunk.text, Chunk.page_start, Chunk.page_end) \
+                     .filter(Chunk.chunk_id.in_(batch)) \
+                     .order_by(Chunk.id.desc()) \
+                     .all()
+            for row in rows:
+                found.setdefault(row.chunk_id, {"text": row.text, "page_start": row.page_start, "page_end": row.page_end})
+    finally:
+        db.close()
+    return found
+
+
+def hydrate(docs: List[Any]) -> None:
+    """
+    Fills in page_content and page range of retrieved LangChain documents
+    from the chunks table. Chunks stored before text moved to SQL keep the
+    text the vector store returned.
+    """
+    try:
+        rows = lookup_chunks([doc.metadata.get("chunk_id") for doc in docs])
+    except Exception as e:
+        logger.warning("⚠️ Chunk text lookup failed: %s", e)
+        return
+    for doc in docs:
+        row = rows.get(doc.metadata.get("chunk_id"))
+        if row is None:
+            continue
+        doc.page_content = row["text"]
+        doc.metadata["page_start"] = row["page_start"]
+        doc.metadata["page_end"] = row["page_end"]
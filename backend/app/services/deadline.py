@@ -0,0 +1,59 @@
+# backend/app/services/deadline.py
+
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+
+class Deadline:
+    """A point in time by which a request must be answered."""
+
+    def __init__(self, budget_seconds: Optional[float]):
+        self.budget = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds if budget_seconds else None
+
+    def remaining(self) -> float:
+        if self.expires_at is None:
+            return math.inf
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def allows(self, seconds: float) -> bool:
+        """True if at least `seconds` of budget are left."""
+        return self.remaining() >= seconds
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.3f}s)"
+
+
+NO_DEADLINE = Deadline(None)
+
+# Visible to outbound LLM requests (see llm_scheduler.ScheduledTransport) so
+# queueing, retries and read timeouts never outlive the request budget.
+_current: ContextVar[Optional[Deadline]] = ContextVar("request_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+def set_deadline(deadline: Optional[Deadline]):
+    """Returns a token for `reset_deadline`."""
+    return _current.set(deadline)
+
+
+def reset_deadline(token) -> None:
+    _current.reset(token)
+
+
+@contextmanager
+def use_deadline(deadline: Optional[Deadline]):
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
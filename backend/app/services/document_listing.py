@@ -0,0 +1,164 @@
+# backend/app/services/document_listing.py
+"""
+Keyset-paginated document listing. Only the small columns are loaded (never
+ocr_text/content), pages are found by seeking past the last row of the
+previous page rather than with OFFSET, and results are streamed as JSON.
+"""
+
+import json
+import base64
+import datetime
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import Select, and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+
+from app.db.session import AsyncSessionLocal
+from app.db.models import Document
+
+# Sortable columns; each is indexed (see models.Document)
+SORT_COLUMNS = {
+    "upload_time": Document.upload_time,
+    "filename": Document.filename,
+    "author": Document.author,
+    "doc_type": Document.doc_type,
+    "status": Document.status,
+    "id": Document.id,
+}
+LIST_COLUMNS = (
+    Document.id, Document.filename, Document.author, Document.doc_type,
+    Document.status, Document.upload_time, Document.version,
+)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH = 200
+
+
+class InvalidCursor(ValueError):
+    """The cursor is malformed or was issued for a different sort."""
+
+
+@dataclass(frozen=True)
+class DocumentFilters:
+    status: Optional[str] = None
+    doc_type: Optional[str] = None
+    author: Optional[str] = None
+    uploaded_after: Optional[datetime.datetime] = None
+    uploaded_before: Optional[datetime.datetime] = None
+
+    def apply(self, query: Select) -> Select:
+        if self.status:
+            query = query.filter(Document.status == self.status)
+        if self.doc_type:
+            query = query.filter(Document.doc_type == self.doc_type)
+        if self.author:
+            query = query.filter(Document.author == self.author)
+        if self.uploaded_after:
+            query = query.filter(Document.upload_time >= self.uploaded_after)
+        if self.uploaded_before:
+            query = query.filter(Document.upload_time < self.uploaded_before)
+        return query
+
+
+def _encode_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime.datetime) else value
+
+
+def encode_cursor(sort: str, order: str, value: Any, last_id: int) -> str:
+    raw = json.dumps([sort, order, _encode_value(value), last_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str) -> Tuple[Any, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, cursor_order, value, last_id = json.loads(raw)
+        last_id = int(last_id)
+        if sort == "upload_time" and value is not None:
+            value = datetime.datetime.fromisoformat(value)
+    except Exception:
+        raise InvalidCursor("Malformed cursor")
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise InvalidCursor("Cursor was issued for a different sort order")
+    return value, last_id
+
+
+def _seek(column, value: Any, last_id: int, descending: bool):
+    """
+    Rows strictly after (value, last_id) in the listing order. NULLs sort
+    first ascending and last descending, as in SQLite.
+    """
+    if descending:
+        if value is None:
+            return and_(column.is_(None), Document.id < last_id)
+        return or_(column < value, and_(column == value, Document.id < last_id), column.is_(None))
+    if value is None:
+        return or_(and_(column.is_(None), Document.id > last_id), column.isnot(None))
+    return or_(column > value, and_(column == value, Document.id > last_id))
+
+
+async def count_documents(db: AsyncSession, filters: DocumentFilters) -> int:
+    """Matching rows counted on the id index, without loading any of them."""
+    return (await db.execute(filters.apply(select(func.count(Document.id))))).scalar() or 0
+
+
+def page_query(
+    filters: DocumentFilters,
+    sort: str = "upload_time",
+    order: str = "desc",
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Select:
+    """One page (plus one row, to tell whether there is a next page) of documents."""
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"Unknown sort column '{sort}'. Expected one of: {', '.join(SORT_COLUMNS)}")
+    column = SORT_COLUMNS[sort]
+    descending = order == "desc"
+    query = filters.apply(select(Document).options(load_only(*LIST_COLUMNS)))
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort, order)
+        query = query.filter(_seek(column, value, last_id, descending))
+    if descending:
+        query = query.order_by(column.desc().nulls_last(), Document.id.desc())
+    else:
+        query = query.order_by(column.asc().nulls_first(), Document.id.asc())
+    return query.limit(limit + 1)
+
+
+async def stream_documents(
+    filters: DocumentFilters,
+    serialize: Callable[[Document], Dict[str, Any]],
+    sort: str = "upload_time",
+    order: str = "desc",
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    include_total: bool = True,
+) -> AsyncIterator[str]:
+    """
+    One page as a JSON object written item by item:
+    {"items": [...], "next_cursor": str | null, "total": int | null}.
+    Uses its own session, since it runs after the endpoint has returned;
+    validate the cursor with decode_cursor first to fail before streaming.
+    """
+    async with AsyncSessionLocal() as db:
+        total = await count_documents(db, filters) if include_total else None
+        yield '{"items": ['
+        last: Optional[Document] = None
+        has_more = False
+        query = page_query(filters, sort, order, cursor, limit).execution_options(yield_per=STREAM_BATCH)
+        rows = await db.stream_scalars(query)
+        n = 0
+        async for doc in rows:
+            if n == limit:
+                has_more = True
+                break
+            yield ("," if n else "") + json.dumps(serialize(doc), default=str)
+            last = doc
+            n += 1
+        await rows.close()
+        next_cursor = None
+        if has_more and last is not None:
+            next_cursor = encode_cursor(sort, order, getattr(last, SORT_COLUMNS[sort].key), last.id)
+        yield f'], "next_cursor": {json.dumps(next_cursor)}, "total": {json.dumps(total)}}}'
@@ -0,0 +1,178 @@
+# backend/app/services/executors.py
+
+import asyncio
+import logging
+import threading
+import contextvars
+import multiprocessing
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from app.config import settings
+from app.services.metrics import replay_observations, run_with_timings
+
+logger = logging.getLogger(__name__)
+
+
+class MeteredExecutor:
+    """
+    Wraps an executor with queue-depth counters. Thread pools run each task
+    in a copy of the caller's context (cache bypass, deadline, LLM priority);
+    process pools can't share context, so their tasks get plain arguments,
+    and `run` brings the spans measured in the worker back to this process.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Executor], max_workers: int, copy_context: bool):
+        self.name = name
+        self.max_workers = max_workers
+        self._factory = factory
+        self._executor: Optional[Executor] = None
+        self._copy_context = copy_context
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.running = 0
+
+    def _get(self) -> Executor:
+        # Created on first use so importing the app doesn't spawn workers
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = self._factory()
+                    logger.info(f"🧵 Started {self.name} pool with {self.max_workers} workers")
+        return self._executor
+
+    def _done(self, future: Future) -> None:
+        with self._lock:
+            self.completed += 1
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+
+    def submit(self, fn: Callable, *args: Any) -> Future:
+        if self._copy_context:
+            future = self._get().submit(contextvars.copy_context().run, _counted, self, fn, *args)
+        else:
+            future = self._get().submit(fn, *args)
+        with self._lock:
+            self.submitted += 1
+        future.add_done_callback(self._done)
+        return future
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        """Run `fn(*args)` on the pool and await its result."""
+        if self._copy_context:
+            return await asyncio.wrap_future(self.submit(fn, *args))
+        result, observations = await asyncio.wrap_future(self.submit(run_with_timings, fn, *args))
+        replay_observations(observations)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            in_flight = self.submitted - self.completed
+            stats = {
+                "max_workers": self.max_workers,
+                "queued": max(0, in_flight - self.running) if self._copy_context else None,
+                "running": self.running if self._copy_context else None,
+                "in_flight": in_flight,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+        # Process pools can't report which tasks have started
+        return {k: v for k, v in stats.items() if v is not None}
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def _counted(pool: MeteredExecutor, fn: Callable, *args: Any) -> Any:
+    with pool._lock:
+        pool.running += 1
+    try:
+        return fn(*args)
+    finally:
+        with pool._lock:
+            pool.running -= 1
+
+
+def _process_pool(workers: int) -> Executor:
+    # spawn: forking a parent that already loaded torch/tesseract threads can deadlock
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _cpu_pool() -> MeteredExecutor:
+    workers = settings.CPU_POOL_WORKERS
+    if workers <= 0:
+        # In-process fallback, e.g. for debugging with breakpoints
+        return MeteredExecutor("cpu", lambda: ThreadPoolExecutor(2, thread_name_prefix="cpu"), 2, copy_context=True)
+    return MeteredExecutor("cpu", lambda: _process_pool(workers), workers, copy_context=False)
+
+
+# OCR and embedding: each worker process loads its own embedding model.
+# Results come back to the parent, which alone writes to Chroma and SQL.
+cpu_pool = _cpu_pool()
+
+# Network-bound LLM calls fanned out by the pipeline
+io_pool = MeteredExecutor(
+    "io",
+    lambda: ThreadPoolExecutor(settings.IO_POOL_WORKERS, thread_name_prefix="io"),
+    settings.IO_POOL_WORKERS,
+    copy_context=True
+)
+
+# Blocking query pipeline steps. Kept apart from io_pool because a step may
+# wait on io_pool tasks; one slot per admitted query means it never queues.
+pipeline_pool = MeteredExecutor(
+    "pipeline",
+    lambda: ThreadPoolExecutor(settings.QUERY_MAX_CONCURRENCY, thread_name_prefix="pipeline"),
+    settings.QUERY_MAX_CONCURRENCY,
+    copy_context=True
+)
+
+
+class PipelineSteps:
+    """
+    Advances a blocking pipeline generator on `pool`, one stage per `next()`.
+
+    Cancelling an awaiting `next()` can't interrupt the stage running in the
+    worker thread, and the generator can't be closed while it runs. `close()`
+    therefore never waits: the generator is closed on a worker once the
+    running stage returns, so the pipeline stops at its next stage boundary.
+    """
+
+    def __init__(self, events: Iterator, pool: MeteredExecutor):
+        self._events = events
+        self._pool = pool
+        self._step: Optional[Future] = None
+
+    async def next(self) -> Any:
+        """The next (event, data) pair, or None once the pipeline is done."""
+        self._step = self._pool.submit(next, self._events, None)
+        return await asyncio.wrap_future(self._step)
+
+    def close(self) -> None:
+        step, self._step = self._step, None
+        if step is None:
+            self._close_on_worker()
+        else:
+            # Runs right away if the step is done (or was cancelled before starting)
+            step.add_done_callback(lambda _: self._close_on_worker())
+
+    def _close_on_worker(self) -> None:
+        try:
+            self._pool.submit(self._events.close)
+        except RuntimeError:
+            # Pool already shut down
+            self._events.close()
+
+
+def executor_stats() -> Dict[str, Dict[str, int]]:
+    return {"cpu": cpu_pool.stats(), "io": io_pool.stats(), "pipeline": pipeline_pool.stats()}
+
+
+def shutdown_executors() -> None:
+    for pool in (cpu_pool, io_pool, pipeline_pool):
+        pool.shutdown()
@@ -0,0 +1,97 @@
+# backend/app/services/llm_cache.py
+
+import json
+import hashlib
+import logging
+from contextvars import ContextVar
+from typing import Optional, Any, Dict
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+
+from app.config import settings
+from app.core.disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+# Set per request (see the X-LLM-Cache header in app/api/query.py). Reads are
+# skipped while it is True; fresh completions are still written back.
+_bypass: ContextVar[bool] = ContextVar("llm_cache_bypass", default=False)
+
+# Set in the generation_info of replayed completions, so usage accounting
+# can tell them from calls that reached the provider
+CACHE_HIT = "llm_cache_hit"
+
+_store: Optional[DiskCache] = None
+_bypassed = 0
+
+
+def get_store() -> DiskCache:
+    global _store
+    if _store is None:
+        _store = DiskCache(settings.LLM_CACHE_PATH, max_bytes=settings.LLM_CACHE_MAX_BYTES)
+    return _store
+
+
+def set_cache_bypass(enabled: bool):
+    """Skip cache reads for the current context. Returns a token for `reset_cache_bypass`."""
+    return _bypass.set(enabled)
+
+
+def reset_cache_bypass(token) -> None:
+    _bypass.reset(token)
+
+
+def is_cacheable(temperature: float) -> bool:
+    """Only deterministic (low temperature) completions are worth replaying."""
+    return settings.LLM_CACHE_ENABLED and temperature <= settings.LLM_CACHE_MAX_TEMPERATURE
+
+
+class CompletionCache(BaseCache):
+    """
+    LangChain cache backed by the shared on-disk store.
+
+    Keys are (provider, model, temperature, sha256(llm_string + prompt)), so
+    two models or two sampling settings never share an entry.
+    """
+
+    def __init__(self, provider: str, model: str, temperature: float):
+        self.provider = provider
+        self.model = model
+        self.temperature = temperature
+
+    def _key(self, prompt: str, llm_string: str) -> str:
+        digest = hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+        return f"{self.provider}:{self.model}:{self.temperature}:{digest}"
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        global _bypassed
+        if _bypass.get():
+            _bypassed += 1
+            return None
+        raw = get_store().get(self._key(prompt, llm_string))
+        if raw is None:
+            return None
+        try:
+            generations = [loads(g) for g in json.loads(raw)]
+        except Exception as e:
+            logger.warning(f"⚠️ Discarding unreadable LLM cache entry: {e}")
+            return None
+        for g in generations:
+            g.generation_info = {**(g.generation_info or {}), CACHE_HIT: True}
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        payload = json.dumps([dumps(g) for g in return_val]).encode("utf-8")
+        get_store().set(self._key(prompt, llm_string), payload)
+
+    def clear(self, **kwargs: Any) -> None:
+        get_store().clear()
+
+
+def cache_stats() -> Dict[str, Any]:
+    stats = get_store().stats()
+    stats["bypassed"] = _bypassed
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
@@ -0,0 +1,220 @@
+# backend/app/services/llm_providers.py
+
+import re
+import json
+import time
+import hashlib
+import logging
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Callable
+from uuid import UUID
+
+from langchain_core.caches import BaseCache
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult, LLMResult
+
+from app.config import settings
+from app.services.llm_cache import CACHE_HIT
+from app.services.llm_scheduler import get_http_client, estimate_tokens
+from app.services.metrics import LLM_CALLS, LLM_TOKENS
+
+logger = logging.getLogger(__name__)
+
+
+def build_groq(model: str, temperature: float, cache: Optional[BaseCache]) -> BaseChatModel:
+    from langchain_groq import ChatGroq
+
+    if not settings.GROQ_API_KEY:
+        raise ValueError("GROQ_API_KEY is not set in the environment.")
+    # Retries and rate limiting are handled by the shared scheduler transport
+    return ChatGroq(
+        api_key=settings.GROQ_API_KEY,
+        model_name=model,
+        temperature=temperature,
+        cache=cache,
+        http_client=get_http_client(),
+        max_retries=0
+    )
+
+
+def build_openai_compatible(model: str, temperature: float, cache: Optional[BaseCache]) -> BaseChatModel:
+    """Any server speaking the OpenAI chat API: vLLM, llama.cpp, Ollama, LM Studio..."""
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        base_url=settings.LLM_BASE_URL,
+        api_key=settings.LLM_API_KEY or "not-needed",
+        model=model,
+        temperature=temperature,
+        cache=cache,
+        http_client=get_http_client(),
+        max_retries=0
+    )
+
+
+def build_fake(model: str, temperature: float, cache: Optional[BaseCache]) -> BaseChatModel:
+    return FakeChatModel(
+        model_name=model,
+        latency_ms=settings.FAKE_LLM_LATENCY_MS,
+        tokens_per_second=settings.FAKE_LLM_TOKENS_PER_SECOND,
+        cache=cache
+    )
+
+
+# provider name -> (factory, default model)
+PROVIDERS: Dict[str, tuple] = {
+    "groq": (build_groq, settings.GROQ_MODEL),
+    "openai": (build_openai_compatible, "local-model"),
+    "fake": (build_fake, "fake-deterministic"),
+}
+
+
+def provider_model(provider: str) -> str:
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown LLM_PROVIDER '{provider}'. Expected one of: {', '.join(PROVIDERS)}")
+    return settings.LLM_MODEL or PROVIDERS[provider][1]
+
+
+def build_chat_model(provider: str, temperature: float, cache: Optional[BaseCache] = None) -> BaseChatModel:
+    model = provider_model(provider)
+    factory: Callable = PROVIDERS[provider][0]
+    logger.debug("[build_chat_model] provider=%s model=%s temperature=%s", provider, model, temperature)
+    chat_model = factory(model, temperature, cache)
+    chat_model.callbacks = [UsageCallback(provider)]
+    return chat_model
+
+
+class UsageCallback(BaseCallbackHandler):
+    """
+    Counts completions and tokens per provider for /metrics. Uses the usage
+    the provider reports; otherwise (fake model, some streams) estimates it.
+    Completions replayed from the LLM cache cost nothing and are skipped;
+    they show up in the cache's own hit count.
+    """
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self._prompt_estimates: Dict[UUID, int] = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[BaseMessage]],
+                            *, run_id: UUID, **kwargs: Any) -> None:
+        self._prompt_estimates[run_id] = sum(estimate_tokens(_prompt_text(batch)) for batch in messages)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        estimate = self._prompt_estimates.pop(run_id, None)
+        generations = [g for batch in response.generations for g in batch]
+        if generations and all((g.generation_info or {}).get(CACHE_HIT) for g in generations):
+            return
+        LLM_CALLS.inc(provider=self.provider, outcome="ok")
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt, completion = usage.get("prompt_tokens"), usage.get("completion_tokens")
+        if prompt is None:
+            reported = [getattr(getattr(g, "message", None), "usage_metadata", None) for g in generations]
+            if reported and all(reported):
+                prompt = sum(u.get("input_tokens", 0) for u in reported)
+                completion = sum(u.get("output_tokens", 0) for u in reported)
+        if prompt is not None:
+            LLM_TOKENS.inc(prompt, provider=self.provider, direction="prompt", source="reported")
+            LLM_TOKENS.inc(completion or 0, provider=self.provider, direction="completion", source="reported")
+            return
+        if estimate is not None:
+            LLM_TOKENS.inc(estimate, provider=self.provider, direction="prompt", source="estimated")
+        LLM_TOKENS.inc(sum(estimate_tokens(g.text) for g in generations),
+                       provider=self.provider, direction="completion", source="estimated")
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._prompt_estimates.pop(run_id, None)
+        LLM_CALLS.inc(provider=self.provider, outcome="error")
+
+
+# ---- Offline deterministic provider ----
+
+_JSON_TEMPLATE = re.compile(r"\{\{?\s*(\"\w+\"\s*:.*?)\}\}?", re.DOTALL)
+_JSON_KEY = re.compile(r"\"(\w+)\"\s*:\s*(\[|\")")
+_WORD = re.compile(r"[A-Za-z][A-Za-z\-]{3,}")
+
+
+def _top_terms(text: str, n: int = 5) -> List[str]:
+    counts = Counter(w.lower() for w in _WORD.findall(text))
+    return [w for w, _ in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))[:n]]
+
+
+def fake_completion(prompt: str) -> str:
+    """
+    Deterministic response for a prompt. If the prompt contains a JSON
+    example such as `{ "answer": "...", "citation": "..." }` the reply is a
+    JSON object with the same keys (lists where the example shows a list);
+    otherwise it is a short text followed by one term per line.
+    """
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+    terms = _top_terms(_JSON_TEMPLATE.sub(" ", prompt)) or ["document"]
+
+    templates = _JSON_TEMPLATE.findall(prompt)
+    if templates:
+        reply: Dict[str, Any] = {}
+        for key, opener in _JSON_KEY.findall(templates[-1]):
+            if opener == "[":
+                reply[key] = [f"{term} ({digest})" for term in terms[:3]]
+            else:
+                reply[key] = f"{key} about {', '.join(terms[:3])} ({digest})"
+        return json.dumps(reply)
+
+    lines = [f"Based on the provided text ({digest}), the key points concern {', '.join(terms[:3])}."]
+    lines += [f"- {term}" for term in terms]
+    return "\n".join(lines)
+
+
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(str(m.content) for m in messages)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline stand-in for a hosted chat model. Replies are a pure function of
+    the prompt, and `latency_ms` / `tokens_per_second` emulate time to first
+    token and generation speed so the rest of the pipeline can be measured
+    without network access.
+    """
+
+    model_name: str = "fake-deterministic"
+    latency_ms: float = 0.0
+    tokens_per_second: float = 0.0  # 0 = emit everything at once
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-deterministic"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {
+            "model_name": self.model_name,
+            "latency_ms": self.latency_ms,
+            "tokens_per_second": self.tokens_per_second,
+        }
+
+    def _tokens(self, messages: List[BaseMessage]) -> List[str]:
+        return re.findall(r"\S+\s*", fake_completion(_prompt_text(messages)))
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        tokens = self._tokens(messages)
+        delay = self.latency_ms / 1000.0
+        if self.tokens_per_second > 0:
+            delay += len(tokens) / self.tokens_per_second
+        if delay > 0:
+            time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000.0)
+        for token in self._tokens(messages):
+            if self.tokens_per_second > 0:
+                time.sleep(1.0 / self.tokens_per_second)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
@@ -0,0 +1,291 @@
+# backend/app/services/llm_scheduler.py
+
+import time
+import heapq
+import logging
+import itertools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any
+
+import httpx
+from tenacity import (
+    Retrying,
+    retry_if_exception_type,
+    retry_if_result,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from app.config import settings
+from app.services.deadline import current_deadline
+
+logger = logging.getLogger(__name__)
+
+# Priority classes: lower values are served first when callers are queued.
+INTERACTIVE = 0   # the answer a user is waiting on
+STANDARD = 1      # per-document extraction rows
+BACKGROUND = 2    # themes, synthesis, labelling
+
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+_priority: ContextVar[int] = ContextVar("llm_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def llm_priority(priority: int):
+    """Run the LLM calls made inside this block at the given priority class."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `per_minute / 60` per second."""
+
+    def __init__(self, per_minute: float):
+        self.unlimited = per_minute <= 0
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens are available (0 if they are now)."""
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        if not self.unlimited:
+            self._refill(now)
+            self.level -= min(amount, self.capacity)
+
+    def sync(self, remaining: float, now: float) -> None:
+        """Never believe we have more budget than the provider says is left."""
+        if not self.unlimited:
+            self._refill(now)
+            self.level = min(self.level, remaining)
+
+
+class LLMScheduler:
+    """
+    Admits outbound LLM requests against requests-per-minute and
+    tokens-per-minute budgets. Waiting callers are served strictly by
+    (priority, arrival order), so background work never overtakes an
+    interactive answer.
+
+    Budgets are per process: with N workers, configure each with 1/N of the
+    provider quota.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._cond = threading.Condition()
+        self._waiting: list = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self.admitted = 0
+        self.retries = 0
+        self.throttled = 0
+        self.expired = 0
+        self.wait_seconds = 0.0
+
+    def acquire(self, priority: int, tokens: int, timeout: Optional[float] = None) -> bool:
+        """Blocks until admitted. Returns False if `timeout` seconds pass first."""
+        ticket = (priority, next(self._seq))
+        started = time.monotonic()
+        give_up = started + timeout if timeout is not None else None
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if give_up is not None and now >= give_up:
+                        self.expired += 1
+                        return False
+                    wait = 1.0
+                    if self._waiting[0] == ticket:
+                        wait = max(
+                            self._paused_until - now,
+                            self.requests.delay(1, now),
+                            self.tokens.delay(tokens, now),
+                        )
+                        if wait <= 0:
+                            self.requests.take(1, now)
+                            self.tokens.take(tokens, now)
+                            self.admitted += 1
+                            self.wait_seconds += now - started
+                            return True
+                    if give_up is not None:
+                        wait = min(wait, give_up - now)
+                    self._cond.wait(timeout=wait)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+    def cool_down(self, seconds: float) -> None:
+        """Hold every queued caller back, e.g. after a 429 with Retry-After."""
+        with self._cond:
+            self.throttled += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def observe(self, headers: httpx.Headers) -> None:
+        """Align local budgets with the provider's x-ratelimit-remaining-* headers."""
+        now = time.monotonic()
+        with self._cond:
+            for name, bucket in (("x-ratelimit-remaining-requests", self.requests),
+                                 ("x-ratelimit-remaining-tokens", self.tokens)):
+                value = headers.get(name)
+                if value is not None:
+                    try:
+                        bucket.sync(float(value), now)
+                    except ValueError:
+                        pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            waiting = {"interactive": 0, "standard": 0, "background": 0}
+            names = {INTERACTIVE: "interactive", STANDARD: "standard", BACKGROUND: "background"}
+            for priority, _ in self._waiting:
+                waiting[names.get(priority, "background")] += 1
+            return {
+                "admitted": self.admitted,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "expired": self.expired,
+                "waiting": waiting,
+                "avg_wait_seconds": round(self.wait_seconds / self.admitted, 4) if self.admitted else 0.0,
+            }
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) without loading a tokenizer."""
+    return len(text) // 4 + 1
+
+
+def _request_tokens(request: httpx.Request) -> int:
+    body = request.content or b""
+    return len(body) // 4 + settings.LLM_EXPECTED_OUTPUT_TOKENS
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class ScheduledTransport(httpx.BaseTransport):
+    """
+    httpx transport placed under every provider SDK client.
+
+    Only requests that actually leave the process pass through here, so
+    completions served from the LLM cache cost no budget. Retryable statuses
+    and connection errors are retried with jittered exponential backoff; each
+    attempt is admitted by the scheduler again. When the calling request has
+    a deadline, queueing, retries and the read timeout are all bounded by it.
+    """
+
+    def __init__(self, scheduler: LLMScheduler, inner: httpx.BaseTransport):
+        self.scheduler = scheduler
+        self.inner = inner
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        tokens = _request_tokens(request)
+        priority = _priority.get()
+        deadline = current_deadline()
+
+        def send() -> httpx.Response:
+            if deadline is not None:
+                if not self.scheduler.acquire(priority, tokens, timeout=deadline.remaining()):
+                    raise httpx.PoolTimeout("Request budget exhausted while waiting for LLM capacity", request=request)
+                timeouts = dict(request.extensions.get("timeout") or {})
+                timeouts["read"] = min(timeouts.get("read") or deadline.remaining(), deadline.remaining())
+                request.extensions["timeout"] = timeouts
+            else:
+                self.scheduler.acquire(priority, tokens)
+            response = self.inner.handle_request(request)
+            self.scheduler.observe(response.headers)
+            if response.status_code in RETRY_STATUSES:
+                pause = _retry_after(response)
+                if response.status_code == 429:
+                    self.scheduler.cool_down(pause if pause is not None else 1.0)
+            return response
+
+        def before_sleep(state) -> None:
+            self.scheduler.retries += 1
+            if state.outcome.failed:
+                logger.warning(f"⚠️ LLM request failed ({state.outcome.exception()}), retrying")
+            else:
+                response = state.outcome.result()
+                logger.warning(f"⚠️ LLM request returned {response.status_code}, retrying")
+                response.close()
+
+        backoff = wait_random_exponential(multiplier=settings.LLM_RETRY_BASE_SECONDS,
+                                          max=settings.LLM_RETRY_MAX_SECONDS)
+
+        def wait(state) -> float:
+            delay = backoff(state)
+            return min(delay, deadline.remaining()) if deadline is not None else delay
+
+        retrying = Retrying(
+            retry=retry_if_result(lambda r: r.status_code in RETRY_STATUSES)
+            | retry_if_exception_type(httpx.TransportError),
+            wait=wait,
+            stop=stop_after_attempt(settings.LLM_RETRY_ATTEMPTS)
+            | (lambda state: deadline is not None and deadline.expired()),
+            before_sleep=before_sleep,
+            # Out of attempts: hand the last response to the SDK so it raises its usual error
+            retry_error_callback=lambda state: state.outcome.result(),
+        )
+        return retrying(send)
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+_scheduler: Optional[LLMScheduler] = None
+_http_client: Optional[httpx.Client] = None
+_init_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    global _scheduler
+    with _init_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler(settings.LLM_REQUESTS_PER_MINUTE, settings.LLM_TOKENS_PER_MINUTE)
+        return _scheduler
+
+
+def get_http_client() -> httpx.Client:
+    """Pooled HTTP client shared by every LLM provider client in the process."""
+    global _http_client
+    scheduler = get_scheduler()
+    with _init_lock:
+        if _http_client is None:
+            limits = httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_CONNECTIONS,
+            )
+            _http_client = httpx.Client(
+                transport=ScheduledTransport(scheduler, httpx.HTTPTransport(limits=limits)),
+                timeout=httpx.Timeout(settings.LLM_TIMEOUT_SECONDS, connect=10.0),
+            )
+        return _http_client
+
+
+def scheduler_stats() -> Dict[str, Any]:
+    return get_scheduler().stats()
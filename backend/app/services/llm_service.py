@@ -1,49 +1,70 @@
 # backend/app/services/llm_service.py
 
-import os
 import json
+import math
+import time
 import logging
-from typing import Dict, List, Any
+import threading
+from concurrent.futures import as_completed, TimeoutError as FuturesTimeout
+from typing import TYPE_CHECKING, Dict, List, Any, Iterator, Tuple, Optional
 
-from langchain.chains import RetrievalQA, LLMChain
-from langchain.prompts import PromptTemplate
-from langchain_groq import ChatGroq
-from langchain.vectorstores.base import VectorStoreRetriever
+from langchain_core.prompts import PromptTemplate
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.documents import Document as LangDocument
 
 from app.services.vector_store import load_vector_store
+from app.config import settings
+from app.services.llm_cache import CompletionCache, is_cacheable
+from app.services.llm_scheduler import llm_priority, STANDARD, BACKGROUND
+from app.services.llm_providers import build_chat_model, provider_model
+from app.services.theme_service import themes_for_chunks
+from app.services.summary_service import is_overview_question, load_summaries, relevant_summaries, format_summaries
+from app.services.retrieval import retrieve, highlight_hits
+from app.services.deadline import Deadline, NO_DEADLINE, use_deadline
+from app.services.executors import io_pool
+from app.core.dedup import get_dedup_index
+from app.services.chunk_store import lookup_chunks
+from app.services.metrics import collect_timings, record_stage, span
+from app.logging_config import PAYLOAD
+
+if TYPE_CHECKING:
+    from langchain.chains import LLMChain
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-_cached_llm: ChatGroq = None
+_cached_llms: Dict[float, BaseChatModel] = {}
+_doc_qa_chain: Optional["LLMChain"] = None
+_synth_chain: Optional["LLMChain"] = None
+
+LLM_PROVIDER = settings.LLM_PROVIDER
+LLM_TEMPERATURE = settings.LLM_TEMPERATURE
 
-LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq").lower()
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_MODEL = os.getenv("GROQ_MODEL", "llama3-8b-8192")
+# Extraction, theme and synthesis stages should give the same output for the
+# same input, which also lets them be replayed from the completion cache.
+DETERMINISTIC_TEMPERATURE = 0.0
 
 MAX_INPUT_TOKENS = 512
-MAX_THEME_TOKENS = 256
+
+# Minimum remaining budget (seconds) for an optional stage to be worth starting.
+# Per-document rows stop early enough to leave SYNTHESIS_MIN_SECONDS for synthesis.
+ANSWER_MIN_SECONDS = 1.0
+DOC_ROWS_MIN_SECONDS = 1.0
+SYNTHESIS_MIN_SECONDS = 2.0
 
 def truncate_text(text: str, max_tokens: int = MAX_INPUT_TOKENS) -> str:
     words = text.split()
     return ' '.join(words[:max_tokens])
 
-def get_llm() -> ChatGroq:
-    global _cached_llm
-    if _cached_llm:
-        return _cached_llm
+def get_llm(temperature: float = LLM_TEMPERATURE) -> BaseChatModel:
+    if temperature in _cached_llms:
+        return _cached_llms[temperature]
 
-    if not GROQ_API_KEY:
-        raise ValueError("GROQ_API_KEY is not set in the environment.")
-
-    logger.debug(f"[get_llm] Using Groq model: {GROQ_MODEL}")
-    _cached_llm = ChatGroq(
-        api_key=GROQ_API_KEY,
-        model_name=GROQ_MODEL,
-        temperature=0.7
-    )
-    return _cached_llm
+    model = provider_model(LLM_PROVIDER)
+    cache = CompletionCache(LLM_PROVIDER, model, temperature) if is_cacheable(temperature) else None
+    logger.debug("[get_llm] Using %s model: %s (temperature=%s, cached=%s)",
+                 LLM_PROVIDER, model, temperature, cache is not None)
+    _cached_llms[temperature] = build_chat_model(LLM_PROVIDER, temperature, cache)
+    return _cached_llms[temperature]
 
 # Prompts and Chains
 doc_qa_prompt = PromptTemplate(
@@ -60,7 +81,16 @@ Give:
 Respond in JSON: {{ "answer": "...", "citation": "..." }}
 '''
 )
-doc_qa_chain = LLMChain(llm=get_llm(), prompt=doc_qa_prompt)
+
+def get_doc_qa_chain() -> "LLMChain":
+    # Built on first use so importing this module needs no provider credentials
+    # (and doesn't pay for importing langchain.chains)
+    from langchain.chains import LLMChain
+
+    global _doc_qa_chain
+    if _doc_qa_chain is None:
+        _doc_qa_chain = LLMChain(llm=get_llm(DETERMINISTIC_TEMPERATURE), prompt=doc_qa_prompt)
+    return _doc_qa_chain
 
 synth_prompt = PromptTemplate(
     input_variables=["findings_list"],
@@ -72,45 +102,212 @@ Findings:
 Return a markdown summary grouped by theme.
 '''
 )
-synth_chain = LLMChain(llm=get_llm(), prompt=synth_prompt)
+
+def get_synth_chain() -> "LLMChain":
+    from langchain.chains import LLMChain
+
+    global _synth_chain
+    if _synth_chain is None:
+        _synth_chain = LLMChain(llm=get_llm(DETERMINISTIC_TEMPERATURE), prompt=synth_prompt)
+    return _synth_chain
+
+# Same wording as LangChain's "stuff" QA prompt, built by hand so the answer
+# can be streamed token by token.
+answer_prompt = PromptTemplate(
+    input_variables=["context", "question"],
+    template='''Use the following pieces of context to answer the question at the end. If you don't know the answer, just say that you don't know, don't try to make up an answer.
+
+{context}
+
+Question: {question}
+Helpful Answer:'''
+)
+
+summary_synth_prompt = PromptTemplate(
+    input_variables=["question", "documents", "findings_list"],
+    template='''Answer the question across the documents below using their summaries and the extracted findings. Group documents by theme and refer to them by ID.
+
+Question: {question}
+
+Documents:
+{documents}
+
+Findings:
+{findings_list}
+
+Return a markdown summary grouped by theme.
+'''
+)
+
+overview_prompt = PromptTemplate(
+    input_variables=["question", "documents"],
+    template='''You are given summaries of every document in a collection.
+
+{documents}
+
+Using only these summaries, answer: {question}
+Group the documents by topic and mention each one by filename.'''
+)
+
+# Latency tiers. Targets are p95 on a warm worker; see docs/api_reference.md
+# and benchmarks/bench_query_modes.py.
+QUERY_MODES = {
+    "fast": "Ranked chunks with extractive sentence highlights, no LLM calls (target < 300 ms)",
+    "standard": "One LLM answer with citations (target < 3 s)",
+    "full": "Answer, per-document table and cross-document synthesis (target < 15 s)",
+}
+
+# Cap on documents used to answer corpus-overview questions
+OVERVIEW_MAX_DOCUMENTS = 50
 
 # Main method
-def generate_answer(vector_store_path: str, question: str) -> Dict[str, Any]:
-    logger.debug(f"[generate_answer] Received question: {question}")
+def generate_answer(
+    vector_store_path: str,
+    question: str,
+    mode: str = "full",
+    top_k: Optional[int] = None,
+    deadline: Optional[Deadline] = None
+) -> Dict[str, Any]:
+    """
+    Run the pipeline and collect its events into a single response dict,
+    with milliseconds per stage under "stage_timings".
+    """
+    result = empty_result()
+    with use_deadline(deadline), collect_timings() as timings:
+        for event, data in iter_answer_events(vector_store_path, question, stream_tokens=False,
+                                              mode=mode, top_k=top_k, deadline=deadline):
+            if event == "error":
+                result = fallback_answer(data)
+                break
+            collect_event(result, event, data)
+    result["stage_timings"] = timings.as_ms()
+    return result
+
+def empty_result() -> Dict[str, Any]:
+    result = fallback_answer("")
+    result["answer"] = ""
+    result["hits"] = []
+    result["degraded"] = []
+    result["stage_timings"] = {}
+    return result
+
+def collect_event(result: Dict[str, Any], event: str, data: Any) -> None:
+    """Fold one pipeline event into a response dict built by `empty_result`."""
+    if event == "citations":
+        result["citations"] = data
+    elif event == "answer":
+        result["answer"] = data
+    elif event == "doc_row":
+        result["doc_table"].append(data)
+    elif event == "themes":
+        result["themes"] = data
+    elif event == "summary":
+        result["synthesized_summary"] = data
+    elif event == "hits":
+        result["hits"] = data
+    elif event == "degraded":
+        result["degraded"].append(data)
+
+
+def duplicate_citations(citations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Citations for the other documents containing a cited passage: near-
+    duplicate chunks are stored once at ingest (app/core/dedup.py), so the
+    retriever only ever returns the canonical copy. Each duplicate's own
+    text and pages come from the chunks table.
+    """
     try:
-        db = load_vector_store(vector_store_path)
-        try:
-            count = db._collection.count()
-            logger.debug(f"[generate_answer] Vector store contains {count} vectors")
-        except Exception:
-            pass
+        dedup = get_dedup_index()
+        refs = dedup.refs_for([c["chunk_id"] for c in citations]) if dedup else {}
+        refs = {cid: [json.loads(raw) for raw in raws] for cid, raws in refs.items()}
+        rows = lookup_chunks([md.get("chunk_id") for mds in refs.values() for md in mds])
     except Exception as e:
-        logger.error(f"[generate_answer] Failed to load vector store: {e}")
-        return fallback_answer("Vector store could not be loaded.")
+        logger.warning("[generate_answer] Duplicate chunk lookup failed: %s", e)
+        return []
+    extra: List[Dict[str, Any]] = []
+    for citation in citations:
+        for md in refs.get(citation["chunk_id"], []):
+            row = rows.get(md.get("chunk_id"), {})
+            extra.append({
+                "doc_id": md.get("doc_id"),
+                "chunk_id": md.get("chunk_id"),
+                "start_char": md.get("start"),
+                "end_char": md.get("end"),
+                "page_start": row.get("page_start"),
+                "page_end": row.get("page_end"),
+                "snippet": row["text"][:200] if row else citation["snippet"],
+                "duplicate_of": citation["chunk_id"]
+            })
+    return extra
+
+
+def iter_answer_events(
+    vector_store_path: str,
+    question: str,
+    stream_tokens: bool = True,
+    mode: str = "full",
+    top_k: Optional[int] = None,
+    deadline: Optional[Deadline] = None
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Yields (event, data) pairs as each stage of the pipeline completes.
+    An "error" event ends the stream early. Stages per mode (see QUERY_MODES):
+
+    - fast:     citations, themes, hits
+    - standard: citations, themes, token*, answer
+    - full:     citations, themes, token*, answer, doc_row*, summary
+
+    With a `deadline`, stages that no longer fit in the remaining budget are
+    skipped or cut short and reported as "degraded" events naming the stage
+    (answer, doc_table, summary); everything produced so far is still sent.
+    Outbound LLM requests are bounded by the deadline only if the caller also
+    installs it with `use_deadline` (generate_answer does).
+    """
+    if mode not in QUERY_MODES:
+        raise ValueError(f"Unknown query mode '{mode}'. Expected one of: {', '.join(QUERY_MODES)}")
+    deadline = deadline or NO_DEADLINE
+    logger.debug("[generate_answer] Received question: %s", question)
+    if mode != "fast" and is_overview_question(question):
+        try:
+            with span("query.summaries"):
+                summaries = relevant_summaries(question, OVERVIEW_MAX_DOCUMENTS)
+        except Exception as e:
+            logger.warning("[generate_answer] Loading document summaries failed: %s", e)
+            summaries = []
+        if summaries:
+            with span("query.answer"):
+                yield from iter_overview_events(question, summaries, stream_tokens, deadline)
+            return
 
     try:
-        retriever: VectorStoreRetriever = db.as_retriever(search_kwargs={"k": 4})
-        docs = retriever.get_relevant_documents(question)
-        logger.debug(f"[generate_answer] Retrieved {len(docs)} documents")
-        for i, doc in enumerate(docs):
-            snippet = doc.page_content[:80].replace("\n", " ")
-            logger.debug(f"  Doc {i}: id={doc.metadata.get('doc_id')} snippet='{snippet}'")
-        if not docs:
-            return fallback_answer("No relevant documents found.")
+        with span("query.load_store"):
+            db = load_vector_store(vector_store_path)
+        if logger.isEnabledFor(logging.DEBUG):
+            try:
+                logger.debug("[generate_answer] Vector store contains %d vectors", db._collection.count())
+            except Exception:
+                pass
     except Exception as e:
-        logger.error(f"[generate_answer] Retriever error: {e}")
-        return fallback_answer("Failed to retrieve relevant documents.")
+        logger.error("[generate_answer] Failed to load vector store: %s", e)
+        yield "error", "Vector store could not be loaded."
+        return
 
     try:
-        llm = get_llm()
-        qa_chain = RetrievalQA.from_chain_type(llm=llm, chain_type="stuff", retriever=retriever)
-        answer = qa_chain.run(question)
-        logger.debug(f"[generate_answer] QA chain returned: {answer!r}")
-        if not answer:
-            answer = "No answer could be generated."
+        with span("query.retrieval"):
+            scored_docs = retrieve(db, question, top_k)
+        docs = [doc for doc, _ in scored_docs]
+        logger.debug("[generate_answer] Retrieved %d documents", len(docs))
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, doc in enumerate(docs):
+                logger.debug("  Doc %d: id=%s snippet='%s'", i, doc.metadata.get("doc_id"),
+                             doc.page_content[:80].replace("\n", " "), extra=PAYLOAD)
     except Exception as e:
-        logger.error(f"[generate_answer] LLM generation failed: {e}", exc_info=True)
-        return fallback_answer("Failed to generate answer.")
+        logger.error("[generate_answer] Retriever error: %s", e)
+        yield "error", "Failed to retrieve relevant documents."
+        return
+    if not docs:
+        yield "error", "No relevant documents found."
+        return
 
     citations: List[Dict[str, Any]] = []
     for i, chunk in enumerate(docs):
@@ -120,30 +317,166 @@ def generate_answer(vector_store_path: str, question: str) -> Dict[str, Any]:
             "chunk_id": md.get("chunk_id", f"chunk_{i}"),
             "start_char": md.get("start"),
             "end_char": md.get("end"),
+            "page_start": md.get("page_start"),
+            "page_end": md.get("page_end"),
             "snippet": chunk.page_content[:200]
         })
+    with span("query.duplicates"):
+        citations.extend(duplicate_citations(citations))
+    yield "citations", citations
 
+    # Themes come from the corpus clusters of the retrieved chunks: no LLM call
     try:
-        themes = identify_themes(answer)
-        logger.debug(f"[generate_answer] Identified themes: {themes}")
+        with span("query.themes"):
+            themes = themes_for_chunks([doc.metadata for doc in docs])
+        logger.debug("[generate_answer] Identified themes: %s", themes)
     except Exception as e:
-        logger.warning(f"[generate_answer] Theme extraction failed: {e}")
+        logger.warning("[generate_answer] Theme lookup failed: %s", e)
         themes = []
+    yield "themes", themes
+
+    if mode == "fast":
+        try:
+            with span("query.highlight"):
+                hits = highlight_hits(question, scored_docs)
+        except Exception as e:
+            logger.warning("[generate_answer] Sentence highlighting failed: %s", e)
+            hits = [{"doc_id": d.metadata.get("doc_id"), "chunk_id": d.metadata.get("chunk_id"),
+                     "filename": d.metadata.get("filename"), "score": round(float(sc), 4),
+                     "snippet": d.page_content[:200], "highlights": []} for d, sc in scored_docs]
+        yield "hits", hits
+        return
+
+    remaining_stages = ["doc_table", "summary"] if mode == "full" else []
+    if not deadline.allows(ANSWER_MIN_SECONDS):
+        for stage in ["answer"] + remaining_stages:
+            yield "degraded", stage
+        yield "answer", ""
+        return
+
+    prompt = answer_prompt.format(
+        context="\n\n".join(doc.page_content for doc in docs),
+        question=question
+    )
+    with span("query.answer"):
+        answer = yield from iter_llm_answer(prompt, stream_tokens, deadline)
+    if answer is None or mode == "standard":
+        return
 
+    # Documents summarized at ingest cost no per-document LLM call: their rows
+    # are each passage's best-matching sentence and synthesis reads the
+    # summaries. Per-document QA only runs for documents not summarized yet.
+    doc_uids = list(dict.fromkeys(doc.metadata.get("doc_id") for doc in docs if doc.metadata.get("doc_id")))
     try:
-        doc_answers = qa_per_document(docs, question)
-        summary = synthesize_findings(doc_answers)
+        with span("query.summaries"):
+            summaries = load_summaries(doc_uids)
     except Exception as e:
-        logger.warning(f"[generate_answer] Per-document QA or synthesis failed: {e}")
-        doc_answers, summary = [], ""
+        logger.warning("[generate_answer] Loading document summaries failed: %s", e)
+        summaries = []
+    summarized = {s["doc_id"] for s in summaries}
+    summarized_docs = [(doc, score) for doc, score in scored_docs if doc.metadata.get("doc_id") in summarized]
+    unsummarized = [doc for doc in docs if doc.metadata.get("doc_id") not in summarized]
 
-    return {
-        "answer": answer,
-        "citations": citations,
-        "themes": themes,
-        "doc_table": doc_answers,
-        "synthesized_summary": summary
-    }
+    doc_answers: List[Dict[str, Any]] = []
+    if summarized_docs:
+        try:
+            with span("query.extractive_rows", documents=len(summarized_docs)):
+                rows = extractive_rows(question, summarized_docs)
+        except Exception as e:
+            logger.warning("[generate_answer] Extractive rows failed, asking the LLM instead: %s", e)
+            rows, unsummarized = [], docs
+        for row in rows:
+            doc_answers.append(row)
+            yield "doc_row", row
+    if unsummarized and deadline.allows(DOC_ROWS_MIN_SECONDS):
+        try:
+            with span("query.qa_per_document", documents=len(unsummarized)):
+                for row in iter_qa_per_document(unsummarized, question, deadline):
+                    doc_answers.append(row)
+                    yield "doc_row", row
+        except Exception as e:
+            logger.warning("[generate_answer] Per-document QA failed: %s", e)
+    if len(doc_answers) < len(docs):
+        yield "degraded", "doc_table"
+
+    if not deadline.allows(SYNTHESIS_MIN_SECONDS):
+        yield "degraded", "summary"
+        yield "summary", ""
+        return
+
+    with span("query.synthesis"):
+        if summaries:
+            summary = synthesize_from_summaries(question, summaries, doc_answers)
+        else:
+            summary = synthesize_findings(doc_answers) if doc_answers else ""
+    yield "summary", summary
+
+def iter_llm_answer(
+    prompt: str,
+    stream_tokens: bool,
+    deadline: Deadline = NO_DEADLINE
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Generates the interactive answer for `prompt`, yielding "token" events
+    when streaming and then "answer" (or "error"). Returns the answer text,
+    or None on failure, to the delegating generator. Running out of budget
+    is not a failure: whatever was generated is kept and the answer stage is
+    reported as degraded.
+    """
+    parts = []
+    started = time.perf_counter()
+    try:
+        llm = get_llm()
+        if stream_tokens:
+            for chunk in llm.stream(prompt):
+                if chunk.content:
+                    if not parts:
+                        record_stage("query.first_token", time.perf_counter() - started)
+                    parts.append(chunk.content)
+                    yield "token", chunk.content
+                if deadline.expired():
+                    logger.warning("[generate_answer] Budget exhausted while streaming; answer truncated")
+                    yield "degraded", "answer"
+                    break
+            answer = "".join(parts)
+        else:
+            answer = llm.invoke(prompt).content
+        logger.debug("[generate_answer] QA chain returned: %r", answer, extra=PAYLOAD)
+        if not answer:
+            answer = "No answer could be generated."
+    except Exception as e:
+        if deadline.expired():
+            logger.warning("[generate_answer] LLM answer cut off by request budget: %s", e)
+            yield "degraded", "answer"
+            answer = "".join(parts)
+        else:
+            logger.error("[generate_answer] LLM generation failed: %s", e, exc_info=True)
+            yield "error", "Failed to generate answer."
+            return None
+    yield "answer", answer
+    return answer
+
+def iter_overview_events(
+    question: str,
+    summaries: List[Dict[str, Any]],
+    stream_tokens: bool = True,
+    deadline: Deadline = NO_DEADLINE
+) -> Iterator[Tuple[str, Any]]:
+    """Answers a question about the whole collection from cached document summaries only."""
+    logger.debug("[generate_answer] Answering overview question from %d summaries", len(summaries))
+    yield "citations", [
+        {
+            "doc_id": s["doc_id"],
+            "chunk_id": None,
+            "start_char": None,
+            "end_char": None,
+            "snippet": s["summary"][:200]
+        }
+        for s in summaries
+    ]
+    yield "themes", []
+    prompt = overview_prompt.format(question=question, documents=format_summaries(summaries))
+    yield from iter_llm_answer(prompt, stream_tokens, deadline)
 
 def fallback_answer(error_msg: str) -> Dict[str, Any]:
     return {
@@ -155,32 +488,113 @@ def fallback_answer(error_msg: str) -> Dict[str, Any]:
     }
 
 def qa_per_document(docs: List[LangDocument], question: str) -> List[Dict[str, Any]]:
-    results = []
-    for doc in docs:
+    return list(iter_qa_per_document(docs, question))
+
+def iter_qa_per_document(
+    docs: List[LangDocument],
+    question: str,
+    deadline: Deadline = NO_DEADLINE
+) -> Iterator[Dict[str, Any]]:
+    """
+    Extracts an answer from each document concurrently and yields rows as
+    they complete. Stops once only SYNTHESIS_MIN_SECONDS of budget is left,
+    or when the consumer closes the generator. Only rows that have not
+    started are cancelled: each worker checks the budget before its LLM call,
+    but a call already in flight runs to completion (bounded by the deadline
+    through the LLM transport) and its row is discarded.
+    """
+    # Run on the I/O pool in copies of the caller's context (deadline, cache
+    # bypass); the scheduler still rate-limits the calls
+    stop = threading.Event()
+    futures = {io_pool.submit(_qa_one_document, doc, question, deadline, stop): doc for doc in docs}
+    wait = deadline.remaining() - SYNTHESIS_MIN_SECONDS
+    try:
+        for future in as_completed(futures, timeout=max(0.0, wait) if wait != math.inf else None):
+            row = future.result()
+            if row is not None:
+                yield row
+    except FuturesTimeout:
+        logger.warning("[qa_per_document] Budget exhausted; %s rows skipped", sum(not f.done() for f in futures))
+    finally:
+        stop.set()
+        for future in futures:
+            future.cancel()
+
+def page_citation(page_start: Optional[int], page_end: Optional[int]) -> str:
+    if page_start is None:
+        return ""
+    if page_end is None or page_end == page_start:
+        return f"Page {page_start}"
+    return f"Pages {page_start}-{page_end}"
+
+def extractive_rows(question: str, scored_docs: List[Tuple[LangDocument, float]]) -> List[Dict[str, Any]]:
+    """Per-document rows without an LLM call: the sentence of each passage closest to the question."""
+    rows = []
+    for (doc, _), hit in zip(scored_docs, highlight_hits(question, scored_docs)):
+        best = max(hit["highlights"], key=lambda h: h["score"], default=None)
+        rows.append({
+            "doc_id": doc.metadata.get("doc_id"),
+            "chunk_id": doc.metadata.get("chunk_id"),
+            "answer": best["text"] if best else doc.page_content[:200],
+            "citation": page_citation(doc.metadata.get("page_start"), doc.metadata.get("page_end")),
+            "snippet": doc.page_content[:200]
+        })
+    return rows
+
+def _qa_one_document(
+    doc: LangDocument,
+    question: str,
+    deadline: Deadline = NO_DEADLINE,
+    stop: Optional[threading.Event] = None
+) -> Optional[Dict[str, Any]]:
+    # Queued rows may start after the consumer gave up or the budget ran out
+    if (stop is not None and stop.is_set()) or not deadline.allows(SYNTHESIS_MIN_SECONDS):
+        return None
+    try:
+        doc_text = doc.page_content
+        with llm_priority(STANDARD), span("query.qa_document"):
+            response = get_doc_qa_chain().run({"doc_text": doc_text, "question": question})
         try:
-            doc_text = doc.page_content
-            response = doc_qa_chain.run({"doc_text": doc_text, "question": question})
-            try:
-                parsed = json.loads(response)
-            except Exception:
-                parsed = {"answer": response, "citation": ""}
-            results.append({
-                "doc_id": doc.metadata.get("doc_id"),
-                "chunk_id": doc.metadata.get("chunk_id"),
-                "answer": parsed.get("answer", ""),
-                "citation": parsed.get("citation", ""),
-                "snippet": doc_text[:200]
-            })
-        except Exception as e:
-            logger.warning(f"[qa_per_document] Failed for doc_id={doc.metadata.get('doc_id')}: {e}")
-            results.append({
-                "doc_id": doc.metadata.get("doc_id"),
-                "chunk_id": doc.metadata.get("chunk_id"),
-                "answer": "",
-                "citation": "",
-                "snippet": doc.page_content[:200]
-            })
-    return results
+            parsed = json.loads(response)
+        except Exception:
+            parsed = {"answer": response, "citation": ""}
+        return {
+            "doc_id": doc.metadata.get("doc_id"),
+            "chunk_id": doc.metadata.get("chunk_id"),
+            "answer": parsed.get("answer", ""),
+            "citation": parsed.get("citation", ""),
+            "snippet": doc_text[:200]
+        }
+    except Exception as e:
+        logger.warning("[qa_per_document] Failed for doc_id=%s: %s", doc.metadata.get('doc_id'), e)
+        return {
+            "doc_id": doc.metadata.get("doc_id"),
+            "chunk_id": doc.metadata.get("chunk_id"),
+            "answer": "",
+            "citation": "",
+            "snippet": doc.page_content[:200]
+        }
+
+def synthesize_from_summaries(
+    question: str,
+    summaries: List[Dict[str, Any]],
+    doc_answers: List[Dict[str, Any]]
+) -> str:
+    findings_str = "\n".join(
+        f"Doc ID: {doc.get('doc_id')}, Answer: {doc.get('answer')}, Citation: {doc.get('citation')}"
+        for doc in doc_answers if doc.get("answer")
+    ) or "(none)"
+    prompt = summary_synth_prompt.format(
+        question=question,
+        documents=format_summaries(summaries),
+        findings_list=findings_str
+    )
+    try:
+        with llm_priority(BACKGROUND):
+            return get_llm(DETERMINISTIC_TEMPERATURE).invoke(prompt).content
+    except Exception as e:
+        logger.warning("[synthesize_from_summaries] Synthesis failed: %s", e)
+        return ""
 
 def synthesize_findings(doc_answers: List[Dict[str, Any]]) -> str:
     findings_list = []
@@ -191,25 +605,9 @@ def synthesize_findings(doc_answers: List[Dict[str, Any]]) -> str:
         )
     findings_str = "\n".join(findings_list)
     try:
-        summary = synth_chain.run({"findings_list": findings_str})
+        with llm_priority(BACKGROUND):
+            summary = get_synth_chain().run({"findings_list": findings_str})
         return summary
     except Exception as e:
-        logger.warning(f"[synthesize_findings] Synthesis failed: {e}")
+        logger.warning("[synthesize_findings] Synthesis failed: %s", e)
         return ""
-
-def identify_themes(full_text: str) -> List[str]:
-    truncated = truncate_text(full_text, max_tokens=MAX_THEME_TOKENS)
-    prompt = (
-        "Analyze the following answer and extract the key themes as a simple list:\n\n"
-        f"{truncated}\n\nReturn the themes as one theme per line."
-    )
-    try:
-        llm = get_llm()
-        response = llm.invoke(prompt)
-        response_text = str(response)
-        logger.debug(f"[identify_themes] Raw LLM response for themes: {response_text}")
-    except Exception as e:
-        logger.error(f"[identify_themes] Theme extraction error: {e}")
-        return []
-
-    return [line.strip("-•* \t") for line in response_text.splitlines() if line.strip()]
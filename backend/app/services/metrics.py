@@ -0,0 +1,319 @@
+# backend/app/services/metrics.py
+"""
+In-process metrics in the Prometheus text format, plus stage spans.
+
+`span("query.retrieval")` times a block: the duration goes to the
+`docchat_stage_seconds` histogram, to the stage timings of the current
+request (see `collect_timings`, stored on QueryLog) and, with OTEL_ENABLED,
+to an OpenTelemetry span. Counters and histograms are plain dicts
+under one lock per metric, cheap enough for per-page and per-call use.
+"""
+
+import re
+import math
+import time
+import bisect
+import logging
+import functools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "docchat"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelKey = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = f"{PREFIX}_{name}"
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def _key(self, labels: Dict[str, Any]) -> LabelKey:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _labels(self, key: LabelKey) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name += "_total"
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [(self.name, self._labels(k), v) for k, v in self._values.items()]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts (last is +Inf), sum]
+        self._values: Dict[LabelKey, list] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def samples(self) -> List[Sample]:
+        out: List[Sample] = []
+        with self._lock:
+            values = [(k, list(counts), total) for k, (counts, total) in self._values.items()]
+        for key, counts, total in values:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                out.append((self.name + "_bucket", {**labels, "le": _format_value(float(bound))}, cumulative))
+            out.append((self.name + "_sum", labels, total))
+            out.append((self.name + "_count", labels, cumulative))
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]] = []
+
+    def register(self, metric: Metric) -> None:
+        self._metrics.append(metric)
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]) -> None:
+        """`collector()` returns (name, kind, help, samples) families, computed at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        families = [(m.name, m.kind, m.documentation, m.samples()) for m in self._metrics]
+        for collector in self._collectors:
+            try:
+                families.extend(collector())
+            except Exception as e:
+                logger.warning(f"⚠️ Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+        lines = []
+        for name, kind, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{n}{_format_labels(labels)} {_format_value(v)}" for n, labels, v in samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = Histogram("stage_seconds", "Time spent per pipeline stage.", ["stage"])
+STAGE_ERRORS = Counter("stage_errors", "Stages that raised.", ["stage"])
+LLM_TOKENS = Counter("llm_tokens", "LLM tokens by direction; estimated when the provider reports no usage.",
+                     ["provider", "direction", "source"])
+LLM_CALLS = Counter("llm_calls", "LLM completions by outcome.", ["provider", "outcome"])
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+_METRIC_NAME = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def stats_collector(name: str, stats: Callable[[], Dict[str, Any]]):
+    """
+    Exposes every numeric value of a /stats-style nested dict as a gauge,
+    e.g. {"llm_cache": {"hits": 3}} -> docchat_llm_cache_hits 3.
+    """
+    def collect():
+        families = []
+
+        def walk(path: List[str], value: Any) -> None:
+            if isinstance(value, dict):
+                for k, v in value.items():
+                    walk(path + [str(k)], v)
+            elif isinstance(value, (int, float)) and not (isinstance(value, float) and math.isnan(value)):
+                metric = _METRIC_NAME.sub("_", "_".join([PREFIX] + path))
+                families.append((metric, "gauge", f"{'.'.join(path)} from /stats", [(metric, {}, float(value))]))
+
+        walk([], stats())
+        return families
+
+    collect.__name__ = name
+    return collect
+
+
+# ---- Stage timings per request ----
+
+class StageTimings:
+    """Seconds per stage for one request (or one worker-process task), summed over repeats."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals: Dict[str, float] = {}
+        self.observations: List[Tuple[str, float]] = []
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+            self.observations.append((stage, seconds))
+
+    def as_ms(self) -> Dict[str, float]:
+        with self._lock:
+            return {stage: round(seconds * 1000, 2) for stage, seconds in self.totals.items()}
+
+
+_timings: ContextVar[Optional[StageTimings]] = ContextVar("stage_timings", default=None)
+
+
+@contextmanager
+def collect_timings() -> Iterator[StageTimings]:
+    """Collects spans of the current context (and pool tasks it submits) inside the block."""
+    timings = StageTimings()
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """A duration measured without a `span` block (e.g. time to first token)."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+def replay_observations(observations: List[Tuple[str, float]]) -> None:
+    """Records spans measured in a worker process, whose own registry is never scraped."""
+    for stage, seconds in observations:
+        record_stage(stage, seconds)
+
+
+def run_with_timings(fn: Callable, *args: Any) -> Tuple[Any, List[Tuple[str, float]]]:
+    """Process-pool entry point: the result plus the spans measured while computing it."""
+    with collect_timings() as timings:
+        result = fn(*args)
+    return result, timings.observations
+
+
+@contextmanager
+def span(stage: str, **attributes: Any) -> Iterator[None]:
+    timings = _timings.get()
+    otel = _start_otel_span(stage, attributes)
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        STAGE_ERRORS.inc(stage=stage)
+        if otel is not None:
+            otel.record_exception(e)
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        STAGE_SECONDS.observe(seconds, stage=stage)
+        if timings is not None:
+            timings.add(stage, seconds)
+        if otel is not None:
+            otel.end()
+
+
+def timed(stage: str) -> Callable[[Callable], Callable]:
+    """Decorator form of `span` for functions (not generators)."""
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ---- Optional OpenTelemetry export ----
+
+_tracer = None
+
+
+def _start_otel_span(stage: str, attributes: Dict[str, Any]):
+    # Not made current: spans may open and close in different threads
+    # (pipeline generator steps), where attaching contexts would fail
+    if _tracer is None:
+        return None
+    return _tracer.start_span(stage, attributes={k: v for k, v in attributes.items() if v is not None})
+
+
+def setup_opentelemetry(app=None) -> bool:
+    """
+    Exports spans over OTLP (OTEL_EXPORTER_OTLP_ENDPOINT) when OTEL_ENABLED
+    is set and the OpenTelemetry SDK is installed; instruments `app` too.
+    """
+    global _tracer
+    if not settings.OTEL_ENABLED:
+        return False
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+    except ImportError as e:
+        logger.warning(f"⚠️ OTEL_ENABLED is set but OpenTelemetry is not installed: {e}")
+        return False
+
+    provider = TracerProvider(resource=Resource.create({"service.name": settings.OTEL_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("app.services.metrics")
+    if app is not None:
+        try:
+            from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+            FastAPIInstrumentor.instrument_app(app, excluded_urls="metrics,healthz,readyz")
+        except ImportError:
+            pass
+    logger.info(f"📡 Exporting OpenTelemetry spans as '{settings.OTEL_SERVICE_NAME}'")
+    return True
@@ -0,0 +1,165 @@
+# backend/app/services/query_log.py
+"""
+Query logs are written off the response path: routes enqueue a row and a
+background task inserts queued rows in batches, when `batch_size` rows are
+waiting or `flush_interval` has passed since the first of them arrived.
+A full queue drops rows per `overflow` ("drop_oldest" or "drop_newest")
+rather than making a request wait; drops and write lag are in `stats()`.
+"""
+
+import json
+import time
+import asyncio
+import logging
+import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from app.config import settings
+from app.db.session import AsyncSessionLocal
+from app.db.models import QueryLog
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest")
+
+
+def safe_json_dumps(data) -> str:
+    try:
+        return json.dumps(data)
+    except Exception:
+        return json.dumps(str(data))
+
+
+class QueryLogWriter:
+    """Bounded in-process queue of QueryLog rows flushed by one background task."""
+
+    def __init__(self, max_queue: int, batch_size: int, flush_interval: float, overflow: str = "drop_oldest"):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}'. Expected one of: {', '.join(OVERFLOW_POLICIES)}")
+        self.max_queue = max_queue
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self._last_lag = 0.0   # seconds from enqueue to commit, oldest row of the last batch
+        self._max_lag = 0.0
+        self._last_flush = 0.0
+
+    def record(self, question: str, answer: str, citations: list, themes: list, vector_path: str,
+               stage_timings: Optional[Dict[str, float]] = None) -> None:
+        """Queues one log row; never blocks and never touches the database."""
+        row = {
+            "timestamp": datetime.datetime.utcnow(),
+            "question": question,
+            "document_id": None,
+            "document_name": "ALL",
+            "vector_path": vector_path,
+            "answer": answer,
+            "citations": safe_json_dumps(citations),
+            "themes": safe_json_dumps(themes),
+            "stage_timings": safe_json_dumps(stage_timings) if stage_timings else None,
+        }
+        item = (time.monotonic(), row)
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.overflow == "drop_newest":
+                return
+            self._queue.get_nowait()
+            self._queue.task_done()
+            self._queue.put_nowait(item)
+        self.enqueued += 1
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="query-log-writer")
+
+    async def stop(self, timeout: float) -> None:
+        """Writes whatever is queued (up to `timeout` seconds), then stops the task."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("⚠️ Query log drain timed out, %s rows not written", self._queue.qsize())
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _next_batch(self) -> List[Tuple[float, Dict[str, Any]]]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _write(self, batch: List[Tuple[float, Dict[str, Any]]]) -> None:
+        started = time.monotonic()
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(insert(QueryLog), [row for _, row in batch])
+                await db.commit()
+        except Exception as e:
+            self.failed += len(batch)
+            logger.warning("⚠️ Failed to write %s query logs: %s", len(batch), e, exc_info=True)
+            return
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+        now = time.monotonic()
+        self.written += len(batch)
+        self.batches += 1
+        self._last_flush = now - started
+        self._last_lag = now - batch[0][0]
+        self._max_lag = max(self._max_lag, self._last_lag)
+        logger.debug("✅ Wrote %d query logs in %.1f ms", len(batch), self._last_flush * 1000)
+
+    async def _run(self) -> None:
+        while True:
+            await self._write(await self._next_batch())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "queued": self._queue.qsize(),
+            "max_queue": self.max_queue,
+            "overflow": self.overflow,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_lag_seconds": round(self._last_lag, 3),
+            "max_lag_seconds": round(self._max_lag, 3),
+            "last_flush_seconds": round(self._last_flush, 3),
+        }
+
+
+query_log_writer = QueryLogWriter(
+    settings.QUERY_LOG_MAX_QUEUE,
+    settings.QUERY_LOG_BATCH_SIZE,
+    settings.QUERY_LOG_FLUSH_INTERVAL_MS / 1000.0,
+    settings.QUERY_LOG_OVERFLOW,
+)
+
+
+def query_log_stats() -> Dict[str, Any]:
+    return query_log_writer.stats()
@@ -1 +1,137 @@
-# query_service.py
\ No newline at end of file
+# backend/app/services/query_service.py
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from fastapi import HTTPException, Request
+
+from app.services.llm_service import iter_answer_events, empty_result, collect_event, fallback_answer
+from app.services.deadline import Deadline, use_deadline
+from app.services.executors import PipelineSteps, pipeline_pool
+from app.services.metrics import collect_timings
+
+logger = logging.getLogger(__name__)
+
+# How often a waiting request checks whether its client went away
+DISCONNECT_POLL_SECONDS = 0.5
+
+
+def normalize_question(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+def query_key(question: str, top_k: Optional[int], *extra: Hashable) -> tuple:
+    """Requests with equal keys are answered by a single computation."""
+    return (normalize_question(question), top_k) + extra
+
+
+async def generate_answer_async(
+    vector_store_path: str,
+    question: str,
+    mode: str = "full",
+    top_k: Optional[int] = None,
+    deadline: Optional[Deadline] = None
+) -> Dict[str, Any]:
+    """
+    Async counterpart of `generate_answer`. Each pipeline stage runs on the
+    pipeline pool; cancelling the task stops the pipeline at the next stage
+    boundary instead of letting it burn LLM quota for nobody. Requests
+    coalesced onto this call share its result, stage timings included.
+    """
+    steps = PipelineSteps(iter_answer_events(vector_store_path, question, stream_tokens=False,
+                                             mode=mode, top_k=top_k, deadline=deadline), pipeline_pool)
+    result = empty_result()
+    # Installed in this task's context so the worker threads (and the LLM
+    # transport) see the same deadline and record into the same timings
+    with use_deadline(deadline), collect_timings() as timings:
+        try:
+            while True:
+                item = await steps.next()
+                if item is None:
+                    break
+                event, data = item
+                if event == "error":
+                    result = fallback_answer(data)
+                    break
+                collect_event(result, event, data)
+        finally:
+            steps.close()
+    result["stage_timings"] = timings.as_ms()
+    return result
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls that share a key into one in-flight task.
+
+    Every waiter receives the same result or exception. The shared task is
+    cancelled once its last waiter is gone, and a finished call is forgotten
+    immediately, so results are never served stale.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self.started = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self._calls[key] = call
+            self.started += 1
+        else:
+            self.coalesced += 1
+            logger.debug("[SingleFlight] Joined in-flight call (%d waiting)", call.waiters)
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Nobody is left to receive the answer
+                self._forget(key, call)
+                call.task.cancel()
+                self.abandoned += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._calls),
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+        }
+
+
+query_flight = SingleFlight()
+
+
+async def cancel_on_disconnect(request: Request, awaitable: Awaitable[Any]) -> Any:
+    """Await `awaitable`, cancelling it if the client disconnects first."""
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.info("🔌 Client disconnected, abandoning query")
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
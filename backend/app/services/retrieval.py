@@ -0,0 +1,82 @@
+# backend/app/services/retrieval.py
+
+import re
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_community.vectorstores import Chroma
+from langchain_core.documents import Document as LangDocument
+
+from app.services.vector_store import embed_texts, embed_query
+from app.services.chunk_store import hydrate
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_K = 4
+HIGHLIGHTS_PER_CHUNK = 2
+MAX_SENTENCES_PER_CHUNK = 40
+MIN_SENTENCE_CHARS = 20
+
+_SENTENCE = re.compile(r"[^.!?\n]+(?:[.!?]+|$)", re.M)
+
+
+def retrieve(db: Chroma, question: str, top_k: Optional[int] = None) -> List[Tuple[LangDocument, float]]:
+    """
+    Top-k chunks for a question with their relevance scores (higher is better),
+    with text and page range from the chunks table.
+    """
+    scored_docs = db.similarity_search_with_relevance_scores(question, k=top_k or DEFAULT_TOP_K)
+    hydrate([doc for doc, _ in scored_docs])
+    return scored_docs
+
+
+def split_sentences(text: str) -> List[Tuple[int, int, str]]:
+    """(start, end, sentence) spans, skipping fragments too short to be useful."""
+    spans = []
+    for m in _SENTENCE.finditer(text):
+        sentence = m.group().strip()
+        if len(sentence) >= MIN_SENTENCE_CHARS:
+            start = m.start() + (len(m.group()) - len(m.group().lstrip()))
+            spans.append((start, start + len(sentence), sentence))
+    return spans[:MAX_SENTENCES_PER_CHUNK]
+
+
+def highlight_hits(question: str, scored_docs: List[Tuple[LangDocument, float]]) -> List[Dict[str, Any]]:
+    """
+    Ranked chunks with their best-matching sentences. All sentences are
+    embedded in one batch and scored by cosine similarity to the question;
+    no LLM is involved.
+    """
+    spans = [split_sentences(doc.page_content) for doc, _ in scored_docs]
+    flat = [sentence for doc_spans in spans for _, _, sentence in doc_spans]
+    sims = np.zeros(0)
+    if flat:
+        vectors = np.asarray(embed_texts(flat), dtype=np.float32)
+        query = np.asarray(embed_query(question), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query) or 1.0)
+        sims = vectors @ query / np.where(norms == 0, 1.0, norms)
+
+    hits, offset = [], 0
+    for (doc, score), doc_spans in zip(scored_docs, spans):
+        doc_sims = sims[offset:offset + len(doc_spans)]
+        offset += len(doc_spans)
+        best = np.argsort(-doc_sims)[:HIGHLIGHTS_PER_CHUNK] if len(doc_spans) else []
+        md = doc.metadata
+        hits.append({
+            "doc_id": md.get("doc_id"),
+            "chunk_id": md.get("chunk_id"),
+            "filename": md.get("filename"),
+            "score": round(float(score), 4),
+            "snippet": doc.page_content[:200],
+            "highlights": [
+                {
+                    "text": doc_spans[i][2],
+                    "start": doc_spans[i][0],
+                    "end": doc_spans[i][1],
+                    "score": round(float(doc_sims[i]), 4),
+                }
+                for i in sorted(best, key=lambda i: doc_spans[i][0])
+            ],
+        })
+    return hits
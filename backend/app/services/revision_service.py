@@ -0,0 +1,130 @@
+# backend/app/services/revision_service.py
+"""
+Revision-aware ingest. A re-uploaded document (same filename, or an explicit
+`revision_of`) becomes a new version linked to the previous one. Its
+content-defined chunks are matched to the previous version's by hash:
+matches keep their stored vectors and only get their metadata moved to the
+new version, new chunks are embedded, and chunks that disappeared are
+retired from the vector store.
+"""
+
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Chunk, Document
+from app.core.dedup import get_dedup_index
+from app.services.vector_store import (
+    chunk_ids_for_document, delete_chunks, update_chunk_metadata, SUMMARY_COLLECTION
+)
+from app.services.executors import io_pool
+
+logger = logging.getLogger(__name__)
+
+# Chunk metadata that follows a reused chunk into the new version
+MOVED_FIELDS = ("doc_id", "start", "end", "filename", "author", "doc_type")
+
+
+@dataclass
+class ChunkDiff:
+    reused: List[str] = field(default_factory=list)   # chunk ids carried over unchanged
+    removed: List[str] = field(default_factory=list)  # chunk ids of the previous version to retire
+
+
+async def find_previous_version(db: AsyncSession, filename: str, revision_of: Optional[int] = None) -> Optional[Document]:
+    """The current version this upload revises, if any."""
+    if revision_of is not None:
+        return await db.get(Document, revision_of)
+    return (await db.execute(
+        select(Document)
+        .where(Document.filename == filename, Document.status == "processed")
+        .order_by(Document.version.desc())
+        .limit(1)
+    )).scalar_one_or_none()
+
+
+async def diff_chunks(db: AsyncSession, previous: Document, chunk_ids: List[str], metadata: List[Dict]) -> ChunkDiff:
+    """
+    Matches the new chunks to the previous version's by content hash. Matched
+    chunks take over the previous chunk id (in `chunk_ids` and `metadata`,
+    which are updated in place) so their stored vectors are reused.
+    """
+    diff = ChunkDiff()
+    old_by_hash: Dict[str, List[str]] = {}
+    rows = (await db.execute(
+        select(Chunk.chunk_id, Chunk.content_hash).where(Chunk.document_id == previous.id)
+    )).all()
+    for chunk_id, content_hash in rows:
+        if content_hash:
+            old_by_hash.setdefault(content_hash, []).append(chunk_id)
+
+    for i, md in enumerate(metadata):
+        old_ids = old_by_hash.get(md.get("hash"))
+        if old_ids:
+            chunk_ids[i] = md["chunk_id"] = old_ids.pop(0)
+            diff.reused.append(chunk_ids[i])
+
+    if rows:
+        diff.removed = [cid for ids in old_by_hash.values() for cid in ids]
+        diff.removed += [cid for cid, content_hash in rows if not content_hash]
+    elif previous.doc_uid:
+        # Versions ingested before chunk rows were written: nothing to reuse,
+        # but their stored chunks still have to go
+        diff.removed = await io_pool.run(chunk_ids_for_document, previous.doc_uid)
+    return diff
+
+
+def move_reused_chunks(diff: ChunkDiff, metadata: List[Dict], doc_id: str, persist_path: str) -> None:
+    """Points carried-over chunks (stored ones and dedup references) at the new version."""
+    if not diff.reused:
+        return
+    reused = set(diff.reused)
+    moved = {md["chunk_id"]: md for md in metadata if md["chunk_id"] in reused}
+    dedup = get_dedup_index()
+    references = dedup.canonical_of(list(moved)) if dedup else {}
+
+    update_chunk_metadata(
+        {cid: {k: md[k] for k in MOVED_FIELDS if k in md} for cid, md in moved.items() if cid not in references},
+        persist_path
+    )
+    if dedup:
+        dedup.reassign([cid for cid in moved if cid not in references], doc_id)
+        dedup.add_refs([
+            (cid, canonical_id, doc_id, json.dumps(moved[cid])) for cid, canonical_id in references.items()
+        ])
+
+
+def retire_chunks(chunk_ids: List[str], persist_path: str) -> None:
+    """
+    Removes chunks of a superseded version from the vector store. A stored
+    chunk other documents still reference is handed to one of them instead.
+    """
+    if not chunk_ids:
+        return
+    dedup = get_dedup_index()
+    if dedup:
+        deleted, promoted = dedup.retire(chunk_ids)
+    else:
+        deleted, promoted = chunk_ids, {}
+    delete_chunks(deleted, persist_path)
+    if promoted:
+        update_chunk_metadata(
+            {cid: {k: v for k, v in json.loads(raw).items() if k in MOVED_FIELDS}
+             for cid, raw in promoted.items()},
+            persist_path
+        )
+    logger.info(f"🗑️ Retired {len(deleted)} chunks ({len(promoted)} handed to near-duplicates).")
+
+
+async def supersede(previous: Document, persist_path: str) -> None:
+    """Marks the previous version superseded (commit is the caller's) and drops its embedded summary."""
+    previous.status = "superseded"
+    if previous.doc_uid:
+        try:
+            await io_pool.run(delete_chunks, [previous.doc_uid], persist_path, SUMMARY_COLLECTION)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not remove summary of superseded document {previous.id}: {e}")
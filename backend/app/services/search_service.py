@@ -0,0 +1,117 @@
+# backend/app/services/search_service.py
+"""
+Keyword search over chunk text with SQLite FTS5: exact phrases, prefixes and
+boolean expressions, BM25-ranked, with highlighted snippets. No model or
+vector store involved.
+"""
+
+import re
+import html
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.fts import FTS_TABLE
+
+# How `q` is read:
+#   boolean  FTS5 query syntax: "exact phrase", prefix*, a AND b, a OR b, a NOT b, NEAR(a b, 5)
+#   phrase   the whole input as one exact phrase
+#   prefix   every word as a prefix, all required (search-as-you-type)
+SEARCH_MODES = ("boolean", "phrase", "prefix")
+
+SNIPPET_TOKENS = 24
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+# FTS5 marks matches with these, which can't occur in extracted text, so the
+# snippet can be HTML-escaped before they become <mark> tags
+_MATCH_START = "\x02"
+_MATCH_END = "\x03"
+
+_WORD = re.compile(r"\w+")
+# Messages SQLite uses for malformed MATCH expressions
+_QUERY_ERRORS = ("fts5", "syntax error", "unterminated string", "no such column")
+
+
+class SearchQueryError(ValueError):
+    """The query is not valid FTS5 syntax."""
+
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def highlight(snippet: str) -> str:
+    """HTML-safe snippet with matches wrapped in HIGHLIGHT_START/HIGHLIGHT_END."""
+    escaped = html.escape(snippet or "", quote=False)
+    return escaped.replace(_MATCH_START, HIGHLIGHT_START).replace(_MATCH_END, HIGHLIGHT_END)
+
+
+def build_match(q: str, mode: str = "boolean") -> str:
+    """FTS5 MATCH expression for a user query."""
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode '{mode}'. Expected one of: {', '.join(SEARCH_MODES)}")
+    if mode == "phrase":
+        return _quote(q.strip())
+    if mode == "prefix":
+        words = _WORD.findall(q)
+        if not words:
+            raise SearchQueryError("Query has no searchable words")
+        return " AND ".join(_quote(w) + "*" for w in words)
+    return q.strip()
+
+
+async def search_chunks(
+    db: AsyncSession,
+    q: str,
+    mode: str = "boolean",
+    document_ids: Optional[List[int]] = None,
+    author: Optional[str] = None,
+    doc_type: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Best-matching chunks of current document versions, best first. Scores are
+    BM25 (higher is better); snippets are HTML-escaped, with matched terms
+    in <mark>.
+    """
+    match = build_match(q, mode)
+    if not match:
+        raise SearchQueryError("Query is empty")
+
+    filters, params = ["d.status = 'processed'"], {
+        "match": match, "limit": limit, "offset": offset,
+        "hl_start": _MATCH_START, "hl_end": _MATCH_END, "tokens": SNIPPET_TOKENS,
+    }
+    if document_ids:
+        marks = ", ".join(f":doc{i}" for i in range(len(document_ids)))
+        filters.append(f"d.id IN ({marks})")
+        params.update({f"doc{i}": doc_id for i, doc_id in enumerate(document_ids)})
+    if author:
+        filters.append("d.author = :author")
+        params["author"] = author
+    if doc_type:
+        filters.append("d.doc_type = :doc_type")
+        params["doc_type"] = doc_type
+
+    sql = f"""
+        SELECT d.id AS document_id, d.doc_uid, d.filename, d.author, d.doc_type,
+               c.chunk_id, c.page_start, c.page_end, c.start_char, c.end_char,
+               -bm25({FTS_TABLE}) AS score,
+               snippet({FTS_TABLE}, 0, :hl_start, :hl_end, '…', :tokens) AS snippet
+        FROM {FTS_TABLE}
+        JOIN chunks c ON c.id = {FTS_TABLE}.rowid
+        JOIN documents d ON d.id = c.document_id
+        WHERE {FTS_TABLE} MATCH :match AND {" AND ".join(filters)}
+        ORDER BY bm25({FTS_TABLE})
+        LIMIT :limit OFFSET :offset
+    """
+    try:
+        rows = (await db.execute(text(sql), params)).mappings().all()
+    except Exception as e:
+        # FTS5 reports malformed expressions as generic OperationalErrors
+        if any(marker in str(e).lower() for marker in _QUERY_ERRORS):
+            raise SearchQueryError(f"Invalid search query: {match}") from e
+        raise
+    return [dict(row, snippet=highlight(row["snippet"])) for row in rows]
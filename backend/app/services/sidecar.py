@@ -0,0 +1,329 @@
+# backend/app/services/sidecar.py
+"""
+Embedding and vector index sidecar shared by every API worker on a host.
+
+One process owns the embedding model and the Chroma client; workers reach it
+over a Unix socket. Concurrent embedding requests are micro-batched into a
+single model call, and all index writes go through one writer thread.
+
+    python -m app.services.sidecar --socket /tmp/doc-embed.sock
+
+Workers use it when EMBEDDING_SIDECAR_SOCKET is set to the same path.
+Frames are a 4-byte big-endian length followed by an orjson object:
+request {"op": ..., "args": {...}}, reply {"ok": true, "result": ...} or
+{"ok": false, "error": "..."}.
+"""
+
+import os
+import time
+import socket
+import struct
+import asyncio
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import orjson
+from langchain_core.documents import Document as LangDocument
+
+from app.config import settings
+from app.logging_config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 256 * 1024 * 1024
+
+
+class SidecarError(RuntimeError):
+    """The sidecar received the request but failed to carry it out."""
+
+
+def _pack(obj: Any) -> bytes:
+    payload = orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return _HEADER.pack(len(payload)) + payload
+
+
+# ---- Client (API workers) ----
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("Sidecar closed the connection")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+class SidecarClient:
+    """
+    Blocking client with one connection per thread. Requests from many
+    threads arrive on separate connections, which is what lets the sidecar
+    batch them together.
+    """
+
+    def __init__(self, path: str, timeout: float):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            self._local.sock = sock
+        return sock
+
+    def _drop(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def call(self, op: str, **args: Any) -> Any:
+        frame = _pack({"op": op, "args": args})
+        # Every op is idempotent, so a request on a stale connection (sidecar
+        # restarted) is retried once on a fresh one
+        for attempt in (1, 2):
+            try:
+                sock = self._connect()
+                sock.sendall(frame)
+                (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+                reply = orjson.loads(_recv_exact(sock, size))
+                break
+            except (ConnectionError, BrokenPipeError, socket.timeout, FileNotFoundError) as e:
+                self._drop()
+                if attempt == 2 or isinstance(e, socket.timeout):
+                    raise ConnectionError(f"Embedding sidecar at {self.path} unavailable: {e}") from e
+        if not reply["ok"]:
+            raise SidecarError(reply["error"])
+        return reply["result"]
+
+
+class SidecarStore:
+    """
+    Takes the place of a Chroma store in workers when the sidecar owns the
+    index. Only the search methods the query path uses are provided.
+    """
+
+    def __init__(self, client: SidecarClient, persist_path: str, collection: Optional[str] = None):
+        self.client = client
+        self.persist_path = persist_path
+        self.collection = collection
+
+    def _search(self, query: str, k: int, filter: Optional[Dict], relevance: bool) -> List[Tuple[LangDocument, float]]:
+        rows = self.client.call(
+            "search", query=query, k=k, filter=filter, relevance=relevance,
+            persist_path=self.persist_path, collection=self.collection
+        )
+        return [(LangDocument(page_content=text, metadata=metadata), score) for text, metadata, score in rows]
+
+    def similarity_search_with_relevance_scores(self, query: str, k: int = 4, filter: Optional[Dict] = None):
+        return self._search(query, k, filter, relevance=True)
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Optional[Dict] = None):
+        return self._search(query, k, filter, relevance=False)
+
+
+_clients: Dict[str, SidecarClient] = {}
+
+
+def get_client(path: str) -> SidecarClient:
+    client = _clients.get(path)
+    if client is None:
+        client = _clients[path] = SidecarClient(path, settings.SIDECAR_TIMEOUT_SECONDS)
+    return client
+
+
+# ---- Server ----
+
+class EmbedBatcher:
+    """
+    Collects embedding requests for up to `window` seconds (or `max_batch`
+    texts) and embeds them in one model call.
+    """
+
+    def __init__(self, embed: Callable[[List[str]], List[List[float]]], window: float, max_batch: int):
+        self.embed = embed
+        self.window = window
+        self.max_batch = max_batch
+        self.queue: "asyncio.Queue[Tuple[List[str], asyncio.Future]]" = asyncio.Queue()
+        # The model is used from a single thread; torch parallelizes inside it
+        self.executor = ThreadPoolExecutor(1, thread_name_prefix="embed")
+        self.batches = 0
+        self.texts = 0
+
+    async def submit(self, texts: List[str]) -> List[List[float]]:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((texts, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[List[str], asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        size = len(batch[0][0])
+        until = loop.time() + self.window
+        while size < self.max_batch:
+            remaining = until - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            flat = [text for texts, _ in batch for text in texts]
+            try:
+                vectors = await loop.run_in_executor(self.executor, self.embed, flat) if flat else []
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.texts += len(flat)
+            offset = 0
+            for texts, future in batch:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(texts)])
+                offset += len(texts)
+
+
+class SidecarServer:
+    def __init__(self, window: float, max_batch: int):
+        # Local implementations: this process is the store
+        from app.services import vector_store
+
+        self.store = vector_store
+        self.batcher = EmbedBatcher(vector_store.embed_texts, window, max_batch)
+        # Chroma's persist directory must only ever see one writer
+        self.writer = ThreadPoolExecutor(1, thread_name_prefix="writer")
+        self.readers = ThreadPoolExecutor(4, thread_name_prefix="reader")
+        self.requests = 0
+        self.errors = 0
+        self.started = time.time()
+
+    async def _on(self, executor: ThreadPoolExecutor, fn: Callable, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+    def _search(self, persist_path: Optional[str], collection: Optional[str], vector: List[float],
+                k: int, filter: Optional[Dict], relevance: bool) -> List[List[Any]]:
+        db = self.store.load_local_store(persist_path, collection)
+        results = db.similarity_search_by_vector_with_relevance_scores(vector, k=k, filter=filter)
+        # by-vector search returns raw distances; apply the same normalization
+        # similarity_search_with_relevance_scores would
+        to_score = db._select_relevance_score_fn() if relevance else (lambda d: d)
+        return [[doc.page_content, doc.metadata, to_score(distance)] for doc, distance in results]
+
+    def _get(self, persist_path: Optional[str], limit: Optional[int], offset: Optional[int],
+             include: List[str], where: Optional[Dict] = None) -> Dict[str, Any]:
+        db = self.store.load_local_store(persist_path)
+        return db._collection.get(include=include, limit=limit, offset=offset, where=where)
+
+    async def dispatch(self, op: str, args: Dict[str, Any]) -> Any:
+        if op == "embed":
+            return await self.batcher.submit(args["texts"])
+        if op == "search":
+            vector = (await self.batcher.submit([args["query"]]))[0]
+            return await self._on(self.readers, self._search, args.get("persist_path"), args.get("collection"),
+                                  vector, args["k"], args.get("filter"), args.get("relevance", True))
+        if op == "get":
+            return await self._on(self.readers, self._get, args.get("persist_path"), args["limit"],
+                                  args["offset"], args["include"], args.get("where"))
+        if op == "add_chunks":
+            embeddings = args.get("embeddings")
+            if embeddings is None:
+                embeddings = await self.batcher.submit(args["texts"])
+            return await self._on(self.writer, self.store.add_chunks_to_store, args["texts"], args["ids"],
+                                  args["metadatas"], args.get("persist_path"), embeddings)
+        if op == "update_metadata":
+            return await self._on(self.writer, self.store.update_chunk_metadata,
+                                  args["updates"], args.get("persist_path"))
+        if op == "delete":
+            return await self._on(self.writer, self.store.delete_chunks, args["ids"],
+                                  args.get("persist_path"), args.get("collection"))
+        if op == "add_summary":
+            embedding = (await self.batcher.submit([args["text"]]))[0]
+            return await self._on(self.writer, self.store.upsert_summary, args["doc_uid"], args["text"],
+                                  embedding, args["metadata"], args.get("persist_path"))
+        if op == "stats":
+            return self.stats()
+        raise ValueError(f"Unknown sidecar op '{op}'")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "embed_batches": self.batcher.batches,
+            "embedded_texts": self.batcher.texts,
+            "avg_batch_size": round(self.batcher.texts / self.batcher.batches, 2) if self.batcher.batches else 0.0,
+            "embed_queue": self.batcher.queue.qsize(),
+            "uptime_seconds": round(time.time() - self.started, 1),
+        }
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+                except asyncio.IncompleteReadError:
+                    return
+                if size > MAX_FRAME_BYTES:
+                    logger.error(f"❌ Sidecar frame of {size} bytes exceeds limit, closing connection")
+                    return
+                request = orjson.loads(await reader.readexactly(size))
+                self.requests += 1
+                try:
+                    reply = {"ok": True, "result": await self.dispatch(request["op"], request.get("args") or {})}
+                except Exception as e:
+                    self.errors += 1
+                    logger.warning(f"⚠️ Sidecar op '{request.get('op')}' failed: {e}", exc_info=True)
+                    reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                writer.write(_pack(reply))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, path: str) -> None:
+        if os.path.exists(path):
+            os.unlink(path)  # stale socket from a previous run
+        server = await asyncio.start_unix_server(self.handle, path=path, limit=MAX_FRAME_BYTES)
+        os.chmod(path, 0o660)
+        batcher = asyncio.create_task(self.batcher.run())
+        logger.info(f"🚀 Embedding sidecar listening on {path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Shared embedding and vector index process")
+    parser.add_argument("--socket", default=settings.EMBEDDING_SIDECAR_SOCKET or "/tmp/doc-embed.sock")
+    parser.add_argument("--batch-window-ms", type=float, default=settings.SIDECAR_BATCH_WINDOW_MS)
+    parser.add_argument("--max-batch", type=int, default=settings.SIDECAR_MAX_BATCH)
+    args = parser.parse_args()
+
+    configure_logging()
+    # The shared .env usually sets the socket too; this process must not call itself
+    settings.EMBEDDING_SIDECAR_SOCKET = ""
+    server = SidecarServer(args.batch_window_ms / 1000.0, args.max_batch)
+    server.store.get_embedding_function()  # load the model before accepting requests
+    asyncio.run(server.serve(args.socket))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# backend/app/services/summary_service.py
+
+import re
+import json
+import logging
+import datetime
+from typing import Dict, List, Optional, Tuple, Any
+
+from langchain_core.prompts import PromptTemplate
+
+from app.db.session import SessionLocal
+from app.db.models import Document
+from app.core.text_store import load_text
+from app.services.vector_store import add_document_summary, search_summaries
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_INPUT_WORDS = 1500
+SAMPLE_WINDOW_WORDS = 60
+MAX_KEY_FACTS = 8
+
+summary_prompt = PromptTemplate(
+    input_variables=["filename", "doc_text"],
+    template='''You are a legal assistant. Summarize the document below.
+Document ({filename}):
+"""{doc_text}"""
+
+Give:
+- A compact summary (3-5 sentences)
+- Up to 8 key facts (parties, dates, amounts, obligations)
+
+Respond in JSON: {{ "summary": "...", "key_facts": ["..."] }}
+'''
+)
+
+# Questions about the corpus as a whole rather than a specific passage
+OVERVIEW_PATTERNS = [
+    re.compile(r"\bwhat\b.*\b(these|the|all|my|uploaded)\s+(documents|docs|files)\b.*\babout\b", re.I),
+    re.compile(r"\b(overview|summary|summari[sz]e)\b.*\b(all|these|the|uploaded|my)\s+(documents|docs|files|corpus)\b", re.I),
+    re.compile(r"\bwhat\s+(documents|docs|files)\s+(do i|do we|are there)\b", re.I),
+]
+
+
+def is_overview_question(question: str) -> bool:
+    return any(p.search(question) for p in OVERVIEW_PATTERNS)
+
+
+def sample_text(text: str, max_words: int = SUMMARY_INPUT_WORDS) -> str:
+    """
+    Fits a long document into `max_words`: the opening half of the budget,
+    then one window from the end of each equal slice of the rest, so the
+    last window is the document's ending.
+    """
+    words = text.split()
+    if len(words) <= max_words:
+        return text
+    head = max_words // 2
+    windows = max(1, (max_words - head) // SAMPLE_WINDOW_WORDS)
+    step = (len(words) - head) // windows
+    parts = [" ".join(words[:head])]
+    for i in range(windows):
+        end = len(words) if i == windows - 1 else head + (i + 1) * step
+        parts.append(" ".join(words[max(head, end - SAMPLE_WINDOW_WORDS):end]))
+    return " [...] ".join(parts)
+
+
+def extractive_summary(text: str, sentences: int = 3) -> str:
+    found = re.split(r"(?<=[.!?])\s+", " ".join(text.split()))
+    return " ".join(found[:sentences])
+
+
+def parse_summary(response: str) -> Tuple[str, List[str]]:
+    try:
+        parsed = json.loads(response)
+        facts = parsed.get("key_facts") or []
+        if isinstance(facts, str):
+            facts = [facts]
+        return str(parsed.get("summary", "")).strip(), [str(f) for f in facts][:MAX_KEY_FACTS]
+    except Exception:
+        return response.strip(), []
+
+
+def summarize_document(document_id: int, persist_path: Optional[str] = None) -> None:
+    """
+    Background step of the upload flow: stores a compact summary and key
+    facts on the Document row and embeds the summary in its own collection.
+    """
+    # Imported here: llm_service depends on this module
+    from app.services.llm_service import get_llm, DETERMINISTIC_TEMPERATURE
+    from app.services.llm_scheduler import llm_priority, BACKGROUND
+
+    db = SessionLocal()
+    try:
+        doc = db.get(Document, document_id)
+        text = load_text(doc) if doc is not None else ""
+        if not text.strip():
+            return
+
+        try:
+            prompt = summary_prompt.format(filename=doc.filename, doc_text=sample_text(text))
+            with llm_priority(BACKGROUND):
+                response = get_llm(DETERMINISTIC_TEMPERATURE).invoke(prompt)
+            summary, facts = parse_summary(str(getattr(response, "content", response)))
+        except Exception as e:
+            logger.warning(f"⚠️ Summary generation failed for document {document_id}, using extract: {e}")
+            summary, facts = "", []
+        summary = summary or extractive_summary(text)
+
+        doc.summary = summary
+        doc.key_facts = json.dumps(facts)
+        doc.summarized_at = datetime.datetime.utcnow()
+        db.commit()
+
+        if doc.doc_uid:
+            add_document_summary(
+                doc.doc_uid,
+                "\n".join([summary] + facts),
+                {"doc_id": doc.doc_uid, "document_id": doc.id, "filename": doc.filename},
+                persist_path
+            )
+        logger.info(f"✅ Summarized document {document_id} ({len(facts)} key facts)")
+    except Exception as e:
+        logger.error(f"❌ Summarizing document {document_id} failed: {e}", exc_info=True)
+    finally:
+        db.close()
+
+
+def load_summaries(doc_uids: Optional[List[str]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Cached summaries for the given documents (by doc_uid), or for the most
+    recent documents when no ids are given. Documents not yet summarized are
+    left out.
+    """
+    db = SessionLocal()
+    try:
+        q = db.query(Document.doc_uid, Document.filename, Document.summary, Document.key_facts) \
+              .filter(Document.summary.isnot(None), Document.status == "processed")
+        if doc_uids is not None:
+            if not doc_uids:
+                return []
+            q = q.filter(Document.doc_uid.in_(doc_uids))
+        q = q.order_by(Document.upload_time.desc())
+        if limit:
+            q = q.limit(limit)
+        return [
+            {
+                "doc_id": row.doc_uid,
+                "filename": row.filename,
+                "summary": row.summary,
+                "key_facts": json.loads(row.key_facts or "[]"),
+            }
+            for row in q.all()
+        ]
+    finally:
+        db.close()
+
+
+def relevant_summaries(question: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    Summaries of the `limit` documents whose embedded summary is closest to
+    the question, best first; the most recent documents if that search fails.
+    """
+    try:
+        doc_uids = search_summaries(question, limit)
+    except Exception as e:
+        logger.warning(f"⚠️ Summary search failed, using the most recent documents: {e}")
+        doc_uids = []
+    if doc_uids:
+        rank = {uid: i for i, uid in enumerate(doc_uids)}
+        summaries = sorted(load_summaries(doc_uids), key=lambda s: rank[s["doc_id"]])
+        if summaries:
+            return summaries
+    return load_summaries(limit=limit)
+
+
+def format_summaries(summaries: List[Dict[str, Any]]) -> str:
+    blocks = []
+    for s in summaries:
+        facts = "".join(f"\n  - {f}" for f in s["key_facts"])
+        blocks.append(f"Doc ID: {s['doc_id']} ({s['filename']})\nSummary: {s['summary']}" + (f"\nKey facts:{facts}" if facts else ""))
+    return "\n\n".join(blocks)
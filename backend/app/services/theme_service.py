@@ -1 +1,350 @@
-# theme_service.py
\ No newline at end of file
+# backend/app/services/theme_service.py
+"""
+Corpus-level themes.
+
+Chunk embeddings are clustered at ingest with an incremental mini-batch
+k-means; every chunk stores its cluster id in its vector-store metadata
+(`theme_cluster`) and each cluster gets a short label. At query time the
+themes of an answer are just the labels of the retrieved chunks' clusters,
+so no LLM call is needed.
+
+The model and its bookkeeping live in one joblib file next to the data and
+are updated under a file lock, so every worker sees the same clusters.
+"""
+
+import os
+import re
+import json
+import logging
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+from filelock import FileLock, Timeout
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+UNASSIGNED = -1
+MAX_TERMS_PER_CLUSTER = 200
+MAX_SAMPLES_PER_CLUSTER = 5
+_WORD = re.compile(r"[A-Za-z][A-Za-z\-]{2,}")
+
+_state_cache: Optional[dict] = None
+_state_mtime: float = 0.0
+_relabel_thread: Optional[threading.Thread] = None
+
+
+def _lock() -> FileLock:
+    return FileLock(settings.THEME_MODEL_PATH + ".lock", timeout=60)
+
+
+def _new_state() -> dict:
+    return {
+        "kmeans": None,
+        "pending": {},          # chunk id -> (embedding, text) waiting for the first fit
+        "sizes": Counter(),     # cluster -> chunks assigned so far
+        "terms": {},            # cluster -> Counter of frequent terms
+        "samples": {},          # cluster -> [(distance to centre, snippet)] closest first
+        "labels": {},           # cluster -> label
+        "labeled_sizes": {},    # cluster -> size when last labelled
+        "labeled_centers": {},  # cluster -> centre when last labelled
+    }
+
+
+def _load_state() -> dict:
+    """Loads the persisted state, reusing the in-process copy while the file is unchanged."""
+    global _state_cache, _state_mtime
+    path = settings.THEME_MODEL_PATH
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return _state_cache or _new_state()
+    if _state_cache is None or mtime != _state_mtime:
+        _state_cache = joblib.load(path)
+        _state_mtime = mtime
+    return _state_cache
+
+
+def _save_state(state: dict) -> None:
+    global _state_cache, _state_mtime
+    path = settings.THEME_MODEL_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    joblib.dump(state, tmp)
+    os.replace(tmp, path)
+    _state_cache = state
+    _state_mtime = os.path.getmtime(path)
+
+
+@lru_cache(maxsize=1)
+def _stop_words() -> frozenset:
+    # sklearn is imported on first use to keep app startup fast
+    from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+    return frozenset(ENGLISH_STOP_WORDS)
+
+
+def _terms(text: str) -> Counter:
+    return Counter(
+        w for w in (m.lower() for m in _WORD.findall(text))
+        if w not in _stop_words()
+    )
+
+
+def _record(state: dict, cluster: int, text: str, distance: float) -> None:
+    state["sizes"][cluster] += 1
+
+    terms = state["terms"].setdefault(cluster, Counter())
+    terms.update(_terms(text))
+    if len(terms) > MAX_TERMS_PER_CLUSTER * 2:
+        state["terms"][cluster] = Counter(dict(terms.most_common(MAX_TERMS_PER_CLUSTER)))
+
+    samples = state["samples"].setdefault(cluster, [])
+    samples.append((float(distance), text[:300]))
+    samples.sort(key=lambda s: s[0])
+    del samples[MAX_SAMPLES_PER_CLUSTER:]
+
+
+def _fit_and_assign(state: dict, ids: List[str], vectors: np.ndarray, texts: List[str]) -> Dict[str, int]:
+    kmeans = state["kmeans"]
+    kmeans.partial_fit(vectors)
+    distances = kmeans.transform(vectors)
+    clusters = distances.argmin(axis=1)
+    assigned = {}
+    for cid, text, cluster, dist in zip(ids, texts, clusters, distances):
+        cluster = int(cluster)
+        _record(state, cluster, text, dist[cluster])
+        assigned[cid] = cluster
+    return assigned
+
+
+def assign_themes(
+    chunk_ids: List[str],
+    chunk_texts: List[str],
+    embeddings: List[List[float]],
+    metadatas: List[Dict]
+) -> Dict[str, int]:
+    """
+    Updates the clusters with new chunks and writes `theme_cluster` into their
+    metadata (in place). Until enough chunks exist for a first fit, chunks are
+    held as pending with cluster -1.
+
+    Returns assignments for previously pending chunks that were clustered by
+    this call; the caller must write those to the vector store.
+    """
+    n_clusters = settings.THEME_CLUSTERS
+    backfilled: Dict[str, int] = {}
+
+    with _lock():
+        state = _load_state()
+        if state["kmeans"] is None:
+            for cid, text, vec in zip(chunk_ids, chunk_texts, embeddings):
+                state["pending"][cid] = (vec, text)
+            for md in metadatas:
+                md["theme_cluster"] = UNASSIGNED
+
+            if len(state["pending"]) >= n_clusters:
+                from sklearn.cluster import MiniBatchKMeans  # heavy; only needed once per corpus
+                state["kmeans"] = MiniBatchKMeans(n_clusters=n_clusters, random_state=0, n_init=3)
+                pending_ids = list(state["pending"])
+                vectors = np.asarray([state["pending"][cid][0] for cid in pending_ids], dtype=np.float32)
+                texts = [state["pending"][cid][1] for cid in pending_ids]
+                assigned = _fit_and_assign(state, pending_ids, vectors, texts)
+                state["pending"] = {}
+                for cid, md in zip(chunk_ids, metadatas):
+                    md["theme_cluster"] = assigned[cid]
+                new_ids = set(chunk_ids)
+                backfilled = {cid: c for cid, c in assigned.items() if cid not in new_ids}
+                logger.info(f"🏷️ Fitted {n_clusters} theme clusters on {len(pending_ids)} chunks")
+        else:
+            vectors = np.asarray(embeddings, dtype=np.float32)
+            assigned = _fit_and_assign(state, chunk_ids, vectors, chunk_texts)
+            for cid, md in zip(chunk_ids, metadatas):
+                md["theme_cluster"] = assigned[cid]
+
+        _save_state(state)
+
+    if _drifted_clusters(state):
+        schedule_relabel()
+    return backfilled
+
+
+def _drifted_clusters(state: dict) -> List[int]:
+    """Clusters that are unlabelled, grew substantially, or whose centre moved."""
+    kmeans = state["kmeans"]
+    if kmeans is None:
+        return []
+    drifted = []
+    for cluster in range(kmeans.n_clusters):
+        size = state["sizes"].get(cluster, 0)
+        if not size:
+            continue
+        if cluster not in state["labels"]:
+            drifted.append(cluster)
+            continue
+        if size >= state["labeled_sizes"].get(cluster, 0) * settings.THEME_RELABEL_GROWTH:
+            drifted.append(cluster)
+            continue
+        old = state["labeled_centers"].get(cluster)
+        new = kmeans.cluster_centers_[cluster]
+        if old is not None:
+            cosine = float(np.dot(old, new) / ((np.linalg.norm(old) * np.linalg.norm(new)) or 1.0))
+            if 1.0 - cosine > settings.THEME_RELABEL_SHIFT:
+                drifted.append(cluster)
+    return drifted
+
+
+def keyword_label(terms: Counter) -> str:
+    top = [t for t, _ in terms.most_common(3)]
+    return " / ".join(t.title() for t in top) if top else "Miscellaneous"
+
+
+def _llm_label(terms: Counter, samples: List[Tuple[float, str]]) -> str:
+    # Imported here: llm_service depends on this module
+    from app.services.llm_service import get_llm, DETERMINISTIC_TEMPERATURE
+    from app.services.llm_scheduler import llm_priority, BACKGROUND
+
+    prompt = (
+        "You are labelling a group of related document passages with a short theme name "
+        "(2-5 words, e.g. \"Regulatory Compliance\").\n\n"
+        f"Frequent terms: {', '.join(t for t, _ in terms.most_common(15))}\n\n"
+        "Representative passages:\n"
+        + "\n".join(f"- {snippet}" for _, snippet in samples)
+        + '\n\nRespond in JSON: { "label": "..." }'
+    )
+    with llm_priority(BACKGROUND):
+        response = get_llm(DETERMINISTIC_TEMPERATURE).invoke(prompt)
+    text = str(getattr(response, "content", response)).strip()
+    try:
+        return str(json.loads(text)["label"]).strip()
+    except Exception:
+        return text.splitlines()[0].strip("-•*\"' \t") if text else ""
+
+
+def relabel_clusters(force: bool = False) -> Dict[int, str]:
+    """
+    Labels every cluster that is new or has drifted since it was last
+    labelled (or all clusters with `force`). One LLM call per cluster at
+    background priority; falls back to a keyword label if the call fails.
+    """
+    try:
+        # Only one worker relabels at a time; the others simply skip.
+        relabel_lock = FileLock(settings.THEME_MODEL_PATH + ".relabel.lock", timeout=0)
+        relabel_lock.acquire()
+    except Timeout:
+        return {}
+
+    try:
+        with _lock():
+            state = _load_state()
+            kmeans = state["kmeans"]
+            if kmeans is None:
+                return {}
+            clusters = [c for c in range(kmeans.n_clusters) if state["sizes"].get(c)] if force else _drifted_clusters(state)
+            work = {c: (state["terms"].get(c, Counter()), list(state["samples"].get(c, []))) for c in clusters}
+
+        # LLM calls happen outside the state lock so ingest is never blocked on them
+        labels = {}
+        for cluster, (terms, samples) in work.items():
+            try:
+                label = _llm_label(terms, samples) or keyword_label(terms)
+            except Exception as e:
+                logger.warning(f"⚠️ LLM labelling failed for cluster {cluster}: {e}")
+                label = keyword_label(terms)
+            labels[cluster] = label
+
+        with _lock():
+            state = _load_state()
+            for cluster, label in labels.items():
+                state["labels"][cluster] = label
+                state["labeled_sizes"][cluster] = state["sizes"].get(cluster, 0)
+                state["labeled_centers"][cluster] = np.array(state["kmeans"].cluster_centers_[cluster])
+            _save_state(state)
+        if labels:
+            logger.info(f"🏷️ Relabelled {len(labels)} theme clusters")
+        return labels
+    finally:
+        relabel_lock.release()
+
+
+def schedule_relabel() -> None:
+    """Relabel drifted clusters on a background thread (at most one per process)."""
+    global _relabel_thread
+    if _relabel_thread is not None and _relabel_thread.is_alive():
+        return
+    _relabel_thread = threading.Thread(target=relabel_clusters, name="theme-relabel", daemon=True)
+    _relabel_thread.start()
+
+
+def themes_for_chunks(metadatas: List[Dict], limit: int = 5) -> List[str]:
+    """
+    Theme labels for a set of retrieved chunks, most frequent first.
+    A dictionary lookup over cached state; no model or LLM is invoked.
+    """
+    counts = Counter(
+        md.get("theme_cluster") for md in metadatas
+        if md.get("theme_cluster") not in (None, UNASSIGNED)
+    )
+    if not counts:
+        return []
+    state = _load_state()
+    themes = []
+    for cluster, _ in counts.most_common():
+        label = state["labels"].get(int(cluster)) or keyword_label(state["terms"].get(int(cluster), Counter()))
+        if label not in themes:
+            themes.append(label)
+    return themes[:limit]
+
+
+def themes_for_embeddings(embeddings: List[List[float]], limit: int = 5) -> List[str]:
+    """Theme labels for arbitrary texts by assigning their embeddings to the nearest cluster."""
+    state = _load_state()
+    if state["kmeans"] is None or not embeddings:
+        return []
+    clusters = state["kmeans"].predict(np.asarray(embeddings, dtype=np.float32))
+    return themes_for_chunks([{"theme_cluster": int(c)} for c in clusters], limit=limit)
+
+
+def backfill_corpus(persist_path: Optional[str] = None) -> int:
+    """
+    Clusters every chunk already in the vector store that has no
+    `theme_cluster` yet (e.g. chunks ingested before clustering existed).
+    """
+    from app.services.vector_store import iter_chunk_batches, update_chunk_metadata
+    from app.services.chunk_store import lookup_chunks
+
+    total = 0
+    for batch in iter_chunk_batches(persist_path):
+        todo = [
+            i for i, md in enumerate(batch["metadatas"])
+            if (md or {}).get("theme_cluster") in (None, UNASSIGNED)
+        ]
+        if not todo:
+            continue
+        ids = [batch["ids"][i] for i in todo]
+        metadatas = [{} for _ in todo]
+        rows = lookup_chunks(ids)
+        backfilled = assign_themes(
+            ids,
+            [rows[cid]["text"] if cid in rows else batch["documents"][i] or "" for cid, i in zip(ids, todo)],
+            [list(batch["embeddings"][i]) for i in todo],
+            metadatas
+        )
+        updates = {cid: {"theme_cluster": md["theme_cluster"]} for cid, md in zip(ids, metadatas)}
+        updates.update({cid: {"theme_cluster": c} for cid, c in backfilled.items()})
+        update_chunk_metadata(updates, persist_path)
+        total += len(ids)
+    relabel_clusters()
+    return total
+
+
+if __name__ == "__main__":
+    # python -m app.services.theme_service  -> cluster existing chunks and label them
+    from app.logging_config import configure_logging
+    configure_logging()
+    count = backfill_corpus()
+    print(f"✅ Clustered {count} existing chunks.")
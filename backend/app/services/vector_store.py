@@ -2,11 +2,15 @@
 
 import os
 import logging
-from typing import Optional, List, Dict
+import threading
+from typing import TYPE_CHECKING, Optional, List, Dict
 
 from langchain_community.vectorstores import Chroma
-from langchain.embeddings import HuggingFaceEmbeddings
 from app.config import settings
+from app.services.metrics import timed
+
+if TYPE_CHECKING:
+    from langchain.embeddings import HuggingFaceEmbeddings
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -14,49 +18,252 @@ logger = logging.getLogger(__name__)
 # Configuration: default directory for persisted vector store
 PERSIST_PATH = os.getenv("CHROMA_PERSIST_PATH", "./chroma_store")
 
-# Initialize embedding function
 embedding_model = settings.EMBEDDING_MODEL or "sentence-transformers/all-MiniLM-L6-v2"
-embedding_function = HuggingFaceEmbeddings(model_name=embedding_model)
+_embedding_function: Optional["HuggingFaceEmbeddings"] = None
+_embedding_lock = threading.Lock()
+
+# Chroma's default collection name
+DEFAULT_COLLECTION = "langchain"
+
+
+def get_embedding_function() -> "HuggingFaceEmbeddings":
+    """The shared embedding model, loaded on first use."""
+    global _embedding_function
+    if _embedding_function is None:
+        with _embedding_lock:
+            if _embedding_function is None:
+                from langchain.embeddings import HuggingFaceEmbeddings
+                _embedding_function = HuggingFaceEmbeddings(model_name=embedding_model)
+                logger.info("✅ Loaded embedding model: %s", embedding_model)
+    return _embedding_function
+
+
+def sidecar_client():
+    """Client for the embedding sidecar, or None when this process owns the model and index."""
+    if not settings.EMBEDDING_SIDECAR_SOCKET:
+        return None
+    from app.services.sidecar import get_client
+    return get_client(settings.EMBEDDING_SIDECAR_SOCKET)
+
+
+def _store_path(persist_path: Optional[str]) -> str:
+    # Absolute, so the sidecar resolves it the same way regardless of its cwd
+    return os.path.abspath(persist_path or PERSIST_PATH)
+
+
+def load_local_store(persist_path: Optional[str] = None, collection: Optional[str] = None) -> Chroma:
+    return Chroma(
+        collection_name=collection or DEFAULT_COLLECTION,
+        persist_directory=persist_path or PERSIST_PATH,
+        embedding_function=get_embedding_function()
+    )
 
 
 def load_vector_store(persist_path: Optional[str] = None) -> Chroma:
     """
-    Loads an existing Chroma vector store.
+    Loads an existing Chroma vector store. With EMBEDDING_SIDECAR_SOCKET set,
+    returns a search-only proxy to the sidecar's store instead.
     """
     path = persist_path or PERSIST_PATH
+    client = sidecar_client()
+    if client is not None:
+        from app.services.sidecar import SidecarStore
+        return SidecarStore(client, _store_path(path))
     try:
-        vector_store = Chroma(
-            persist_directory=path,
-            embedding_function=embedding_function
-        )
-        logger.info(f"✅ Loaded Chroma vector store from: {path}")
+        vector_store = load_local_store(path)
+        logger.debug("✅ Loaded Chroma vector store from: %s", path)
         return vector_store
     except Exception as e:
-        logger.error(f"❌ Failed to load vector store at {path}: {e}", exc_info=True)
+        logger.error("❌ Failed to load vector store at %s: %s", path, e, exc_info=True)
         raise
 
 
+@timed("embedding")
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """Embed a batch of texts with the shared embedding model."""
+    client = sidecar_client()
+    if client is not None:
+        return client.call("embed", texts=texts)
+    return get_embedding_function().embed_documents(texts)
+
+
+@timed("embedding.query")
+def embed_query(text: str) -> List[float]:
+    client = sidecar_client()
+    if client is not None:
+        return client.call("embed", texts=[text])[0]
+    return get_embedding_function().embed_query(text)
+
+
+@timed("vector_store.add")
 def add_chunks_to_store(
     chunk_texts: List[str],
     chunk_ids: List[str],
     metadatas: List[Dict],
-    persist_path: Optional[str] = None
+    persist_path: Optional[str] = None,
+    embeddings: Optional[List[List[float]]] = None,
+    store_text: bool = True
 ) -> None:
     """
     Adds new text chunks to the vector store with metadata and persists them.
+    Pass precomputed `embeddings` to avoid embedding the texts a second time.
+    With `store_text=False` (requires `embeddings`) only ids, vectors and
+    metadata are kept; the text is read back from the chunks table.
     """
-    try:
-        vector_store = load_vector_store(persist_path)
+    if not store_text:
+        chunk_texts = [""] * len(chunk_ids)
+    client = sidecar_client()
+    if client is not None:
+        client.call("add_chunks", texts=chunk_texts, ids=chunk_ids, metadatas=metadatas,
+                    persist_path=_store_path(persist_path), embeddings=embeddings)
+        return
+    # Failures propagate: callers must not record chunks the store never got
+    vector_store = load_vector_store(persist_path)
+    if embeddings is not None:
+        vector_store._collection.upsert(
+            ids=chunk_ids,
+            embeddings=embeddings,
+            metadatas=metadatas,
+            documents=chunk_texts
+        )
+    else:
         vector_store.add_texts(
             texts=chunk_texts,
             metadatas=metadatas,
             ids=chunk_ids
         )
-        vector_store.persist()
-        store_path = persist_path or PERSIST_PATH
-        logger.info(f"✅ Added {len(chunk_texts)} chunks to Chroma vector store at {store_path}.")
-    except Exception as e:
-        logger.error(f"❌ Failed to add chunks to vector store: {e}", exc_info=True)
+    vector_store.persist()
+    store_path = persist_path or PERSIST_PATH
+    logger.info("✅ Added %s chunks to Chroma vector store at %s.", len(chunk_texts), store_path)
+
+
+@timed("vector_store.update")
+def update_chunk_metadata(
+    updates: Dict[str, Dict],
+    persist_path: Optional[str] = None
+) -> None:
+    """
+    Merges the given fields into the metadata of existing chunks, keyed by chunk id.
+    """
+    if not updates:
+        return
+    client = sidecar_client()
+    if client is not None:
+        client.call("update_metadata", updates=updates, persist_path=_store_path(persist_path))
+        return
+    vector_store = load_local_store(persist_path)
+    ids = list(updates)
+    current = vector_store._collection.get(ids=ids, include=["metadatas"])
+    merged = {cid: dict(md or {}) for cid, md in zip(current["ids"], current["metadatas"])}
+    for cid, fields in updates.items():
+        if cid in merged:
+            merged[cid].update(fields)
+    if merged:
+        vector_store._collection.update(ids=list(merged), metadatas=list(merged.values()))
+
+
+@timed("vector_store.delete")
+def delete_chunks(
+    chunk_ids: List[str],
+    persist_path: Optional[str] = None,
+    collection: Optional[str] = None
+) -> None:
+    """Removes chunks (or, with `collection`, summaries) from the store by id."""
+    if not chunk_ids:
+        return
+    client = sidecar_client()
+    if client is not None:
+        client.call("delete", ids=chunk_ids, persist_path=_store_path(persist_path), collection=collection)
+        return
+    load_local_store(persist_path, collection)._collection.delete(ids=chunk_ids)
+
+
+def chunk_ids_for_document(doc_uid: str, persist_path: Optional[str] = None) -> List[str]:
+    """Ids of every chunk stored for a document, from its vector store metadata."""
+    client = sidecar_client()
+    if client is not None:
+        return client.call("get", persist_path=_store_path(persist_path), where={"doc_id": doc_uid},
+                           limit=None, offset=None, include=[])["ids"]
+    return load_local_store(persist_path)._collection.get(where={"doc_id": doc_uid}, include=[])["ids"]
+
+
+def iter_chunk_batches(
+    persist_path: Optional[str] = None,
+    batch_size: int = 512,
+    include: Optional[List[str]] = None
+):
+    """
+    Pages through every chunk in the store, yielding Chroma `get` results.
+    """
+    client = sidecar_client()
+    include = include or ["metadatas", "documents", "embeddings"]
+    if client is None:
+        collection = load_local_store(persist_path)._collection
+        get = lambda offset: collection.get(include=include, limit=batch_size, offset=offset)
+    else:
+        path = _store_path(persist_path)
+        get = lambda offset: client.call("get", persist_path=path, limit=batch_size, offset=offset, include=include)
+    offset = 0
+    while True:
+        batch = get(offset)
+        if not batch["ids"]:
+            return
+        yield batch
+        offset += len(batch["ids"])
+
+
+SUMMARY_COLLECTION = "document_summaries"
+
+
+def load_summary_store(persist_path: Optional[str] = None) -> Chroma:
+    """
+    Loads the collection holding one embedded summary per document.
+    """
+    return load_local_store(persist_path, SUMMARY_COLLECTION)
+
+
+def search_summaries(query: str, k: int, persist_path: Optional[str] = None) -> List[str]:
+    """doc_uids of the documents whose embedded summary is closest to `query`, best first."""
+    client = sidecar_client()
+    if client is not None:
+        from app.services.sidecar import SidecarStore
+        store = SidecarStore(client, _store_path(persist_path), SUMMARY_COLLECTION)
+    else:
+        store = load_summary_store(persist_path)
+    hits = store.similarity_search_with_score(query, k=k)
+    return [doc.metadata["doc_id"] for doc, _ in hits if doc.metadata.get("doc_id")]
+
+
+def add_document_summary(
+    doc_uid: str,
+    summary_text: str,
+    metadata: Dict,
+    persist_path: Optional[str] = None
+) -> None:
+    """
+    Stores (or replaces) the embedded summary of a document, keyed by its doc_uid.
+    """
+    client = sidecar_client()
+    if client is not None:
+        client.call("add_summary", doc_uid=doc_uid, text=summary_text, metadata=metadata,
+                    persist_path=_store_path(persist_path))
+        return
+    upsert_summary(doc_uid, summary_text, embed_texts([summary_text])[0], metadata, persist_path)
+
+
+def upsert_summary(
+    doc_uid: str,
+    summary_text: str,
+    embedding: List[float],
+    metadata: Dict,
+    persist_path: Optional[str] = None
+) -> None:
+    load_summary_store(persist_path)._collection.upsert(
+        ids=[doc_uid],
+        embeddings=[embedding],
+        metadatas=[metadata],
+        documents=[summary_text]
+    )
 
 
 def query_similar_chunks(
@@ -84,5 +291,5 @@ def query_similar_chunks(
             for doc, score in results
         ]
     except Exception as e:
-        logger.error(f"❌ Similarity search failed: {e}", exc_info=True)
+        logger.error("❌ Similarity search failed: %s", e, exc_info=True)
         return []
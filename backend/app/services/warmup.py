@@ -0,0 +1,105 @@
+# backend/app/services/warmup.py
+
+import time
+import logging
+import importlib
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_embeddings() -> None:
+    from app.services.vector_store import sidecar_client, get_embedding_function
+
+    client = sidecar_client()
+    if client is not None:
+        client.call("stats")  # the sidecar holds the model; just check it answers
+    else:
+        get_embedding_function().embed_query("warmup")
+
+
+def _warm_tokenizer() -> None:
+    from app.core.chunker import get_tokenizer
+
+    get_tokenizer()("warmup")
+
+
+def _warm_llm() -> None:
+    from app.services.llm_service import get_llm, get_doc_qa_chain
+
+    get_llm()
+    get_doc_qa_chain()
+
+
+def _warm_ocr() -> None:
+    for module in ("pytesseract", "pdf2image", "pdfminer.high_level", "docx", "PIL.Image"):
+        importlib.import_module(module)
+
+
+# Loaded in this order; /readyz waits for the REQUIRED ones
+WARMUPS: Dict[str, Callable[[], None]] = {
+    "embeddings": _warm_embeddings,
+    "tokenizer": _warm_tokenizer,
+    "llm": _warm_llm,
+    "ocr": _warm_ocr,
+}
+REQUIRED = ("embeddings", "tokenizer")
+
+_status: Dict[str, Dict[str, Any]] = {name: {"state": "pending"} for name in WARMUPS}
+_thread: threading.Thread = None
+_lock = threading.Lock()
+
+
+def warm_up(names: Iterable[str] = tuple(WARMUPS)) -> None:
+    for name in names:
+        # A component being retried stays "failed" until it loads
+        if _status[name]["state"] != "failed":
+            _status[name] = {"state": "loading"}
+        started = time.perf_counter()
+        try:
+            WARMUPS[name]()
+            _status[name] = {"state": "ready", "seconds": round(time.perf_counter() - started, 3)}
+            logger.info(f"🔥 Warmed up {name} in {_status[name]['seconds']}s")
+        except Exception as e:
+            _status[name] = {"state": "failed", "error": str(e)}
+            logger.warning(f"⚠️ Warmup of {name} failed, it will load on first use: {e}")
+
+
+def start_warmup() -> None:
+    """
+    Loads models and heavy libraries in a background thread. Once that has
+    finished, calling it again retries the required components that failed.
+    """
+    global _thread
+    with _lock:
+        if _thread is None:
+            names = tuple(WARMUPS)
+        elif _thread.is_alive():
+            return
+        else:
+            names = tuple(name for name in REQUIRED if _status[name]["state"] == "failed")
+            if not names:
+                return
+        _thread = threading.Thread(target=warm_up, args=(names,), name="warmup", daemon=True)
+        _thread.start()
+
+
+def readiness() -> Tuple[str, List[str]]:
+    """
+    ("ready", []), ("loading", components) or ("failed", components) for the
+    REQUIRED components. Loading starts here if it hasn't yet (with
+    PREWARM_ON_STARTUP off, on the first readiness probe), and components
+    that failed are retried in the background.
+    """
+    start_warmup()
+    failed = [name for name in REQUIRED if _status[name]["state"] == "failed"]
+    if failed:
+        return "failed", failed
+    waiting = [name for name in REQUIRED if _status[name]["state"] != "ready"]
+    return ("loading", waiting) if waiting else ("ready", [])
+
+
+def warmup_status() -> Dict[str, Dict[str, Any]]:
+    return dict(_status)
@@ -0,0 +1,117 @@
+# backend/benchmarks/bench_ocr_preprocessing.py
+"""
+OCR accuracy vs. time for each preprocessing step.
+
+    cd backend
+    python -m benchmarks.bench_ocr_preprocessing --samples path/to/scans
+
+The samples directory holds scanned PDFs and images (png, jpg, tif). A
+`<name>.txt` next to a sample is its ground truth; samples without one are
+timed but not scored. Accuracy is word-level similarity to the ground truth
+(difflib), so 1.0 means every word was read correctly and in order.
+
+Each variant adds one step on top of the previous one; `adaptive` is what
+ingest uses (DPI from text size for PDFs, rescaling for images).
+"""
+
+import argparse
+import difflib
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+import pytesseract
+from pdf2image import convert_from_path, pdfinfo_from_path
+from PIL import Image, ImageSequence
+
+from app.config import settings
+from app.core.preprocessing import (
+    PROBE_DPI, PreprocessOptions, RAW, probe_page, preprocess_image
+)
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp"}
+FIXED_DPI = 200  # pdf2image's default
+
+VARIANTS: Dict[str, PreprocessOptions] = {
+    "raw": RAW,
+    "grayscale": PreprocessOptions(rescale=False, crop=False, deskew=False, binarize=False),
+    "+binarize": PreprocessOptions(rescale=False, crop=False, deskew=False),
+    "+crop": PreprocessOptions(rescale=False, deskew=False),
+    "+deskew": PreprocessOptions(rescale=False),
+    "adaptive": PreprocessOptions(),
+}
+
+
+def word_accuracy(text: str, truth: str) -> float:
+    return difflib.SequenceMatcher(None, text.split(), truth.split(), autojunk=False).ratio()
+
+
+def render(path: str, page: int, dpi: int) -> Image.Image:
+    poppler = {"poppler_path": settings.POPPLER_PATH} if settings.POPPLER_PATH else {}
+    return convert_from_path(path, dpi=dpi, first_page=page, last_page=page, **poppler)[0]
+
+
+def ocr_pdf(path: str, name: str, options: PreprocessOptions) -> List[Optional[str]]:
+    """Text per page (None for pages skipped as blank)."""
+    poppler = {"poppler_path": settings.POPPLER_PATH} if settings.POPPLER_PATH else {}
+    texts = []
+    for page in range(1, int(pdfinfo_from_path(path, **poppler)["Pages"]) + 1):
+        if name == "adaptive":
+            dpi = probe_page(render(path, page, PROBE_DPI))
+            if dpi is None:
+                texts.append(None)
+                continue
+            # Same as ingest: rendered at the right size, so no rescale
+            image = preprocess_image(render(path, page, dpi), PreprocessOptions(rescale=False))
+        else:
+            image = preprocess_image(render(path, page, FIXED_DPI), options)
+        texts.append(pytesseract.image_to_string(image) if image is not None else None)
+    return texts
+
+
+def ocr_image(path: str, name: str, options: PreprocessOptions) -> List[Optional[str]]:
+    texts = []
+    with Image.open(path) as img:
+        for frame in ImageSequence.Iterator(img):
+            image = preprocess_image(frame.copy(), options)
+            texts.append(pytesseract.image_to_string(image) if image is not None else None)
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", required=True, help="directory of PDFs/images with optional .txt ground truth")
+    parser.add_argument("--variants", nargs="*", default=list(VARIANTS), choices=list(VARIANTS))
+    args = parser.parse_args()
+
+    samples = sorted(
+        os.path.join(args.samples, f) for f in os.listdir(args.samples)
+        if os.path.splitext(f)[1].lower() in IMAGE_EXTENSIONS | {".pdf"}
+    )
+    if not samples:
+        parser.error(f"No PDFs or images in {args.samples}")
+
+    print(f"{len(samples)} samples\n")
+    print(f"{'variant':<12}{'seconds':>10}{'ms/page':>10}{'pages':>7}{'blank':>7}{'accuracy':>10}")
+    for name in args.variants:
+        options = VARIANTS[name]
+        elapsed, pages, blank, scores = 0.0, 0, 0, []
+        for path in samples:
+            ocr: Callable = ocr_pdf if path.lower().endswith(".pdf") else ocr_image
+            started = time.perf_counter()
+            texts = ocr(path, name, options)
+            elapsed += time.perf_counter() - started
+            pages += len(texts)
+            blank += sum(t is None for t in texts)
+
+            truth_path = os.path.splitext(path)[0] + ".txt"
+            if os.path.exists(truth_path):
+                with open(truth_path, encoding="utf-8") as f:
+                    scores.append(word_accuracy("\n".join(t for t in texts if t), f.read()))
+
+        accuracy = f"{sum(scores) / len(scores):.3f}" if scores else "-"
+        print(f"{name:<12}{elapsed:>10.2f}{1000 * elapsed / max(pages, 1):>10.0f}{pages:>7}{blank:>7}{accuracy:>10}")
+
+
+if __name__ == "__main__":
+    main()
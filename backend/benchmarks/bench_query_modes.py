@@ -0,0 +1,71 @@
+# backend/benchmarks/bench_query_modes.py
+"""
+Latency per query mode against the local vector store.
+
+    cd backend
+    LLM_PROVIDER=fake FAKE_LLM_LATENCY_MS=400 FAKE_LLM_TOKENS_PER_SECOND=200 \\
+        python -m benchmarks.bench_query_modes --questions questions.txt --runs 20
+
+With the fake provider the numbers isolate our own overhead (retrieval,
+embedding, highlighting, orchestration) from provider latency; point
+LLM_PROVIDER at a real provider to measure end-to-end latency.
+"""
+
+import argparse
+import statistics
+import time
+
+from app.services.llm_service import generate_answer, QUERY_MODES
+from app.services.llm_cache import set_cache_bypass
+from app.services.vector_store import PERSIST_PATH
+
+# p95 targets in milliseconds, kept in sync with docs/api_reference.md
+TARGETS_MS = {"fast": 300, "standard": 3000, "full": 15000}
+
+DEFAULT_QUESTIONS = [
+    "What are the payment terms?",
+    "Who are the parties to the agreement?",
+    "What penalties apply for late delivery?",
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", help="file with one question per line")
+    parser.add_argument("--runs", type=int, default=10, help="passes over the question list per mode")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--persist", default=PERSIST_PATH)
+    args = parser.parse_args()
+
+    questions = DEFAULT_QUESTIONS
+    if args.questions:
+        with open(args.questions, encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+
+    # Measure real work, not cache replays
+    set_cache_bypass(True)
+
+    # Warm up models and connections once
+    generate_answer(args.persist, questions[0], mode="fast", top_k=args.top_k)
+
+    print(f"{'mode':<10}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'target':>10}  ok")
+    for mode in QUERY_MODES:
+        timings = []
+        for _ in range(args.runs):
+            for q in questions:
+                start = time.perf_counter()
+                generate_answer(args.persist, q, mode=mode, top_k=args.top_k)
+                timings.append((time.perf_counter() - start) * 1000)
+        p95 = percentile(timings, 95)
+        print(f"{mode:<10}{len(timings):>5}{statistics.median(timings):>10.1f}{p95:>10.1f}"
+              f"{max(timings):>10.1f}{TARGETS_MS[mode]:>10}  {'✅' if p95 <= TARGETS_MS[mode] else '❌'}")
+
+
+if __name__ == "__main__":
+    main()
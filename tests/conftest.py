@@ -0,0 +1,9 @@
+# conftest.py
+
+import os
+import sys
+
+# Tests import the backend as `app`, the same way uvicorn does from backend/
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
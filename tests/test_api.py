@@ -1 +1,55 @@
-# test_api.py
\ No newline at end of file
+# test_api.py
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+
+# Importing the app must not load models or OCR/NLP libraries; they load on
+# first use or in the background warmup.
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "5"))
+HEAVY_MODULES = [
+    "torch",
+    "sentence_transformers",
+    "transformers",
+    "sklearn",
+    "nltk",
+    "pytesseract",
+    "pdf2image",
+    "pdfminer",
+    "docx",
+    "langchain_groq",
+]
+
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+@pytest.fixture(scope="module")
+def import_probe():
+    pytest.importorskip("fastapi")
+    pytest.importorskip("langchain_community")
+    env = dict(os.environ, PREWARM_ON_STARTUP="false")
+    # A fresh interpreter, so nothing is already imported
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_app_import_skips_heavy_dependencies(import_probe):
+    assert import_probe["loaded"] == []
+
+
+def test_app_import_within_budget(import_probe):
+    assert import_probe["seconds"] < IMPORT_BUDGET_SECONDS
@@ -0,0 +1,83 @@
+# test_chunk_store.py
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base, Chunk
+from app.services import chunk_store
+from app.services.chunk_store import hydrate, insert_chunks, lookup_chunks, page_range
+
+
+def test_page_range_spans_the_paragraphs_a_chunk_touches():
+    starts, pages = [0, 100, 250], [1, 2, 3]
+    assert page_range(starts, pages, 10, 90) == (1, 1)
+    assert page_range(starts, pages, 90, 260) == (1, 3)
+    assert page_range(starts, pages, 100, 100) == (2, 2)
+    assert page_range([], [], 0, 10) == (None, None)
+
+
+def test_insert_chunks_commits_in_batches(monkeypatch, tmp_path):
+    monkeypatch.setattr(chunk_store.settings, "CHUNK_INSERT_BATCH_SIZE", 2)
+
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'chunks.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            commits = []
+            commit = db.commit
+            monkeypatch.setattr(db, "commit", lambda: commits.append(1) or commit())
+            await insert_chunks(db, 7, [{"chunk_id": f"c{i}", "text": f"t{i}"} for i in range(5)])
+            stored = (await db.execute(select(Chunk.document_id, Chunk.chunk_id))).all()
+        await engine.dispose()
+        return commits, stored
+
+    commits, stored = asyncio.run(scenario())
+
+    assert len(commits) == 3
+    assert stored == [(7, f"c{i}") for i in range(5)]
+
+
+@pytest.fixture
+def chunk_rows(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'chunks.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(chunk_store, "SessionLocal", factory)
+    monkeypatch.setattr(chunk_store, "LOOKUP_BATCH", 2)
+    with factory() as db:
+        db.add_all([
+            Chunk(document_id=1, chunk_id="a", text="old a", page_start=1, page_end=1),
+            Chunk(document_id=1, chunk_id="b", text="b", page_start=2, page_end=3),
+            Chunk(document_id=2, chunk_id="a", text="new a", page_start=4, page_end=4),
+            Chunk(document_id=2, chunk_id="c", text="c", page_start=5, page_end=5),
+        ])
+        db.commit()
+    yield
+    engine.dispose()
+
+
+def test_lookup_returns_the_newest_row_per_chunk(chunk_rows):
+    found = lookup_chunks(["a", "b", "c", "missing", None, "a"])
+    assert found == {
+        "a": {"text": "new a", "page_start": 4, "page_end": 4},
+        "b": {"text": "b", "page_start": 2, "page_end": 3},
+        "c": {"text": "c", "page_start": 5, "page_end": 5},
+    }
+
+
+def test_hydrate_fills_text_and_keeps_legacy_chunks(chunk_rows):
+    docs = [SimpleNamespace(page_content="", metadata={"chunk_id": "b"}),
+            SimpleNamespace(page_content="from chroma", metadata={"chunk_id": "legacy"})]
+    hydrate(docs)
+    assert (docs[0].page_content, docs[0].metadata["page_start"], docs[0].metadata["page_end"]) == ("b", 2, 3)
+    assert docs[1].page_content == "from chroma" and "page_start" not in docs[1].metadata
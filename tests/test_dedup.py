@@ -0,0 +1,73 @@
+# test_dedup.py
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("mmh3")
+pytest.importorskip("numpy")
+
+from app.core.dedup import DedupIndex, minhash, partition_chunks, similarity
+
+CLAUSE = ("The tenant shall pay the monthly rent on the first business day of each month "
+          "to the account named by the landlord, and late payments accrue interest at two percent.")
+EDITED = CLAUSE.replace("two percent", "three percent")
+OTHER = "Personal data is processed only for the purposes listed in the annex and deleted after one year."
+
+
+@pytest.fixture
+def index(tmp_path):
+    return DedupIndex(str(tmp_path / "dedup.sqlite3"), threshold=0.8)
+
+
+def test_signatures_are_stable_and_close_for_near_duplicates():
+    assert (minhash(CLAUSE) == minhash(CLAUSE)).all()
+    assert similarity(minhash(CLAUSE), minhash(EDITED)) >= 0.8
+    assert similarity(minhash(CLAUSE), minhash(OTHER)) < 0.2
+    assert minhash("  ...  ") is None
+
+
+def test_repeats_within_a_document_are_duplicates(index):
+    keep, duplicates, signatures = partition_chunks(index, ["a", "b", "c"], [CLAUSE, OTHER, CLAUSE])
+    assert keep == [0, 1]
+    assert duplicates == {"c": "a"}
+    assert set(signatures) == {"a", "b"}
+
+
+def test_stored_chunks_match_other_documents_but_not_the_excluded_one(index):
+    _, _, signatures = partition_chunks(index, ["a"], [CLAUSE])
+    index.add_canonical([("a", "doc-1", signatures["a"])])
+
+    assert partition_chunks(index, ["x"], [EDITED])[1] == {"x": "a"}
+    assert partition_chunks(index, ["x"], [EDITED], exclude_doc="doc-1")[1] == {}
+
+
+def test_retire_promotes_a_reference_or_deletes(index):
+    _, _, signatures = partition_chunks(index, ["a", "b"], [CLAUSE, OTHER])
+    index.add_canonical([("a", "doc-1", signatures["a"]), ("b", "doc-1", signatures["b"])])
+    index.add_refs([("x", "a", "doc-2", '{"chunk_id": "x", "doc_id": "doc-2"}')])
+    assert index.refs_for(["a"]) == {"a": ['{"chunk_id": "x", "doc_id": "doc-2"}']}
+
+    deleted, promoted = index.retire(["a", "b"])
+
+    assert deleted == ["b"]
+    assert promoted == {"a": '{"chunk_id": "x", "doc_id": "doc-2"}'}
+    assert index.refs_for(["a"]) == {}
+    assert index.stats() == {"canonical_chunks": 1, "duplicate_refs": 0}
+    # The promoted chunk now belongs to doc-2, so doc-1's next version may match it
+    assert partition_chunks(index, ["y"], [CLAUSE], exclude_doc="doc-1")[1] == {"y": "a"}
+
+
+def test_lookups_stay_under_the_sqlite_variable_limit(index):
+    import sqlite3
+
+    if not hasattr(sqlite3, "SQLITE_LIMIT_VARIABLE_NUMBER"):
+        pytest.skip("needs Python 3.11")
+    # What older SQLite builds allow
+    index._conn().setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+    ids = [f"x{i}" for i in range(2500)]
+    index.add_refs([(cid, "a", "doc-2", "{}") for cid in ids])
+
+    assert len(index.refs_for(["a"] + ids)["a"]) == 2500
+    assert len(index.canonical_of(ids)) == 2500
+    assert index.retire(ids) == ([], {})
+    assert index.stats()["duplicate_refs"] == 0
@@ -0,0 +1,102 @@
+# test_document_text.py
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("aiosqlite")
+pytest.importorskip("httpx")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.document_routes import RangeNotSatisfiable, parse_byte_range, router
+from app.core.text_store import pack_text
+from app.db.models import Base, Document
+from app.db.session import get_async_db
+
+PARAGRAPHS = [{"text_snippet": f"Paragraph {i} " + "lorem ipsum " * 20, "page_number": 1 + i // 2} for i in range(6)]
+FULL_TEXT = "\n\n".join(p["text_snippet"] for p in PARAGRAPHS)
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "text.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add(Document(id=1, filename="a.pdf", file_path="a", doc_uid="uid1", **pack_text(FULL_TEXT, PARAGRAPHS)))
+        db.add(Document(id=2, filename="old.pdf", file_path="b", ocr_text="first\n\nsecond"))
+        db.commit()
+    engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(async_engine)
+
+    async def get_db():
+        async with sessions() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(router, prefix="/docs")
+    app.dependency_overrides[get_async_db] = get_db
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_full_text_is_compressed_and_revalidated(client):
+    response = client.get("/docs/1/text", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == FULL_TEXT
+    etag = response.headers["etag"]
+
+    cached = client.get("/docs/1/text", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert client.get("/docs/404/text").status_code == 404
+
+
+def test_byte_ranges(client):
+    response = client.get("/docs/1/text", headers={"Range": "bytes=0-8"})
+    assert response.status_code == 206
+    assert response.text == "Paragraph"
+    assert response.headers["content-range"] == f"bytes 0-8/{len(FULL_TEXT)}"
+    assert client.get("/docs/1/text", headers={"Range": f"bytes={len(FULL_TEXT)}-"}).status_code == 416
+    # A partial copy of another version gets the whole text
+    stale = client.get("/docs/1/text", headers={"Range": "bytes=0-8", "If-Range": '"other"'})
+    assert stale.status_code == 200 and stale.text == FULL_TEXT
+
+
+@pytest.mark.parametrize("header", ["bytes=abc", "bytes=5-2", "bytes=0-1,5-6", "items=0-1"])
+def test_malformed_and_multiple_ranges_get_the_whole_text(client, header):
+    response = client.get("/docs/1/text", headers={"Range": header})
+    assert response.status_code == 200
+    assert response.text == FULL_TEXT
+    assert "content-range" not in response.headers
+
+
+def test_paragraph_pages(client):
+    body = client.get("/docs/1/text", params={"para_start": 2, "para_end": 4}).json()
+    assert body["total_paragraphs"] == 6
+    assert [(p["index"], p["page"]) for p in body["paragraphs"]] == [(2, 2), (3, 2)]
+    assert body["paragraphs"][0]["text"] == PARAGRAPHS[2]["text_snippet"]
+
+    legacy = client.get("/docs/2/text", params={"para_start": 0}).json()
+    assert [p["text"] for p in legacy["paragraphs"]] == ["first", "second"]
+
+
+def test_parse_byte_range():
+    assert parse_byte_range("bytes=10-", 100) == (10, 100)
+    assert parse_byte_range("bytes=-10", 100) == (90, 100)
+    assert parse_byte_range("bytes=5-500", 100) == (5, 100)
+    assert parse_byte_range("bytes=-", 100) is None
+    assert parse_byte_range("items=0-1", 100) is None
+    assert parse_byte_range("bytes=5-2", 100) is None
+    assert parse_byte_range("bytes=0-1,5-6", 100) is None
+    for unsatisfiable in ("bytes=100-", "bytes=100-200", "bytes=-0"):
+        with pytest.raises(RangeNotSatisfiable):
+            parse_byte_range(unsatisfiable, 100)
+    with pytest.raises(RangeNotSatisfiable):
+        parse_byte_range("bytes=-10", 0)
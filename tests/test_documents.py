@@ -0,0 +1,91 @@
+# test_documents.py
+
+import asyncio
+import base64
+import datetime
+import json
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base, Document
+from app.services import document_listing
+from app.services.document_listing import (
+    DocumentFilters, InvalidCursor, decode_cursor, encode_cursor, stream_documents
+)
+
+
+def test_cursor_round_trip():
+    when = datetime.datetime(2026, 1, 2, 3, 4, 5)
+    assert decode_cursor(encode_cursor("upload_time", "desc", when, 7), "upload_time", "desc") == (when, 7)
+    assert decode_cursor(encode_cursor("author", "asc", None, 3), "author", "asc") == (None, 3)
+
+
+@pytest.mark.parametrize("payload", [
+    b"not json", b'["upload_time", "desc", "yesterday", 1]', b'["upload_time", "desc", null, "x"]', b'[1, 2]',
+])
+def test_malformed_cursors_are_invalid(payload):
+    cursor = base64.urlsafe_b64encode(payload).decode("ascii")
+    with pytest.raises(InvalidCursor, match="Malformed"):
+        decode_cursor(cursor, "upload_time", "desc")
+
+
+def test_cursor_from_another_sort_is_invalid():
+    with pytest.raises(InvalidCursor, match="different sort"):
+        decode_cursor(encode_cursor("filename", "asc", "a", 1), "filename", "desc")
+
+
+@pytest.fixture
+def documents(monkeypatch, tmp_path):
+    path = tmp_path / "docs.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        for i in range(7):
+            db.add(Document(filename=f"f{i}", file_path=f"p{i}", status="processed" if i != 3 else "superseded",
+                            author=None if i % 3 == 0 else f"a{i % 2}", ocr_text="x" * 1000,
+                            upload_time=datetime.datetime(2026, 1, 1 + i % 4)))
+        db.commit()
+    engine.dispose()
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    monkeypatch.setattr(document_listing, "AsyncSessionLocal", async_sessionmaker(async_engine))
+    yield
+    asyncio.run(async_engine.dispose())
+
+
+def all_pages(sort, order, limit, filters=DocumentFilters()):
+    async def page(cursor):
+        chunks = [c async for c in stream_documents(filters, lambda d: d.id, sort, order, cursor, limit)]
+        return json.loads("".join(chunks))
+
+    pages, cursor = [], None
+    while True:
+        body = asyncio.run(page(cursor))
+        pages.append(body)
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("sort", ["upload_time", "author", "id"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_pages_cover_every_row_once_in_order(documents, sort, order):
+    pages = all_pages(sort, order, limit=2)
+    ids = [i for page in pages for i in page["items"]]
+
+    assert sorted(ids) == list(range(1, 8))
+    assert [len(p["items"]) for p in pages] == [2, 2, 2, 1]
+    assert {p["total"] for p in pages} == {7}
+    if sort == "id":
+        assert ids == sorted(ids, reverse=order == "desc")
+
+
+def test_filters_apply_to_items_and_total(documents):
+    pages = all_pages("id", "asc", limit=10, filters=DocumentFilters(status="processed", author="a1"))
+    assert pages == [{"items": [2, 6], "next_cursor": None, "total": 2}]
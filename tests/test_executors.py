@@ -0,0 +1,110 @@
+# test_executors.py
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from app.services.executors import MeteredExecutor, PipelineSteps
+
+
+def thread_pool(workers=2):
+    return MeteredExecutor("test", lambda: ThreadPoolExecutor(workers), workers, copy_context=True)
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_steps_yield_events_then_none_and_close_the_generator():
+    closed = []
+
+    def pipeline():
+        try:
+            yield "citations", []
+            yield "answer", "42"
+        finally:
+            closed.append(True)
+
+    async def consume():
+        steps = PipelineSteps(pipeline(), thread_pool())
+        items = []
+        try:
+            while (item := await steps.next()) is not None:
+                items.append(item)
+        finally:
+            steps.close()
+        return items
+
+    assert asyncio.run(consume()) == [("citations", []), ("answer", "42")]
+    assert wait_for(lambda: closed == [True])
+
+
+def test_cancelling_mid_stage_stops_the_pipeline_at_the_next_boundary():
+    stage_running, release = threading.Event(), threading.Event()
+    reached, closed = [], []
+
+    def pipeline():
+        try:
+            stage_running.set()
+            release.wait(2)             # a slow stage, e.g. retrieval
+            reached.append("retrieval")
+            yield "citations", []
+            reached.append("answer")    # must never start
+            yield "answer", "too late"
+        finally:
+            closed.append(True)
+
+    async def scenario():
+        steps = PipelineSteps(pipeline(), thread_pool())
+
+        async def consume():
+            try:
+                while await steps.next() is not None:
+                    pass
+            finally:
+                steps.close()
+
+        task = asyncio.ensure_future(consume())
+        await asyncio.get_running_loop().run_in_executor(None, stage_running.wait, 2)
+        task.cancel()
+        # The cancellation propagates; it isn't replaced by "generator already executing"
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert closed == []                 # the stage is still running in its thread
+    release.set()
+    assert wait_for(lambda: closed == [True])
+    assert reached == ["retrieval"]
+
+
+def test_close_before_the_first_step():
+    closed = []
+
+    def pipeline():
+        closed.append("started")
+        yield "citations", []
+
+    PipelineSteps(pipeline(), thread_pool()).close()
+    time.sleep(0.05)
+    # A generator that never started is closed without running its body
+    assert closed == []
+
+
+def test_thread_pool_counts_tasks():
+    pool = thread_pool()
+
+    async def run():
+        return await asyncio.gather(pool.run(lambda: 1), pool.run(lambda: 2))
+
+    assert asyncio.run(run()) == [1, 2]
+    assert wait_for(lambda: pool.stats()["completed"] == 2)
+    assert pool.stats()["submitted"] == 2 and pool.stats()["failed"] == 0
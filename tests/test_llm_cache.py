@@ -0,0 +1,63 @@
+# test_llm_cache.py
+
+import pytest
+
+from app.core.disk_cache import DiskCache
+
+
+def test_get_returns_stored_value_and_counts_hits(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"), max_bytes=1024)
+    assert cache.get("k") is None
+    cache.set("k", b"value")
+    assert cache.get("k") == b"value"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"], stats["bytes"]) == (1, 1, 1, 5)
+
+
+def test_entries_are_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    DiskCache(path, max_bytes=1024).set("k", b"value")
+    assert DiskCache(path, max_bytes=1024).get("k") == b"value"
+
+
+def test_evict_drops_least_recently_used_until_under_budget(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"), max_bytes=100)
+    for i in range(5):
+        cache.set(f"k{i}", b"x" * 30)
+        # Distinct last_access values, oldest first
+        cache._conn().execute("UPDATE entries SET last_access = ? WHERE key = ?", (i, f"k{i}"))
+
+    evicted = cache.evict()
+
+    assert evicted == 2
+    assert cache.stats()["bytes"] <= 90
+    assert [cache.get(f"k{i}") is not None for i in range(5)] == [False, False, True, True, True]
+
+
+def test_evict_is_a_no_op_within_budget(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"), max_bytes=100)
+    cache.set("k", b"x" * 10)
+    assert cache.evict() == 0
+
+
+def test_completion_cache_keys_separate_models_and_bypass_skips_reads(monkeypatch, tmp_path):
+    pytest.importorskip("dotenv")
+    pytest.importorskip("langchain_core")
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration
+    from app.services import llm_cache
+
+    monkeypatch.setattr(llm_cache, "_store", DiskCache(str(tmp_path / "llm.sqlite3"), max_bytes=1 << 20))
+    a = llm_cache.CompletionCache("fake", "model-a", 0.0)
+    b = llm_cache.CompletionCache("fake", "model-b", 0.0)
+    a.update("prompt", "llm", [ChatGeneration(message=AIMessage(content="answer"))])
+
+    assert a.lookup("prompt", "llm")[0].text == "answer"
+    assert b.lookup("prompt", "llm") is None
+
+    token = llm_cache.set_cache_bypass(True)
+    try:
+        assert a.lookup("prompt", "llm") is None
+    finally:
+        llm_cache.reset_cache_bypass(token)
+    assert a.lookup("prompt", "llm") is not None
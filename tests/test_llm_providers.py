@@ -0,0 +1,68 @@
+# test_llm_providers.py
+
+import json
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("httpx")
+pytest.importorskip("tenacity")
+pytest.importorskip("langchain_core")
+
+from app.services.llm_providers import FakeChatModel, build_chat_model, fake_completion, provider_model
+
+
+def test_fake_completion_is_deterministic():
+    assert fake_completion("Contract termination notice period") == fake_completion("Contract termination notice period")
+    assert fake_completion("Contract termination") != fake_completion("Lease renewal")
+
+
+def test_fake_completion_follows_a_json_example_in_the_prompt():
+    prompt = 'The tenant must pay rent monthly.\nRespond in JSON: {{ "answer": "...", "citation": "..." }}'
+    reply = json.loads(fake_completion(prompt))
+    assert set(reply) == {"answer", "citation"}
+
+
+def test_fake_completion_lists_where_the_example_has_a_list():
+    reply = json.loads(fake_completion('Payment terms and penalties. Return { "themes": ["..."] }'))
+    assert isinstance(reply["themes"], list) and reply["themes"]
+
+
+def test_fake_model_stream_matches_invoke():
+    model = FakeChatModel()
+    prompt = "Summarize the indemnity clause of the agreement."
+    streamed = "".join(chunk.content for chunk in model.stream(prompt))
+    assert streamed == model.invoke(prompt).content
+
+
+def test_unknown_provider_is_rejected():
+    with pytest.raises(ValueError):
+        provider_model("nope")
+
+
+def test_build_chat_model_attaches_usage_callback():
+    model = build_chat_model("fake", 0.0)
+    assert isinstance(model, FakeChatModel)
+    assert [type(cb).__name__ for cb in model.callbacks] == ["UsageCallback"]
+
+
+def test_usage_callback_skips_completions_replayed_from_the_cache():
+    from uuid import uuid4
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, LLMResult
+    from app.services.llm_cache import CACHE_HIT
+    from app.services.llm_providers import UsageCallback
+    from app.services.metrics import LLM_CALLS, LLM_TOKENS
+
+    def counts():
+        return (LLM_CALLS.samples(), LLM_TOKENS.samples())
+
+    callback = UsageCallback("usage-test")
+    cached = ChatGeneration(message=AIMessage(content="from cache"), generation_info={CACHE_HIT: True})
+    before = counts()
+    callback.on_llm_end(LLMResult(generations=[[cached]]), run_id=uuid4())
+    assert counts() == before
+
+    callback.on_llm_end(LLMResult(generations=[[ChatGeneration(message=AIMessage(content="fresh"))]]),
+                        run_id=uuid4())
+    assert ("docchat_llm_calls_total", {"provider": "usage-test", "outcome": "ok"}, 1) in LLM_CALLS.samples()
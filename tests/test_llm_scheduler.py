@@ -0,0 +1,99 @@
+# test_llm_scheduler.py
+
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("dotenv")
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("tenacity")
+
+from app.services import llm_scheduler
+from app.services.llm_scheduler import (
+    BACKGROUND, INTERACTIVE, LLMScheduler, ScheduledTransport, TokenBucket
+)
+from app.services.deadline import Deadline, use_deadline
+
+
+def test_token_bucket_delays_until_refilled():
+    bucket = TokenBucket(per_minute=60)  # one token per second
+    bucket.updated = 0.0
+    bucket.take(60, now=0.0)
+    assert bucket.delay(1, now=0.0) == pytest.approx(1.0)
+    assert bucket.delay(1, now=1.0) == 0.0
+
+
+def test_token_bucket_sync_never_raises_the_level():
+    bucket = TokenBucket(per_minute=100)
+    bucket.sync(10, now=bucket.updated)
+    assert bucket.level == 10
+    bucket.sync(50, now=bucket.updated)
+    assert bucket.level == 10
+
+
+def test_unlimited_bucket_never_waits():
+    bucket = TokenBucket(per_minute=0)
+    bucket.take(1_000_000, now=0.0)
+    assert bucket.delay(1_000_000, now=0.0) == 0.0
+
+
+def test_acquire_times_out_when_budget_is_spent():
+    scheduler = LLMScheduler(requests_per_minute=1, tokens_per_minute=0)
+    assert scheduler.acquire(INTERACTIVE, tokens=1)
+    assert not scheduler.acquire(INTERACTIVE, tokens=1, timeout=0.05)
+    assert scheduler.stats()["expired"] == 1
+
+
+def test_waiting_callers_are_served_by_priority():
+    scheduler = LLMScheduler(requests_per_minute=240, tokens_per_minute=0)  # one request per 0.25 s
+    scheduler.requests.level = 0.0
+    order = []
+
+    def call(priority, name):
+        scheduler.acquire(priority, tokens=1)
+        order.append(name)
+
+    background = threading.Thread(target=call, args=(BACKGROUND, "background"))
+    background.start()
+    time.sleep(0.05)
+    interactive = threading.Thread(target=call, args=(INTERACTIVE, "interactive"))
+    interactive.start()
+    background.join(2)
+    interactive.join(2)
+
+    assert order == ["interactive", "background"]
+
+
+def make_transport(statuses, monkeypatch):
+    monkeypatch.setattr(llm_scheduler.settings, "LLM_RETRY_BASE_SECONDS", 0.001)
+    monkeypatch.setattr(llm_scheduler.settings, "LLM_RETRY_MAX_SECONDS", 0.001)
+    responses = iter(statuses)
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(next(responses), headers={"retry-after": "0"})
+
+    scheduler = LLMScheduler(requests_per_minute=0, tokens_per_minute=0)
+    return ScheduledTransport(scheduler, httpx.MockTransport(handler)), scheduler, calls
+
+
+def test_transport_retries_retryable_statuses(monkeypatch):
+    transport, scheduler, calls = make_transport([429, 503, 200], monkeypatch)
+    with httpx.Client(transport=transport) as client:
+        response = client.post("http://llm.test/v1/chat", content=b"{}")
+    assert response.status_code == 200
+    assert len(calls) == 3
+    assert scheduler.stats()["retries"] == 2
+    assert scheduler.stats()["throttled"] == 1
+
+
+def test_transport_stops_retrying_once_the_deadline_has_passed(monkeypatch):
+    transport, scheduler, calls = make_transport([503] * 5, monkeypatch)
+    with use_deadline(Deadline(0.001)):
+        time.sleep(0.01)
+        with httpx.Client(transport=transport) as client:
+            with pytest.raises(httpx.PoolTimeout):
+                client.post("http://llm.test/v1/chat", content=b"{}")
+    assert calls == []
@@ -0,0 +1,127 @@
+import sys
+import json
+import logging
+
+import pytest
+
+pytest.importorskip("orjson")
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.logging_config import (
+    PAYLOAD, JsonFormatter, RequestContextFilter, RequestLogMiddleware, parse_levels, payload_sampled,
+    request_id_var,
+)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def request_logs():
+    handler = ListHandler()
+    handler.addFilter(RequestContextFilter(1.0))
+    logger = logging.getLogger("app.requests")
+    logger.addHandler(handler)
+    previous = logger.level
+    logger.setLevel(logging.DEBUG)
+    yield handler.records
+    logger.setLevel(previous)
+    logger.removeHandler(handler)
+
+
+def make_client():
+    app = FastAPI()
+    app.add_middleware(RequestLogMiddleware)
+
+    @app.get("/ping")
+    def ping():
+        logging.getLogger("app.requests").info("handling")
+        return {"request_id": request_id_var.get()}
+
+    return TestClient(app)
+
+
+def test_middleware_echoes_the_client_request_id(request_logs):
+    response = make_client().get("/ping", headers={"X-Request-ID": "abc123"})
+    assert response.headers["x-request-id"] == "abc123"
+    assert response.json() == {"request_id": "abc123"}
+    assert [r.request_id for r in request_logs] == ["abc123", "abc123"]
+
+
+def test_middleware_generates_an_id_and_logs_the_status(request_logs):
+    response = make_client().get("/missing")
+    request_id = response.headers["x-request-id"]
+    assert len(request_id) == 16
+
+    [line] = request_logs
+    assert line.levelno == logging.INFO
+    assert (line.method, line.path, line.status) == ("GET", "/missing", 404)
+    assert line.request_id == request_id
+    assert request_id_var.get() == "-"
+
+
+def test_long_request_ids_are_truncated(request_logs):
+    response = make_client().get("/ping", headers={"X-Request-ID": "x" * 100})
+    assert response.headers["x-request-id"] == "x" * 64
+
+
+def test_json_formatter_includes_extras_request_id_and_exception():
+    record = logging.LogRecord("app.test", logging.ERROR, __file__, 1, "failed %s", ("upload",), None)
+    record.request_id = "req-1"
+    record.document_id = 7
+    record.payload = True
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record.exc_info = sys.exc_info()
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["level"] == "ERROR"
+    assert entry["logger"] == "app.test"
+    assert entry["request_id"] == "req-1"
+    assert entry["msg"] == "failed upload"
+    assert entry["document_id"] == 7
+    assert "payload" not in entry
+    assert "ValueError: boom" in entry["exc"]
+    assert entry["ts"].endswith("Z")
+
+
+def test_payload_sampling_is_per_request():
+    ids = [f"req-{i}" for i in range(2000)]
+    sampled = [i for i in ids if payload_sampled(i, 0.25)]
+    assert sampled == [i for i in ids if payload_sampled(i, 0.25)]
+    assert 350 < len(sampled) < 650
+    assert all(payload_sampled(i, 1.0) for i in ids[:50])
+    assert not any(payload_sampled(i, 0.0) for i in ids[:50])
+
+
+def test_context_filter_drops_unsampled_payload_records():
+    def record(**extra):
+        r = logging.LogRecord("app.test", logging.DEBUG, __file__, 1, "msg", None, None)
+        r.__dict__.update(extra)
+        return r
+
+    dropping = RequestContextFilter(0.0)
+    token = request_id_var.set("req-9")
+    try:
+        plain = record()
+        assert dropping.filter(plain)
+        assert plain.request_id == "req-9"
+        assert not dropping.filter(record(**PAYLOAD))
+        assert RequestContextFilter(1.0).filter(record(**PAYLOAD))
+    finally:
+        request_id_var.reset(token)
+
+
+def test_parse_levels():
+    assert parse_levels("app.services.llm_service=debug, httpx=WARNING") == {
+        "app.services.llm_service": "DEBUG", "httpx": "WARNING"}
+    assert parse_levels("") == {}
+    assert parse_levels("noequals,=INFO") == {}
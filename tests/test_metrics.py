@@ -0,0 +1,100 @@
+import math
+
+import pytest
+
+from app.services import metrics
+from app.services.metrics import Counter, Histogram, collect_timings, record_stage, span, stats_collector
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    # Metrics register themselves globally; keep test metrics out of REGISTRY
+    fresh = metrics.Registry()
+    monkeypatch.setattr(metrics, "REGISTRY", fresh)
+    return fresh
+
+
+def test_counter_renders_help_type_and_labelled_samples(registry):
+    calls = Counter("test_calls", "Test calls.", ["provider"])
+    calls.inc(provider="openai")
+    calls.inc(2, provider="openai")
+    calls.inc(provider="ollama")
+
+    text = registry.render()
+    assert "# HELP docchat_test_calls_total Test calls.\n# TYPE docchat_test_calls_total counter\n" in text
+    assert 'docchat_test_calls_total{provider="openai"} 3\n' in text
+    assert 'docchat_test_calls_total{provider="ollama"} 1\n' in text
+
+
+def test_label_values_are_escaped(registry):
+    Counter("test_escape", "Escaping.", ["path"]).inc(path='a\\b"c\nd')
+    assert 'docchat_test_escape_total{path="a\\\\b\\"c\\nd"} 1' in registry.render()
+
+
+def test_histogram_buckets_are_cumulative_and_end_in_inf(registry):
+    latency = Histogram("test_latency", "Latency.", ["stage"], buckets=(0.1, 1.0))
+    latency.observe(0.05, stage="x")
+    latency.observe(0.5, stage="x")
+    latency.observe(5.0, stage="x")
+
+    text = registry.render()
+    assert 'docchat_test_latency_bucket{stage="x",le="0.1"} 1\n' in text
+    assert 'docchat_test_latency_bucket{stage="x",le="1.0"} 2\n' in text
+    assert 'docchat_test_latency_bucket{stage="x",le="+Inf"} 3\n' in text
+    assert 'docchat_test_latency_sum{stage="x"} 5.55\n' in text
+    assert 'docchat_test_latency_count{stage="x"} 3\n' in text
+
+
+def test_format_value():
+    assert metrics._format_value(math.inf) == "+Inf"
+    assert metrics._format_value(3) == "3"
+    assert metrics._format_value(0.25) == "0.25"
+
+
+def test_stats_collector_exposes_numeric_leaves_as_gauges(registry):
+    stats = {"llm_cache": {"hits": 3, "backend": "redis", "ratio": float("nan")}, "query-log": {"queued": 2.5}}
+    registry.register_collector(stats_collector("stats", lambda: stats))
+
+    text = registry.render()
+    assert "# TYPE docchat_llm_cache_hits gauge\ndocchat_llm_cache_hits 3.0\n" in text
+    assert "docchat_query_log_queued 2.5\n" in text
+    assert "backend" not in text
+    assert "ratio" not in text
+
+
+def test_failing_collector_is_skipped(registry):
+    def broken():
+        raise RuntimeError("down")
+
+    Counter("test_ok", "Still rendered.").inc()
+    registry.register_collector(broken)
+    assert "docchat_test_ok_total 1\n" in registry.render()
+
+
+def test_spans_are_recorded_only_inside_collect_timings():
+    with span("test.outside"):
+        pass
+    with collect_timings() as timings:
+        with span("test.stage"):
+            pass
+        with span("test.stage"):
+            pass
+        record_stage("test.first_token", 0.25)
+    with span("test.after"):
+        pass
+
+    assert [stage for stage, _ in timings.observations] == ["test.stage", "test.stage", "test.first_token"]
+    assert set(timings.as_ms()) == {"test.stage", "test.first_token"}
+    assert timings.as_ms()["test.first_token"] == 250.0
+    assert metrics._timings.get() is None
+
+
+def test_failing_span_counts_an_error_and_still_records_its_time():
+    errors = lambda: dict(((s[1]["stage"], s[2]) for s in metrics.STAGE_ERRORS.samples()))
+    before = errors().get("test.failing", 0)
+    with collect_timings() as timings:
+        with pytest.raises(ValueError):
+            with span("test.failing"):
+                raise ValueError("boom")
+    assert errors()["test.failing"] == before + 1
+    assert "test.failing" in timings.as_ms()
@@ -1 +1,100 @@
-# test_ocr.py
\ No newline at end of file
+# test_ocr.py
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+from PIL import Image
+
+from app.core.preprocessing import (
+    MIN_DPI, PreprocessOptions, choose_dpi, estimate_line_height, otsu_threshold, page_ink, preprocess_image,
+    text_bbox
+)
+
+
+def text_page(width=600, height=800, ink=40, paper=235, lines=((200, 220), (260, 280), (320, 340))):
+    page = np.full((height, width), paper, dtype=np.uint8)
+    for top, bottom in lines:
+        page[top:bottom, 150:450] = ink
+    return page
+
+
+def test_otsu_threshold_separates_ink_from_paper():
+    threshold = otsu_threshold(text_page())
+    assert 40 <= threshold < 235
+
+
+def test_blank_and_low_contrast_pages_have_no_ink():
+    assert page_ink(np.full((100, 100), 250, dtype=np.uint8)) is None
+    noise = np.random.default_rng(0).integers(200, 230, size=(100, 100)).astype(np.uint8)
+    assert page_ink(noise) is None
+    assert preprocess_image(Image.fromarray(np.full((100, 100), 250, dtype=np.uint8))) is None
+
+
+def test_text_bbox_and_line_height():
+    mask = text_page() <= 128
+    left, top, right, bottom = text_bbox(mask)
+    assert (left, top) == (150 - 12, 200 - 12)
+    assert (right, bottom) == (450 + 12, 340 + 12)
+    assert estimate_line_height(mask) == 20
+
+
+def test_choose_dpi_scales_to_the_target_line_height():
+    assert choose_dpi(20.0, rendered_dpi=72) == 150
+    assert choose_dpi(5.0, rendered_dpi=72) == 400
+    assert choose_dpi(100.0, rendered_dpi=72) == MIN_DPI
+
+
+def test_preprocess_crops_and_binarizes():
+    image = preprocess_image(Image.fromarray(text_page()), PreprocessOptions(rescale=False))
+    pixels = np.asarray(image)
+    assert image.size == (300 + 24, 140 + 24)
+    assert set(np.unique(pixels)) == {0, 255}
+    assert pixels[12:32, 12:312].max() == 0
+
+
+
+@pytest.fixture
+def ocr_cache(monkeypatch, tmp_path):
+    pytest.importorskip("dotenv")
+    pytesseract = pytest.importorskip("pytesseract")
+    from app.core import ocr_cache
+    from app.core.disk_cache import DiskCache
+
+    calls = []
+
+    def image_to_string(image, lang=None, config=None):
+        calls.append(image)
+        return "page text"
+
+    monkeypatch.setattr(pytesseract, "image_to_string", image_to_string)
+    monkeypatch.setattr(ocr_cache.settings, "OCR_CACHE_ENABLED", True)
+    monkeypatch.setattr(ocr_cache, "_store", DiskCache(str(tmp_path / "ocr.sqlite3"), max_bytes=1 << 20))
+    return ocr_cache, calls
+
+
+def test_identical_pages_are_read_once(ocr_cache):
+    module, calls = ocr_cache
+    page = Image.fromarray(text_page())
+
+    assert module.cached_ocr(page) == ("page text", False)
+    assert module.cached_ocr(page.copy()) == ("page text", True)
+    assert len(calls) == 1
+
+
+def test_variant_and_content_are_part_of_the_key(ocr_cache):
+    module, calls = ocr_cache
+    page = text_page()
+    module.cached_ocr(Image.fromarray(page))
+    module.cached_ocr(Image.fromarray(page), prepare=lambda image: image, variant="preprocessed")
+    page[0, 0] = 0
+    module.cached_ocr(Image.fromarray(page))
+    assert len(calls) == 3
+
+
+def test_blank_pages_skip_tesseract_and_are_cached(ocr_cache):
+    module, calls = ocr_cache
+    page = Image.fromarray(text_page())
+    assert module.cached_ocr(page, prepare=lambda image: None, variant="blank") == ("", False)
+    assert module.cached_ocr(page, prepare=lambda image: None, variant="blank") == ("", True)
+    assert calls == []
@@ -0,0 +1,68 @@
+# test_pdf_text.py
+
+import pytest
+
+pytest.importorskip("pdfminer")
+
+from app.core import ocr
+
+
+def write_pdf(path, pages):
+    """A minimal PDF with one Helvetica text line per entry of each page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        ops = "".join(f"BT /F1 12 Tf 72 {700 - 60 * i} Td ({line}) Tj ET\n" for i, line in enumerate(lines))
+        objects.append(f"<< /Length {len(ops)} >>\nstream\n{ops}endstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    path.write_bytes(out)
+    return str(path)
+
+
+def test_text_pdf_paragraphs_carry_their_page_numbers(tmp_path, monkeypatch):
+    pdf = write_pdf(tmp_path / "lease.pdf", [["Rent is due monthly.", "Deposit is two months."],
+                                             [],
+                                             ["Either party may terminate."]])
+    monkeypatch.setattr(ocr, "iter_scanned_pdf_paragraphs", lambda *args: pytest.fail("text PDF was OCRed"))
+
+    paragraphs = list(ocr.iter_pdf_paragraphs(pdf))
+
+    assert [(p["page_number"], p["paragraph_number"], p["text_snippet"]) for p in paragraphs] == [
+        (1, 1, "Rent is due monthly."),
+        (1, 2, "Deposit is two months."),
+        (3, 1, "Either party may terminate."),
+    ]
+    assert ocr.extract_paragraphs_from_text_pdf(pdf) == paragraphs
+
+
+def test_pdf_without_a_text_layer_is_ocred(tmp_path, monkeypatch):
+    pdf = write_pdf(tmp_path / "scan.pdf", [[], []])
+    scanned = [{"page_number": 1, "paragraph_number": 1, "text_snippet": "from OCR"}]
+    monkeypatch.setattr(ocr, "iter_scanned_pdf_paragraphs", lambda *args: iter(scanned))
+
+    assert list(ocr.iter_pdf_paragraphs(pdf)) == scanned
+
+
+def test_text_layer_is_read_in_a_single_pass(tmp_path, monkeypatch):
+    from pdfminer import high_level
+
+    pdf = write_pdf(tmp_path / "lease.pdf", [["Rent is due monthly."]])
+    calls = []
+    extract_pages = high_level.extract_pages
+    monkeypatch.setattr(high_level, "extract_pages", lambda *args: calls.append(args) or extract_pages(*args))
+
+    list(ocr.iter_pdf_paragraphs(pdf))
+    assert len(calls) == 1
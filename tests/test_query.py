@@ -0,0 +1,233 @@
+# test_query.py
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("fastapi")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("langchain_core")
+pytest.importorskip("langchain_community")
+
+from app.api import query as query_api
+from app.services import llm_cache
+
+
+def run_stream(request, **headers):
+    async def consume():
+        response = await query_api.stream_query(request, **headers)
+        body = [chunk async for chunk in response.body_iterator]
+        return body, llm_cache._bypass.get()
+    return asyncio.run(consume())
+
+
+def test_stream_sets_cache_bypass_for_the_pipeline_and_resets_it(monkeypatch):
+    seen = []
+
+    def fake_events(*args, **kwargs):
+        seen.append(llm_cache._bypass.get())
+        yield "answer", "ok"
+
+    monkeypatch.setattr(query_api, "iter_answer_events", fake_events)
+    monkeypatch.setattr(query_api, "save_query_log", lambda *args, **kwargs: None)
+
+    body, bypass_after = run_stream(query_api.QueryRequest(question="What?"), x_llm_cache="bypass")
+
+    assert seen == [True]
+    assert bypass_after is False
+    assert body[0] == 'event: answer\ndata: "ok"\n\n'
+    assert body[-1].startswith("event: done")
+
+
+# ---- Single-flight coalescing ----
+
+from app.services.query_service import SingleFlight, query_key
+
+
+def test_query_key_normalizes_whitespace_and_case():
+    assert query_key("  What is  the Notice period? ", 5, "full") == query_key("what is the notice period?", 5, "full")
+    assert query_key("What?", 5, "full") != query_key("What?", 3, "full")
+
+
+def test_single_flight_runs_identical_calls_once():
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"answer": "42"}
+
+    async def burst():
+        return await asyncio.gather(*(flight.run("k", compute) for _ in range(10)))
+
+    results = asyncio.run(burst())
+
+    assert calls == [1]
+    assert all(r == {"answer": "42"} for r in results)
+    assert flight.stats() == {"in_flight": 0, "started": 1, "coalesced": 9, "abandoned": 0}
+
+
+def test_single_flight_shares_exceptions_and_forgets_the_call():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def burst():
+        return await asyncio.gather(flight.run("k", fail), flight.run("k", fail), return_exceptions=True)
+
+    results = asyncio.run(burst())
+
+    assert [type(r) for r in results] == [RuntimeError, RuntimeError]
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_single_flight_cancels_the_call_when_every_waiter_leaves():
+    flight = SingleFlight()
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def scenario():
+        waiters = [asyncio.ensure_future(flight.run("k", slow)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        waiters[0].cancel()
+        await asyncio.sleep(0.01)
+        assert cancelled == []          # one waiter is still interested
+        waiters[1].cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+
+    assert cancelled == [True]
+    assert flight.stats()["abandoned"] == 1
+
+
+# ---- Admission and cancellation ----
+
+import threading
+from contextlib import suppress
+
+from app.services.admission import query_admission
+
+
+def test_cancelled_stream_releases_its_admission_slot(monkeypatch):
+    stage_running, release = threading.Event(), threading.Event()
+
+    def slow_events(*args, **kwargs):
+        stage_running.set()
+        release.wait(2)
+        yield "answer", "late"
+
+    monkeypatch.setattr(query_api, "iter_answer_events", slow_events)
+    monkeypatch.setattr(query_api, "save_query_log", lambda *args, **kwargs: None)
+
+    async def scenario():
+        idle = query_admission.active
+        response = await query_api.stream_query(query_api.QueryRequest(question="What?"), x_llm_cache=None)
+        admitted = query_admission.active
+
+        async def consume():
+            async for _ in response.body_iterator:
+                pass
+
+        task = asyncio.ensure_future(consume())
+        await asyncio.get_running_loop().run_in_executor(None, stage_running.wait, 2)
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+        return idle, admitted, query_admission.active, llm_cache._bypass.get()
+
+    try:
+        idle, admitted, after, bypass = asyncio.run(scenario())
+    finally:
+        release.set()
+
+    assert admitted == idle + 1
+    assert after == idle
+    assert bypass is False
+
+
+def test_admission_rejects_when_the_queue_is_full():
+    from fastapi import HTTPException
+    from app.services.admission import AdmissionLimiter
+
+    limiter = AdmissionLimiter("test", max_concurrency=1, max_queue=1, queue_timeout=0.05)
+
+    async def scenario():
+        held = await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as full:
+            await limiter.acquire()
+        with pytest.raises(HTTPException) as timed_out:
+            await waiter
+        held.release()
+        held.release()                  # releasing twice is harmless
+        return full.value, timed_out.value
+
+    full, timed_out = asyncio.run(scenario())
+
+    assert full.status_code == 429 and "Retry-After" in full.headers
+    assert timed_out.status_code == 503
+    assert limiter.stats()["active"] == 0
+
+
+# ---- Stage timings ----
+
+from app.services import metrics, query_service
+from app.services.metrics import span
+
+
+def timed_events(*args, **kwargs):
+    with span("query.retrieval"):
+        pass
+    yield "answer", "ok"
+
+
+def test_stream_logs_its_stage_timings_and_clears_the_collector(monkeypatch):
+    logged = []
+    monkeypatch.setattr(query_api, "iter_answer_events", timed_events)
+    monkeypatch.setattr(query_api, "save_query_log", lambda *args: logged.append(args[-1]))
+
+    async def consume():
+        response = await query_api.stream_query(query_api.QueryRequest(question="What?"), x_llm_cache=None)
+        [chunk async for chunk in response.body_iterator]
+        return metrics._timings.get()
+
+    assert asyncio.run(consume()) is None
+    assert list(logged[0]) == ["query.retrieval"]
+
+
+def test_async_answers_carry_stage_timings_shared_with_coalesced_requests(monkeypatch):
+    monkeypatch.setattr(query_service, "iter_answer_events", timed_events)
+
+    async def scenario():
+        flight = SingleFlight()
+        answer = lambda: query_service.generate_answer_async("store", "What?")
+        return await asyncio.gather(flight.run("k", answer), flight.run("k", answer))
+
+    first, second = asyncio.run(scenario())
+    assert first is second
+    assert list(first["stage_timings"]) == ["query.retrieval"]
+
+
+def test_failed_async_answers_still_carry_stage_timings(monkeypatch):
+    def failing_events(*args, **kwargs):
+        with span("query.retrieval"):
+            pass
+        yield "error", "No relevant documents found."
+
+    monkeypatch.setattr(query_service, "iter_answer_events", failing_events)
+    result = asyncio.run(query_service.generate_answer_async("store", "What?"))
+    assert result["answer"] == "Error: No relevant documents found."
+    assert list(result["stage_timings"]) == ["query.retrieval"]
@@ -1 +1,212 @@
-# test_query_engine.py
\ No newline at end of file
+# test_query_engine.py
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("langchain_core")
+pytest.importorskip("langchain_community")
+
+from langchain_core.documents import Document as LangDocument
+
+from app.services import llm_service, summary_service
+from app.services.llm_providers import FakeChatModel
+
+
+def summary(doc_id):
+    return {"doc_id": doc_id, "filename": f"{doc_id}.pdf", "summary": f"Summary of {doc_id}.", "key_facts": []}
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    scored_docs = [
+        (LangDocument(page_content="The notice period is thirty days. Rent is due monthly.",
+                      metadata={"doc_id": "a", "chunk_id": "a1", "page_start": 2, "page_end": 3}), 0.9),
+        (LangDocument(page_content="Either party may terminate with notice. Fees are not refundable.",
+                      metadata={"doc_id": "b", "chunk_id": "b1", "page_start": 1, "page_end": 1}), 0.8),
+    ]
+    monkeypatch.setattr(llm_service, "load_vector_store", lambda path: object())
+    monkeypatch.setattr(llm_service, "retrieve", lambda db, question, top_k: scored_docs)
+    monkeypatch.setattr(llm_service, "duplicate_citations", lambda citations: [])
+    monkeypatch.setattr(llm_service, "themes_for_chunks", lambda metadatas: [])
+    monkeypatch.setattr(llm_service, "highlight_hits", lambda question, docs: [
+        {"highlights": [{"text": doc.page_content.split(". ")[0] + ".", "score": 0.7, "start": 0, "end": 1}]}
+        for doc, _ in docs
+    ])
+    monkeypatch.setattr(llm_service, "get_llm", lambda temperature=0.7: FakeChatModel())
+
+    qa_calls = []
+
+    def qa_one(doc, question, *args):
+        qa_calls.append(doc.metadata["doc_id"])
+        return {"doc_id": doc.metadata["doc_id"], "chunk_id": doc.metadata["chunk_id"],
+                "answer": "from the LLM", "citation": "", "snippet": ""}
+
+    monkeypatch.setattr(llm_service, "_qa_one_document", qa_one)
+    return monkeypatch, qa_calls
+
+
+def run_full(question="What is the notice period?"):
+    return llm_service.generate_answer("unused", question, mode="full")
+
+
+def test_summarized_documents_need_no_per_document_llm_call(pipeline):
+    monkeypatch, qa_calls = pipeline
+    monkeypatch.setattr(llm_service, "load_summaries", lambda doc_uids: [summary(uid) for uid in doc_uids])
+
+    result = run_full()
+
+    assert qa_calls == []
+    assert [(row["doc_id"], row["answer"], row["citation"]) for row in result["doc_table"]] == [
+        ("a", "The notice period is thirty days.", "Pages 2-3"),
+        ("b", "Either party may terminate with notice.", "Page 1"),
+    ]
+    assert result["synthesized_summary"]
+    assert result["degraded"] == []
+
+
+def test_per_document_qa_runs_only_for_unsummarized_documents(pipeline):
+    monkeypatch, qa_calls = pipeline
+    monkeypatch.setattr(llm_service, "load_summaries", lambda doc_uids: [summary("a")])
+
+    result = run_full()
+
+    assert qa_calls == ["b"]
+    assert {row["doc_id"]: row["answer"] for row in result["doc_table"]}["b"] == "from the LLM"
+
+
+def test_overview_questions_use_the_closest_summaries(monkeypatch):
+    monkeypatch.setattr(summary_service, "search_summaries", lambda question, k: ["c", "a"])
+    monkeypatch.setattr(summary_service, "load_summaries",
+                        lambda doc_uids=None, limit=None: [summary(uid) for uid in sorted(doc_uids)])
+
+    assert [s["doc_id"] for s in summary_service.relevant_summaries("What are these documents about?", 10)] == ["c", "a"]
+
+
+def test_overview_questions_fall_back_to_recent_documents(monkeypatch):
+    def broken(question, k):
+        raise RuntimeError("no summary collection yet")
+
+    monkeypatch.setattr(summary_service, "search_summaries", broken)
+    monkeypatch.setattr(summary_service, "load_summaries",
+                        lambda doc_uids=None, limit=None: [summary("recent")] if limit else [])
+
+    assert [s["doc_id"] for s in summary_service.relevant_summaries("Summarize all documents", 10)] == ["recent"]
+
+
+def test_overview_question_detection():
+    assert summary_service.is_overview_question("What are these documents about?")
+    assert summary_service.is_overview_question("Give me an overview of all the documents")
+    assert not summary_service.is_overview_question("What is the notice period?")
+
+
+def test_sample_text_keeps_head_and_spread_windows():
+    text = " ".join(f"w{i}" for i in range(10_000))
+    sampled = summary_service.sample_text(text, max_words=200)
+    assert sampled.startswith("w0 w1")
+    assert len(sampled.replace(" [...] ", " ").split()) <= 200
+    assert sampled.endswith("w9999")
+
+
+def test_parse_summary_accepts_plain_text():
+    assert summary_service.parse_summary('{"summary": "S", "key_facts": "one"}') == ("S", ["one"])
+    assert summary_service.parse_summary("not json") == ("not json", [])
+
+
+# ---- Query modes ----
+
+from app.services import retrieval
+
+
+def test_fast_mode_makes_no_llm_call(pipeline, monkeypatch):
+    def no_llm(temperature=0.7):
+        raise AssertionError("fast mode must not call the LLM")
+
+    monkeypatch.setattr(llm_service, "get_llm", no_llm)
+    events = list(llm_service.iter_answer_events("unused", "What is the notice period?", mode="fast"))
+    assert [event for event, _ in events] == ["citations", "themes", "hits"]
+
+
+def test_standard_mode_stops_after_the_answer(pipeline):
+    _, qa_calls = pipeline
+    events = list(llm_service.iter_answer_events("unused", "What is the notice period?",
+                                                 stream_tokens=False, mode="standard"))
+    assert [event for event, _ in events] == ["citations", "themes", "answer"]
+    assert qa_calls == []
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        list(llm_service.iter_answer_events("unused", "q", mode="turbo"))
+
+
+def test_split_sentences_skips_short_fragments():
+    text = "Short. This sentence is long enough to keep. Another sentence that should be kept!"
+    spans = retrieval.split_sentences(text)
+    assert [s for _, _, s in spans] == ["This sentence is long enough to keep.",
+                                        "Another sentence that should be kept!"]
+    assert all(text[start:end] == sentence for start, end, sentence in spans)
+
+
+def test_highlight_hits_ranks_sentences_by_similarity(monkeypatch):
+    vectors = {"The notice period is thirty days.": [1.0, 0.0], "Rent is due on the first day of the month.": [0.0, 1.0]}
+    monkeypatch.setattr(retrieval, "embed_texts", lambda texts: [vectors[t] for t in texts])
+    monkeypatch.setattr(retrieval, "embed_query", lambda text: [0.9, 0.1])
+    doc = LangDocument(page_content="Rent is due on the first day of the month. The notice period is thirty days.",
+                       metadata={"doc_id": "a", "chunk_id": "a1"})
+
+    [hit] = retrieval.highlight_hits("notice period?", [(doc, 0.5)])
+
+    best = max(hit["highlights"], key=lambda h: h["score"])
+    assert best["text"] == "The notice period is thirty days."
+    # Highlights are returned in reading order
+    assert [h["start"] for h in hit["highlights"]] == sorted(h["start"] for h in hit["highlights"])
+
+
+# ---- Latency budgets ----
+
+import time
+
+from app.services.deadline import Deadline, NO_DEADLINE
+
+
+def test_deadline_allows_only_what_is_left():
+    deadline = Deadline(0.05)
+    assert deadline.allows(0.01) and not deadline.allows(1.0)
+    time.sleep(0.06)
+    assert deadline.expired()
+    assert NO_DEADLINE.allows(1e9) and not NO_DEADLINE.expired()
+
+
+def test_rows_that_start_after_the_stop_signal_skip_the_llm(monkeypatch):
+    def chain():
+        raise AssertionError("no LLM call expected")
+
+    monkeypatch.setattr(llm_service, "get_doc_qa_chain", chain)
+    doc = LangDocument(page_content="text", metadata={"doc_id": "a"})
+    stop = llm_service.threading.Event()
+    stop.set()
+
+    assert llm_service._qa_one_document(doc, "q", NO_DEADLINE, stop) is None
+    assert llm_service._qa_one_document(doc, "q", Deadline(llm_service.SYNTHESIS_MIN_SECONDS / 2)) is None
+
+
+def test_per_document_rows_stop_at_the_synthesis_reserve(monkeypatch):
+    calls = []
+
+    class SlowChain:
+        def run(self, inputs):
+            calls.append(inputs["doc_text"])
+            time.sleep(0.3)
+            return '{"answer": "a", "citation": ""}'
+
+    monkeypatch.setattr(llm_service, "get_doc_qa_chain", lambda: SlowChain())
+    monkeypatch.setattr(llm_service, "SYNTHESIS_MIN_SECONDS", 0.2)
+    docs = [LangDocument(page_content=f"doc {i}", metadata={"doc_id": str(i)}) for i in range(3)]
+
+    started = time.perf_counter()
+    rows = list(llm_service.iter_qa_per_document(docs, "q", Deadline(0.3)))
+
+    # Gave up after ~0.1 s instead of waiting for the 0.3 s calls
+    assert rows == []
+    assert time.perf_counter() - started < 0.25
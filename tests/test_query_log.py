@@ -0,0 +1,99 @@
+# test_query_log.py
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("aiosqlite")
+
+from app.services import query_log
+from app.services.query_log import QueryLogWriter
+
+
+def record(writer, question):
+    writer.record(question, "answer", [], [], "store")
+
+
+def test_full_queue_drops_the_oldest_row():
+    async def scenario():
+        writer = QueryLogWriter(max_queue=2, batch_size=10, flush_interval=0.01, overflow="drop_oldest")
+        for q in "abc":
+            record(writer, q)
+        return writer, [writer._queue.get_nowait()[1]["question"] for _ in range(writer._queue.qsize())]
+
+    writer, queued = asyncio.run(scenario())
+    assert queued == ["b", "c"]
+    assert (writer.enqueued, writer.dropped) == (3, 1)
+
+
+def test_full_queue_drops_the_newest_row():
+    async def scenario():
+        writer = QueryLogWriter(max_queue=2, batch_size=10, flush_interval=0.01, overflow="drop_newest")
+        for q in "abc":
+            record(writer, q)
+        return writer, [writer._queue.get_nowait()[1]["question"] for _ in range(writer._queue.qsize())]
+
+    writer, queued = asyncio.run(scenario())
+    assert queued == ["a", "b"]
+    assert (writer.enqueued, writer.dropped) == (2, 1)
+
+
+def test_unknown_overflow_policy_is_rejected():
+    with pytest.raises(ValueError):
+        QueryLogWriter(max_queue=2, batch_size=1, flush_interval=0.01, overflow="block")
+
+
+def test_stop_drains_queued_rows_in_batches(monkeypatch):
+    written = []
+
+    class FakeSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def execute(self, statement, batch):
+            await asyncio.sleep(0)
+            written.append([row["question"] for row in batch])
+
+        async def commit(self):
+            pass
+
+    monkeypatch.setattr(query_log, "AsyncSessionLocal", FakeSession)
+
+    async def scenario():
+        writer = QueryLogWriter(max_queue=100, batch_size=2, flush_interval=0.05)
+        writer.start()
+        for q in "abcde":
+            record(writer, q)
+        await writer.stop(timeout=2)
+        return writer.stats()
+
+    stats = asyncio.run(scenario())
+
+    assert [q for batch in written for q in batch] == list("abcde")
+    assert all(len(batch) <= 2 for batch in written)
+    assert (stats["written"], stats["queued"], stats["running"], stats["failed"]) == (5, 0, False, 0)
+
+
+def test_failed_batches_are_counted_and_do_not_stall_the_writer(monkeypatch):
+    class BrokenSession:
+        async def __aenter__(self):
+            raise RuntimeError("database is locked")
+
+        async def __aexit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(query_log, "AsyncSessionLocal", BrokenSession)
+
+    async def scenario():
+        writer = QueryLogWriter(max_queue=100, batch_size=10, flush_interval=0.01)
+        writer.start()
+        record(writer, "a")
+        await writer.stop(timeout=2)
+        return writer.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["failed"], stats["written"], stats["queued"]) == (1, 0, 0)
@@ -0,0 +1,75 @@
+# test_revisions.py
+
+import asyncio
+import random
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from app.core.chunker import CDC_MAX_WORDS, CDC_MIN_WORDS, CDC_OVERLAP_WORDS, chunk_text_cdc
+
+VOCABULARY = "tenant landlord rent deposit notice term premises repair insurance clause party agreement".split()
+
+
+def document(words=3000, seed=0):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCABULARY) + str(rng.randint(0, 99)) for _ in range(words))
+
+
+def test_cdc_chunks_fit_the_embedding_window_and_overlap():
+    text = document()
+    chunks, ids, meta = chunk_text_cdc(text, "doc")
+
+    assert len(set(ids)) == len(ids)
+    assert all(len(c.split()) <= CDC_MAX_WORDS + CDC_OVERLAP_WORDS for c in chunks)
+    assert all(len(c.split()) >= CDC_MIN_WORDS for c in chunks[:-1])
+    assert all(text[m["start"]:m["end"]] == c for c, m in zip(chunks, meta))
+    # Consecutive chunks share the overlap words, and together cover the text
+    assert chunks[1].split()[:CDC_OVERLAP_WORDS] == chunks[0].split()[-CDC_OVERLAP_WORDS:]
+    assert meta[0]["start"] == 0 and meta[-1]["end"] == len(text)
+
+
+def test_an_edit_changes_only_nearby_chunks():
+    text = document()
+    words = text.split()
+    words[1500] = "amended"
+    old = {m["hash"] for m in chunk_text_cdc(text, "v1")[2]}
+    new = [m["hash"] for m in chunk_text_cdc(" ".join(words), "v2")[2]]
+
+    changed = [h for h in new if h not in old]
+    assert 1 <= len(changed) <= 3
+
+
+def test_diff_chunks_reuses_matching_hashes_and_retires_the_rest():
+    pytest.importorskip("aiosqlite")
+    pytest.importorskip("langchain_community")
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from app.db.models import Base, Chunk, Document
+    from app.services.revision_service import diff_chunks
+
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine, autoflush=False, expire_on_commit=False)() as db:
+            previous = Document(filename="lease.pdf", file_path="lease.pdf", status="processed", doc_uid="v1")
+            db.add(previous)
+            await db.flush()
+            db.add_all([
+                Chunk(document_id=previous.id, chunk_id="v1_a", text="a", content_hash="ha"),
+                Chunk(document_id=previous.id, chunk_id="v1_b", text="b", content_hash="hb"),
+            ])
+            await db.commit()
+
+            chunk_ids = ["v2_a", "v2_c"]
+            metadata = [{"chunk_id": "v2_a", "hash": "ha"}, {"chunk_id": "v2_c", "hash": "hc"}]
+            diff = await diff_chunks(db, previous, chunk_ids, metadata)
+        await engine.dispose()
+        return diff, chunk_ids, metadata
+
+    diff, chunk_ids, metadata = asyncio.run(scenario())
+
+    assert diff.reused == ["v1_a"] and diff.removed == ["v1_b"]
+    assert chunk_ids == ["v1_a", "v2_c"]
+    assert metadata[0]["chunk_id"] == "v1_a"
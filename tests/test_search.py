@@ -0,0 +1,85 @@
+# test_search.py
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.fts import create_fts
+from app.db.models import Base, Chunk, Document
+from app.services.search_service import SearchQueryError, build_match, highlight, search_chunks
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = tmp_path / "search.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        try:
+            create_fts(conn)
+        except Exception as e:
+            pytest.skip(f"SQLite without FTS5: {e}")
+    with sessionmaker(bind=engine)() as db:
+        current = Document(filename="lease.pdf", file_path="a", status="processed", author="ana", doc_type="lease")
+        old = Document(filename="lease.pdf", file_path="b", status="superseded", author="ana", doc_type="lease")
+        db.add_all([current, old])
+        db.flush()
+        db.add_all([
+            Chunk(document_id=current.id, chunk_id="c1", text="The tenant pays <b>rent</b> monthly & on time."),
+            Chunk(document_id=current.id, chunk_id="c2", text="Rent reviews happen yearly; rent rises with CPI."),
+            Chunk(document_id=old.id, chunk_id="o1", text="The tenant pays rent weekly."),
+        ])
+        db.commit()
+        # Edits go through the triggers
+        db.query(Chunk).filter(Chunk.chunk_id == "c2").update({"text": "Rent reviews happen yearly; rent rises."})
+        db.commit()
+    engine.dispose()
+    return f"sqlite+aiosqlite:///{path}"
+
+
+def search(url, q, **kwargs):
+    async def scenario():
+        engine = create_async_engine(url)
+        try:
+            async with async_sessionmaker(engine)() as db:
+                return await search_chunks(db, q, **kwargs)
+        finally:
+            await engine.dispose()
+    return asyncio.run(scenario())
+
+
+def test_search_ranks_current_versions_only(database):
+    hits = search(database, "rent")
+    assert [h["chunk_id"] for h in hits] == ["c2", "c1"]
+    assert hits[0]["score"] > hits[1]["score"]
+    assert search(database, "rises")[0]["snippet"].endswith("<mark>rises</mark>.")
+    assert search(database, "CPI") == []
+
+
+def test_snippets_escape_document_text(database):
+    snippet = search(database, "monthly")[0]["snippet"]
+    assert "&lt;b&gt;rent&lt;/b&gt; <mark>monthly</mark> &amp; on time." in snippet
+    assert "<b>" not in snippet
+
+
+def test_filters_and_modes(database):
+    assert search(database, "rent", author="someone else") == []
+    assert [h["chunk_id"] for h in search(database, "pays ren", mode="prefix")] == ["c1"]
+    assert [h["chunk_id"] for h in search(database, "reviews happen", mode="phrase")] == ["c2"]
+    with pytest.raises(SearchQueryError):
+        search(database, '"unterminated')
+
+
+def test_build_match_and_highlight():
+    assert build_match('say "hi"', mode="phrase") == '"say ""hi"""'
+    assert build_match("ten pa", mode="prefix") == '"ten"* AND "pa"*'
+    with pytest.raises(SearchQueryError):
+        build_match("...", mode="prefix")
+    assert highlight("a < \x02b\x03") == "a &lt; <mark>b</mark>"
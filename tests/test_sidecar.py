@@ -0,0 +1,102 @@
+# test_sidecar.py
+
+import asyncio
+import os
+import tempfile
+import threading
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("langchain_core")
+
+from app.services.sidecar import EmbedBatcher, SidecarClient, SidecarError, SidecarServer
+
+
+def test_concurrent_requests_are_embedded_in_one_batch():
+    calls = []
+
+    def embed(texts):
+        calls.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    async def scenario():
+        batcher = EmbedBatcher(embed, window=0.05, max_batch=64)
+        runner = asyncio.ensure_future(batcher.run())
+        try:
+            return await asyncio.gather(batcher.submit(["a", "bb"]), batcher.submit(["ccc"]))
+        finally:
+            runner.cancel()
+
+    first, second = asyncio.run(scenario())
+
+    assert calls == [["a", "bb", "ccc"]]
+    assert first == [[1.0], [2.0]] and second == [[3.0]]
+
+
+def test_embedding_errors_reach_every_caller_in_the_batch():
+    def embed(texts):
+        raise RuntimeError("model not loaded")
+
+    async def scenario():
+        batcher = EmbedBatcher(embed, window=0.02, max_batch=64)
+        runner = asyncio.ensure_future(batcher.run())
+        try:
+            return await asyncio.gather(batcher.submit(["a"]), batcher.submit(["b"]), return_exceptions=True)
+        finally:
+            runner.cancel()
+
+    assert [type(r) for r in asyncio.run(scenario())] == [RuntimeError, RuntimeError]
+
+
+class EchoServer(SidecarServer):
+    # Skips loading the vector store; only the framing is under test
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+
+    async def dispatch(self, op, args):
+        if op == "echo":
+            return args
+        raise ValueError(f"Unknown sidecar op '{op}'")
+
+
+def test_client_round_trip_over_the_socket():
+    path = os.path.join(tempfile.mkdtemp(), "sidecar.sock")
+    ready = threading.Event()
+    loop = asyncio.new_event_loop()
+
+    async def serve():
+        server = await asyncio.start_unix_server(EchoServer().handle, path=path)
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    def run():
+        loop.create_task(serve())
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert ready.wait(2)
+    try:
+        client = SidecarClient(path, timeout=2)
+        assert client.call("echo", texts=["x"], k=3) == {"texts": ["x"], "k": 3}
+        with pytest.raises(SidecarError):
+            client.call("nope")
+        # The connection survives an error reply
+        assert client.call("echo", n=1) == {"n": 1}
+    finally:
+        client._drop()
+        asyncio.run_coroutine_threadsafe(_cancel_other_tasks(), loop).result(2)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(2)
+        loop.close()
+
+
+async def _cancel_other_tasks():
+    # Lets the server and its connection handlers unwind before the loop stops
+    others = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    for task in others:
+        task.cancel()
+    await asyncio.gather(*others, return_exceptions=True)
@@ -1 +1,57 @@
-# test_theme_extractor.py
\ No newline at end of file
+# test_theme_extractor.py
+
+from collections import Counter
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("joblib")
+pytest.importorskip("filelock")
+pytest.importorskip("sklearn")
+np = pytest.importorskip("numpy")
+
+from app.services import theme_service
+from app.services.theme_service import UNASSIGNED, assign_themes, keyword_label, themes_for_chunks
+
+
+@pytest.fixture
+def fresh_state(monkeypatch, tmp_path):
+    monkeypatch.setattr(theme_service.settings, "THEME_MODEL_PATH", str(tmp_path / "themes.joblib"))
+    monkeypatch.setattr(theme_service.settings, "THEME_CLUSTERS", 2)
+    monkeypatch.setattr(theme_service, "_state_cache", None)
+    monkeypatch.setattr(theme_service, "schedule_relabel", lambda: None)
+
+
+def test_chunks_wait_as_pending_until_the_first_fit(fresh_state):
+    md = [{}]
+    backfilled = assign_themes(["a"], ["lease rent payment"], [[1.0, 0.0]], md)
+    assert backfilled == {}
+    assert md[0]["theme_cluster"] == UNASSIGNED
+
+    md = [{}, {}]
+    backfilled = assign_themes(["b", "c"], ["lease rent landlord", "privacy data breach"],
+                               [[0.9, 0.1], [0.0, 1.0]], md)
+
+    # The pending chunk is clustered now and handed back for a metadata update
+    assert set(backfilled) == {"a"}
+    assert {m["theme_cluster"] for m in md} == {0, 1}
+    assert backfilled["a"] == md[0]["theme_cluster"]
+
+
+def test_themes_for_chunks_uses_labels_then_keywords(fresh_state):
+    assign_themes(["a", "b", "c"], ["lease rent landlord", "lease rent tenant", "privacy data breach"],
+                  [[1.0, 0.0], [0.9, 0.1], [0.0, 1.0]], [{}, {}, {}])
+    state = theme_service._load_state()
+    lease = int(state["kmeans"].predict(np.asarray([[1.0, 0.0]], dtype=np.float32))[0])
+    state["labels"][lease] = "Leases"
+
+    themes = themes_for_chunks([{"theme_cluster": lease}, {"theme_cluster": lease},
+                                {"theme_cluster": 1 - lease}, {"theme_cluster": UNASSIGNED}])
+
+    assert themes[0] == "Leases"
+    assert "Privacy" in themes[1]
+
+
+def test_keyword_label():
+    assert keyword_label(Counter({"rent": 3, "lease": 2, "tenant": 1, "deposit": 1})) == "Rent / Lease / Tenant"
+    assert keyword_label(Counter()) == "Miscellaneous"
@@ -0,0 +1,174 @@
+# test_upload.py
+
+import sys
+
+import pytest
+
+from app.core import extractors
+from app.core.extractors import Extractor, detect_extractor, supported_extensions
+
+
+@pytest.fixture
+def no_sniffing(monkeypatch):
+    monkeypatch.setattr(extractors, "sniff_mime", lambda path: None)
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("contract.PDF", "pdf"),
+    ("notes.docx", "docx"),
+    ("deck.pptx", "pptx"),
+    ("scan.tiff", "image"),
+    ("photo.jpeg", "image"),
+    ("archive.zip", None),
+])
+def test_extractor_falls_back_to_the_extension(no_sniffing, name, expected):
+    extractor = detect_extractor(name)
+    assert (extractor.name if extractor else None) == expected
+
+
+def test_sniffed_content_type_wins_over_the_extension(monkeypatch):
+    monkeypatch.setattr(extractors, "sniff_mime", lambda path: "application/pdf")
+    assert detect_extractor("misnamed.png").name == "pdf"
+
+
+def test_generic_content_type_uses_the_extension(monkeypatch):
+    monkeypatch.setattr(extractors, "sniff_mime", lambda path: "application/zip")
+    assert detect_extractor("notes.docx").name == "docx"
+
+
+def test_extractor_modules_load_on_first_use(monkeypatch):
+    monkeypatch.setitem(extractors.EXTRACTORS, "fake", Extractor(
+        "fake", "json:dumps", (".fake",), ("application/x-fake",), extractors.IO
+    ))
+    assert detect_extractor("x.fake").load() is sys.modules["json"].dumps
+    assert ".fake" in supported_extensions()
+
+
+def test_registry_does_not_import_format_libraries():
+    for module in ("app.core.ocr", "app.core.word", "app.core.ppt", "app.core.image"):
+        if module in sys.modules:
+            pytest.skip("imported by another test")
+    assert {".pdf", ".docx", ".pptx", ".png"} <= set(supported_extensions())
+    assert not {"app.core.ocr", "app.core.word", "app.core.ppt", "app.core.image"} & set(sys.modules)
+
+
+def test_discard_document_removes_rows_and_vectors_after_a_rollback(monkeypatch, tmp_path):
+    pytest.importorskip("dotenv")
+    pytest.importorskip("aiosqlite")
+    pytest.importorskip("langchain_community")
+    import asyncio
+    from sqlalchemy import func, select
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from app.api import upload
+    from app.db.models import Base, Chunk, Document
+
+    deleted = []
+    monkeypatch.setattr(upload, "delete_chunks", lambda ids, path: deleted.extend(ids))
+
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'upload.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            doc = Document(filename="a.pdf", file_path="a", status="indexing")
+            db.add(doc)
+            await db.commit()
+            db.add(Chunk(document_id=doc.id, chunk_id="c1", text="t"))
+            await db.commit()
+            doc_id = doc.id
+            # What a failed write leaves behind: every loaded object expired
+            await db.rollback()
+            await upload.discard_document(db, doc_id, ["c1"])
+            counts = [(await db.execute(select(func.count()).select_from(model))).scalar()
+                      for model in (Document, Chunk)]
+        await engine.dispose()
+        return counts
+
+    assert asyncio.run(scenario()) == [0, 0]
+    assert deleted == ["c1"]
+
+
+def test_failed_store_write_fails_the_upload_and_records_no_refs(monkeypatch, tmp_path):
+    pytest.importorskip("dotenv")
+    pytest.importorskip("aiosqlite")
+    pytest.importorskip("langchain_community")
+    pytest.importorskip("mmh3")
+    import io
+    import asyncio
+    from fastapi import BackgroundTasks, HTTPException
+    from sqlalchemy import func, select
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from app.api import upload
+    from app.config import settings
+    from app.services import vector_store
+    from app.core.dedup import DedupIndex
+    from app.db.models import Base, Chunk, Document
+
+    class InlinePool:
+        def __init__(self):
+            self.ran = []
+
+        async def run(self, fn, *args):
+            self.ran.append(fn.__name__)
+            return fn(*args)
+
+    class FailingCollection:
+        def upsert(self, **kwargs):
+            raise RuntimeError("chroma is down")
+
+    clause = "The tenant shall pay the monthly rent on the first business day of each month."
+    deleted = []
+    index = DedupIndex(str(tmp_path / "dedup.sqlite3"), threshold=0.8)
+    monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path / "data"))
+    cpu_pool, io_pool = InlinePool(), InlinePool()
+    monkeypatch.setattr(upload, "cpu_pool", cpu_pool)
+    monkeypatch.setattr(upload, "io_pool", io_pool)
+    monkeypatch.setattr(upload, "detect_extractor", lambda path: Extractor("text", "x:y", (".txt",), (), extractors.IO))
+    monkeypatch.setattr(upload, "extract_paragraphs", lambda *args: [
+        {"text_snippet": clause, "page_number": 1, "paragraph_number": 1},
+        {"text_snippet": clause, "page_number": 2, "paragraph_number": 1},
+    ])
+    monkeypatch.setattr(upload, "chunk_text_cdc", lambda text, doc_id: (
+        [clause, clause],
+        ["c1", "c2"],
+        [{"chunk_id": "c1", "doc_id": doc_id, "start": 0, "end": len(clause), "hash": "h"},
+         {"chunk_id": "c2", "doc_id": doc_id, "start": len(clause) + 2, "end": len(text), "hash": "h"}],
+    ))
+    monkeypatch.setattr(upload, "get_dedup_index", lambda: index)
+    monkeypatch.setattr(upload, "embed_texts", lambda texts: [[0.0] * 4 for _ in texts])
+    monkeypatch.setattr(upload, "assign_themes", lambda *args: {})
+    monkeypatch.setattr(vector_store, "sidecar_client", lambda: None)
+    monkeypatch.setattr(vector_store, "load_vector_store",
+                        lambda path: type("Store", (), {"_collection": FailingCollection()})())
+    monkeypatch.setattr(upload, "delete_chunks", lambda ids, path: deleted.extend(ids))
+
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'upload.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            file = type("Upload", (), {"filename": "lease.txt", "file": io.BytesIO(b"lease")})()
+            with pytest.raises(HTTPException) as failed:
+                await upload.ingest_document(BackgroundTasks(), file, "unknown", "general", db)
+            counts = [(await db.execute(select(func.count()).select_from(model))).scalar()
+                      for model in (Document, Chunk)]
+        await engine.dispose()
+        return failed.value.status_code, counts
+
+    assert asyncio.run(scenario()) == (500, [0, 0])
+    assert deleted == ["c1"]
+    assert index.stats() == {"canonical_chunks": 0, "duplicate_refs": 0}
+    # Blocking work stays off the event loop
+    assert "save_upload" in io_pool.ran
+    assert "pack_text" in cpu_pool.ran
+
+
+def test_save_upload_copies_and_hashes_the_file(tmp_path):
+    import io
+    import hashlib
+    from app.api.upload import save_upload
+
+    data = b"lease" * 500000
+    target = tmp_path / "lease.pdf"
+    assert save_upload(io.BytesIO(data), target) == hashlib.sha256(data).hexdigest()
+    assert target.read_bytes() == data
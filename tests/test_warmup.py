@@ -0,0 +1,61 @@
+# test_warmup.py
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from app.services import warmup
+
+
+@pytest.fixture
+def components(monkeypatch):
+    loaded = {"embeddings": True, "tokenizer": True}
+
+    def component(name):
+        def warm():
+            if not loaded[name]:
+                raise RuntimeError(f"{name} unavailable")
+        return warm
+
+    monkeypatch.setattr(warmup, "WARMUPS", {name: component(name) for name in loaded})
+    monkeypatch.setattr(warmup, "_status", {name: {"state": "pending"} for name in loaded})
+    monkeypatch.setattr(warmup, "_thread", None)
+    return loaded
+
+
+def settle():
+    if warmup._thread is not None:
+        warmup._thread.join(2)
+
+
+def test_first_probe_starts_loading(components):
+    status, waiting = warmup.readiness()
+    assert status in ("loading", "ready")
+    settle()
+    assert warmup.readiness() == ("ready", [])
+
+
+def test_failed_component_is_not_ready_and_is_retried(components):
+    components["tokenizer"] = False
+    warmup.readiness()
+    settle()
+
+    assert warmup.readiness() == ("failed", ["tokenizer"])
+    settle()
+    assert warmup.warmup_status()["tokenizer"]["state"] == "failed"
+
+    components["tokenizer"] = True
+    warmup.readiness()                  # retries in the background
+    settle()
+    assert warmup.readiness() == ("ready", [])
+
+
+def test_retry_only_reloads_failed_required_components(components, monkeypatch):
+    calls = []
+    monkeypatch.setitem(warmup.WARMUPS, "embeddings", lambda: calls.append("embeddings"))
+    components["tokenizer"] = False
+    warmup.start_warmup()
+    settle()
+    warmup.start_warmup()
+    settle()
+    assert calls == ["embeddings"]
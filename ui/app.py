@@ -4,6 +4,7 @@ from PyPDF2 import PdfReader
 from io import BytesIO
 import os
 import base64
+import json
 import uuid
 import pandas as pd
 
@@ -77,6 +78,7 @@ st.markdown("""
 
 # Backend URL
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
+PREVIEW_PARAGRAPHS = 50
 
 #BACKEND_URL = os.getenv("BACKEND_URL", "https://pranjal-arya-wasserstoff-aiinterntask.onrender.com")
 
@@ -115,8 +117,8 @@ st.markdown("## 📚 Real-Time RAG-Based Documents, Research and Thematic Analys
 # Document Upload Section
 st.subheader("Step 1: Upload Documents")
 uploaded_files = st.file_uploader(
-    "Choose documents (PDF, JPG, PNG, DOCX)",
-    type=["pdf", "jpg", "jpeg", "png", "docx"],
+    "Choose documents (PDF, JPG, PNG, TIFF, DOCX, PPTX)",
+    type=["pdf", "jpg", "jpeg", "png", "tif", "tiff", "bmp", "docx", "pptx"],
     accept_multiple_files=True
 )
 
@@ -149,7 +151,11 @@ if uploaded_files:
             ".jpg": "image/jpeg",
             ".jpeg": "image/jpeg",
             ".png": "image/png",
-            ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+            ".tif": "image/tiff",
+            ".tiff": "image/tiff",
+            ".bmp": "image/bmp",
+            ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            ".pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation"
         }.get(ext, "application/octet-stream")
         files = {"file": (uploaded.name, buffer, content_type)}
 
@@ -163,17 +169,33 @@ if uploaded_files:
         buffer.close()
         if resp and resp.ok:
             data = resp.json()
-            doc_id = data.get("doc_id")
-            full_text = data.get("full_text", "")
+            doc_id = data.get("document_id")
 
-            st.success(f"Uploaded: {uploaded.name} (ID: {doc_id})")
+            if data.get("unchanged"):
+                st.info(f"Unchanged: {uploaded.name} (ID: {doc_id}, version {data.get('version')})")
+            else:
+                st.success(
+                    f"Uploaded: {uploaded.name} (ID: {doc_id}, version {data.get('version', 1)}) – "
+                    f"{data.get('paragraphs', 0)} paragraphs, {data.get('embedded_chunks', 0)} chunks embedded"
+                )
             st.session_state.recent_docs.append(uploaded.name)
 
+            # The upload response carries no text; fetch the first paragraphs on demand
             with st.expander(f"📄 View extracted text from {uploaded.name}", expanded=False):
-                if full_text.strip():
-                    st.write(full_text)
-                else:
-                    st.warning("No text was extracted from this document.")
+                if st.checkbox("Load text", key=f"text_{doc_id}"):
+                    text_resp = requests.get(
+                        f"{BACKEND_URL}{data.get('text_url', f'/docs/{doc_id}/text')}",
+                        params={"para_start": 0, "para_end": PREVIEW_PARAGRAPHS},
+                        timeout=60
+                    )
+                    preview = text_resp.json() if text_resp.ok else {}
+                    paragraphs = preview.get("paragraphs", [])
+                    if paragraphs:
+                        st.write("\n\n".join(p["text"] for p in paragraphs))
+                        if preview.get("total_paragraphs", 0) > len(paragraphs):
+                            st.caption(f"First {len(paragraphs)} of {preview['total_paragraphs']} paragraphs")
+                    else:
+                        st.warning("No text was extracted from this document.")
         else:
             st.error(resp.text if resp else "Unknown upload error")
 
@@ -181,24 +203,103 @@ if uploaded_files:
 st.markdown("---")
 st.subheader("Step 2: Ask a Question")
 question = st.text_input("What do you want to know from the uploaded documents?")
+MODE_LABELS = {
+    "fast": "⚡ Fast – find passages (no AI answer)",
+    "standard": "💬 Standard – short answer with citations",
+    "full": "📊 Full – answer, per-document table and synthesis",
+}
+mode = st.radio(
+    "Answer depth",
+    list(MODE_LABELS),
+    format_func=MODE_LABELS.get,
+    horizontal=True,
+    help="Start fast; ask again in Standard or Full when you need a written answer."
+)
+def iter_sse(resp):
+    """Parse a text/event-stream response into (event, data) pairs."""
+    event, data = "message", []
+    for line in resp.iter_lines(decode_unicode=True):
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].strip())
+
+
+def stream_answer(payload):
+    """
+    Render the answer progressively from /query/stream and return the
+    collected result in the same shape as the /query/ response.
+    """
+    result = {"answer": "", "citations": [], "themes": [], "doc_table": [], "synthesized_summary": "",
+              "hits": [], "mode": payload.get("mode", "full")}
+    status = st.empty()
+    citations_ph = st.empty()
+    answer_ph = st.empty()
+    table_ph = st.empty()
+    themes_ph = st.empty()
+    summary_ph = st.empty()
+
+    status.info("🔎 Searching documents...")
+    with requests.post(f"{BACKEND_URL}/query/stream", json=payload, stream=True, timeout=300) as resp:
+        if not resp.ok:
+            status.empty()
+            st.error(resp.text)
+            return None
+
+        for event, data in iter_sse(resp):
+            if event == "citations":
+                result["citations"] = data
+                status.info("✍️ Generating answer...")
+                citations_ph.markdown("📎 **Sources:** " + ", ".join(
+                    f"`{c.get('doc_id')}`" for c in data
+                ))
+            elif event == "token":
+                result["answer"] += data
+                answer_ph.markdown(f"💬 {result['answer']}▌")
+            elif event == "answer":
+                result["answer"] = data
+                answer_ph.markdown(f"💬 {data}")
+                status.info("📄 Checking each document...")
+            elif event == "doc_row":
+                result["doc_table"].append(data)
+                table_ph.table(pd.DataFrame(result["doc_table"]))
+            elif event == "themes":
+                result["themes"] = data
+                if data:
+                    themes_ph.markdown("🏷️ **Themes:** " + ", ".join(data))
+                status.info("🧠 Synthesizing...")
+            elif event == "summary":
+                result["synthesized_summary"] = data
+            elif event == "hits":
+                result["hits"] = data
+            elif event == "error":
+                result["answer"] = f"Error: {data}"
+                answer_ph.error(data)
+
+    # The full result is redrawn from chat history below
+    for ph in (status, citations_ph, answer_ph, table_ph, themes_ph, summary_ph):
+        ph.empty()
+    return result
+
+
 if st.button("Ask Question"):
     if not question.strip():
         st.warning("Please enter a question.")
     else:
-        payload = {"question": question.strip(), "top_k": 5}
-        with st.spinner("Thinking..."):
-            try:
-                resp = requests.post(f"{BACKEND_URL}/query/", json=payload)
-            except Exception as e:
-                st.error(f"Query failed: {e}")
-                resp = None
+        payload = {"question": question.strip(), "top_k": 5, "mode": mode}
+        try:
+            result = stream_answer(payload)
+        except Exception as e:
+            st.error(f"Query failed: {e}")
+            result = None
 
-        if resp and resp.ok:
-            result = resp.json()
+        if result:
             st.session_state.chat_history.append((question, result))
             st.success("Answer generated below ⬇️")
-        elif resp:
-            st.error(resp.text)
 
 # Display Chat History and Enhanced Responses
 if st.session_state.chat_history:
@@ -209,7 +310,7 @@ if st.session_state.chat_history:
         """, unsafe_allow_html=True)
 
         # 1. Show per-document table if available
-        if table := res.get("doc_table"):
+        if table := res.get("doc_table") or res.get("tabular_results"):
             df = pd.DataFrame(table)
             df = df.rename(columns={
                 "doc_id": "Document ID",
@@ -222,7 +323,14 @@ if st.session_state.chat_history:
         if summary := res.get("synthesized_summary"):
             st.markdown(f'<div class="chat-answer">🧠 <strong>Synthesized Response:</strong> {summary}</div>', unsafe_allow_html=True)
 
-        # 3. Fallback plain answer
+        # 3. Fast mode: ranked passages with highlighted sentences
+        for hit in res.get("hits", []):
+            highlights = " … ".join(f"**{h['text']}**" for h in hit.get("highlights", [])) or hit.get("snippet", "")
+            st.markdown(f"🔎 `{hit.get('filename') or hit.get('doc_id')}` (score {hit.get('score')}): {highlights}")
+        if res.get("mode") == "fast" and res.get("hits"):
+            st.caption("Need a written answer? Switch to Standard or Full and ask again.")
+
+        # 4. Fallback plain answer
         if not table and res.get("answer"):
             st.markdown(f'<div class="chat-answer">💬 A: {res.get("answer")}</div>', unsafe_allow_html=True)
 